@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the throughput and latency of the application.
+
+:mod:`dev.benchmark.synthetic_data` loads real estates and public law restrictions of a configurable size
+into the standard and interlis 2.3 schemas of the configured database, :mod:`dev.benchmark.runner` runs the
+benchmarks against them and writes the results as JSON, optionally compared with the results of a former
+run. Both are available as make targets (benchmark-data and benchmark).
+"""
@@ -0,0 +1,753 @@
+# -*- coding: utf-8 -*-
+import base64
+import collections
+import datetime
+import io
+import json
+import logging
+import math
+import optparse
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+import pyramid_oereb
+from pyramid_oereb.core.config import Config
+
+log = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+"""int: The version of the format of the results."""
+
+ENDPOINTS = (
+    'getegrid_en',
+    'getegrid_gnss',
+    'getegrid_identdn',
+    'getegrid_address',
+    'extract_json',
+    'extract_xml',
+    'extract_pdf',
+    'symbol',
+    'logo'
+)
+"""tuple of str: The endpoints of the generated requests."""
+
+DEFAULT_MIX = {
+    'getegrid_en': 20,
+    'getegrid_gnss': 5,
+    'getegrid_identdn': 10,
+    'getegrid_address': 5,
+    'extract_json': 20,
+    'extract_xml': 10,
+    'symbol': 25,
+    'logo': 5
+}
+"""dict: The default weights of the endpoints. The PDF extracts are only requested if they are weighted."""
+
+STUB_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+"""bytes: The image returned by the stub of the view services."""
+
+ACCESS_LOG_PATTERN = re.compile(r'"GET (\S+) HTTP/[\d.]+"')
+"""re.Pattern: The pattern of the requested path in a line of an access log (common log format)."""
+
+
+def percentile(values, q):
+    """
+    Args:
+        values (list of float): The sorted values.
+        q (float): The percentile between 0 and 1.
+
+    Returns:
+        float: The value of the percentile (nearest rank).
+    """
+    return values[max(int(math.ceil(len(values) * q)) - 1, 0)]
+
+
+def classify(path):
+    """
+    Returns the endpoint of a requested path.
+
+    Args:
+        path (str): The path with the query string.
+
+    Returns:
+        str: One of :data:`ENDPOINTS`, another extract format (e.g. extract_url), qrcode or other.
+    """
+    parts = urlsplit(path)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    params = set(key.upper() for key in parse_qs(parts.query))
+    if 'getegrid' in segments:
+        for param, endpoint in [('EN', 'getegrid_en'), ('GNSS', 'getegrid_gnss'),
+                                ('IDENTDN', 'getegrid_identdn'), ('POSTALCODE', 'getegrid_address')]:
+            if param in params:
+                return endpoint
+    elif 'extract' in segments:
+        index = segments.index('extract')
+        if index + 1 < len(segments):
+            return 'extract_{0}'.format(segments[index + 1].lower())
+    elif 'image' in segments:
+        index = segments.index('image')
+        if index + 1 < len(segments):
+            return segments[index + 1].lower()
+    return 'other'
+
+
+def read_access_log(path, route_prefix='oereb'):
+    """
+    Reads the requested paths of the application from an access log. The part before the route prefix is
+    removed, so logs of a proxy using another path can be replayed.
+
+    Args:
+        path (str): The path of the access log.
+        route_prefix (str): The route prefix of the application.
+
+    Returns:
+        list of tuple: The endpoint and the path of each GET request in the order of the log.
+    """
+    prefix = '/{0}/'.format(route_prefix)
+    paths = []
+    with open(path) as f:
+        for line in f:
+            match = ACCESS_LOG_PATTERN.search(line)
+            if match is None:
+                continue
+            requested = match.group(1)
+            index = requested.find(prefix)
+            if index < 0:
+                continue
+            requested = requested[index:]
+            paths.append((classify(requested), requested))
+    return paths
+
+
+def find_image_paths(value, route_prefix='oereb'):
+    """
+    Collects the paths of the symbols and logos referenced by an extract.
+
+    Args:
+        value (dict or list or str): The extract as returned by the JSON format.
+        route_prefix (str): The route prefix of the application.
+
+    Returns:
+        set of str: The paths with their query string.
+    """
+    paths = set()
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            paths.update(find_image_paths(item, route_prefix))
+    elif isinstance(value, str) and value.startswith('http'):
+        parts = urlsplit(value)
+        for kind in ['symbol', 'logo']:
+            index = parts.path.find('/{0}/image/{1}/'.format(route_prefix, kind))
+            if index >= 0:
+                paths.add(urlunsplit(('', '', parts.path[index:], parts.query, '')))
+    return paths
+
+
+class StubServer(object):
+    """
+    A local HTTP server standing in for the view services (GET, returns a PNG) and the print service (POST,
+    returns a PDF), so the load does not depend on external services.
+    """
+
+    def __init__(self, latency=0.0):
+        """
+
+        Args:
+            latency (float): The delay of each response in seconds.
+        """
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        writer.add_blank_page(width=595, height=842)
+        pdf = io.BytesIO()
+        writer.write(pdf)
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                self._respond(STUB_PNG, 'image/png')
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._respond(pdf.getvalue(), 'application/pdf')
+
+            def _respond(self, content, content_type):
+                if latency:
+                    time.sleep(latency)
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """
+        Returns:
+            str: The base URL of the server.
+        """
+        return 'http://127.0.0.1:{0}'.format(self._server.server_address[1])
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubAdapter(HTTPAdapter):
+
+    def __init__(self, base_url, **kwargs):
+        """
+        Sends the requests of a session to the passed server, keeping their path and query string.
+
+        Args:
+            base_url (str): The base URL of the server, e.g. the one of a :class:`StubServer`.
+        """
+        super(StubAdapter, self).__init__(**kwargs)
+        self._base_url = urlsplit(base_url)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = urlunsplit((self._base_url.scheme, self._base_url.netloc, parts.path, parts.query, ''))
+        kwargs['proxies'] = {}
+        kwargs['verify'] = False
+        return super(StubAdapter, self).send(request, **kwargs)
+
+
+def stub_services(base_url):
+    """
+    Sends the downloads of the view services and the requests of the print service to a stub.
+
+    Args:
+        base_url (str): The base URL of the stub.
+    """
+    from pyramid_oereb.core.processor import create_processor
+
+    wms_downloader = create_processor().wms_downloader
+    if wms_downloader is not None:
+        adapter = StubAdapter(base_url)
+        wms_downloader.session.mount('http://', adapter)
+        wms_downloader.session.mount('https://', adapter)
+    print_config = Config.get('print')
+    if print_config is not None:
+        print_config['base_url'] = '{0}/print/oereb'.format(base_url)
+
+
+class Statistics(object):
+
+    def __init__(self):
+        """
+        The latencies and status codes of the requests, collected from several clients.
+        """
+        self._lock = threading.Lock()
+        self._latencies = collections.defaultdict(list)
+        self._errors = collections.Counter()
+        self._statuses = collections.defaultdict(collections.Counter)
+
+    def add(self, endpoint, duration, status):
+        """
+        Adds a request.
+
+        Args:
+            endpoint (str): The endpoint.
+            duration (float): The latency in seconds.
+            status (int or None): The status code or None if the request failed without response.
+        """
+        with self._lock:
+            self._latencies[endpoint].append(duration)
+            self._statuses[endpoint][str(status) if status is not None else 'exception'] += 1
+            if status is None or status >= 400:
+                self._errors[endpoint] += 1
+
+    def _summarize(self, latencies, errors, statuses, elapsed):
+        latencies_ms = sorted([latency * 1000 for latency in latencies])
+        count = len(latencies_ms)
+        return {
+            'count': count,
+            'errors': errors,
+            'error_rate': round(errors / count, 4),
+            'throughput': round(count / elapsed, 3) if elapsed else None,
+            'mean_ms': round(sum(latencies_ms) / count, 3),
+            'p50_ms': round(percentile(latencies_ms, 0.5), 3),
+            'p95_ms': round(percentile(latencies_ms, 0.95), 3),
+            'p99_ms': round(percentile(latencies_ms, 0.99), 3),
+            'max_ms': round(latencies_ms[-1], 3),
+            'statuses': dict(statuses)
+        }
+
+    def summarize(self, elapsed):
+        """
+        Args:
+            elapsed (float): The duration of the run in seconds.
+
+        Returns:
+            dict: The summary of all requests (total) and of each endpoint (endpoints).
+        """
+        with self._lock:
+            endpoints = {
+                endpoint: self._summarize(latencies, self._errors[endpoint], self._statuses[endpoint],
+                                          elapsed)
+                for endpoint, latencies in sorted(self._latencies.items())
+            }
+            statuses = collections.Counter()
+            for counter in self._statuses.values():
+                statuses.update(counter)
+            latencies = [latency for values in self._latencies.values() for latency in values]
+            total = self._summarize(latencies, sum(self._errors.values()), statuses, elapsed) \
+                if latencies else None
+        return {'total': total, 'endpoints': endpoints}
+
+
+class MixedPaths(object):
+
+    def __init__(self, paths, weights):
+        """
+        Picks the requests at random: first the endpoint by its weight, then one of its paths.
+
+        Args:
+            paths (dict): The paths (list of str) by endpoint.
+            weights (dict): The weights (int or float) by endpoint.
+        """
+        self._endpoints = [endpoint for endpoint in paths if paths[endpoint] and weights.get(endpoint)]
+        if not self._endpoints:
+            raise LookupError('No paths found for the weighted endpoints.')
+        self._weights = [weights[endpoint] for endpoint in self._endpoints]
+        self._paths = paths
+
+    def next(self, rnd):
+        endpoint = rnd.choices(self._endpoints, self._weights)[0]
+        return endpoint, rnd.choice(self._paths[endpoint])
+
+
+class ReplayedPaths(object):
+
+    def __init__(self, paths, loop=False):
+        """
+        Picks the requests in the order of an access log, shared by all clients.
+
+        Args:
+            paths (list of tuple): The endpoint and the path of each request.
+            loop (bool): True to start over at the end of the log, otherwise the run stops there.
+        """
+        if not paths:
+            raise LookupError('No requests of the application found in the access log.')
+        self._paths = paths
+        self._loop = loop
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def next(self, rnd):
+        with self._lock:
+            if self._index >= len(self._paths):
+                if not self._loop:
+                    return None
+                self._index = 0
+            item = self._paths[self._index]
+            self._index += 1
+            return item
+
+
+class LoadGenerator(object):
+    """
+    Sends requests of several concurrent clients to the WSGI application of ``pyramid_oereb.main`` in the
+    same process. The clients call the application directly through WebTest or, to include the HTTP
+    handling, a local waitress server.
+    """
+
+    def __init__(self, configuration, section='pyramid_oereb', clients=4, server=False, language='de',
+                 stub_latency=0.0, timeout=60.0, seed=0):
+        """
+
+        Args:
+            configuration (str): Path to the configuration yaml file.
+            section (str): The used section within the yaml file. Default is `pyramid_oereb`.
+            clients (int): The number of concurrent clients.
+            server (bool): True to send the requests through a local waitress server.
+            language (str): The language of the requested extracts.
+            stub_latency (float): The delay of the responses of the stubbed view and print services in
+                seconds.
+            timeout (float): The timeout of the requests through the server in seconds.
+            seed (int): The seed of the random choices of the clients.
+        """
+        self._clients = clients
+        self._server = server
+        self._language = language
+        self._timeout = timeout
+        self._seed = seed
+        self._app = pyramid_oereb.main({}, **{
+            'pyramid_oereb.cfg.file': configuration,
+            'pyramid_oereb.cfg.section': section
+        })
+        self._stub = StubServer(latency=stub_latency)
+        self._stub.start()
+        stub_services(self._stub.url)
+
+    def get_paths(self, real_estates=20, extracts=3):
+        """
+        Creates the paths of the endpoints from the configured database: the real estates are evenly
+        distributed over all of them, the symbols and logos are the ones referenced by the first extracts.
+
+        Args:
+            real_estates (int): The number of real estates the requests are created for.
+            extracts (int): The number of JSON extracts the symbols and logos are collected from.
+
+        Returns:
+            dict: The paths (list of str) by endpoint.
+        """
+        from geoalchemy2.shape import to_shape
+        from pyreproj import Reprojector
+        from sqlalchemy import func
+        from webtest import TestApp
+        from pyramid_oereb import database_adapter
+        from pyramid_oereb.contrib.data_sources.standard.models.main import Address, RealEstate
+
+        prefix = '/{0}'.format(pyramid_oereb.route_prefix)
+        session = database_adapter.get_session(Config.get('app_schema').get('db_connection'))
+        try:
+            total = session.query(func.count(RealEstate.id)).scalar()
+            step = max(total // real_estates, 1)
+            # Every step-th real estate is sampled in the database, only the sampled rows are loaded
+            numbered = session.query(
+                RealEstate.id.label('id'),
+                func.row_number().over(order_by=RealEstate.egrid).label('position')
+            ).subquery()
+            rows = session.query(
+                RealEstate.egrid,
+                RealEstate.identdn,
+                RealEstate.number,
+                func.ST_PointOnSurface(RealEstate.limit).label('point')
+            ).join(numbered, numbered.c.id == RealEstate.id).filter(
+                (numbered.c.position - 1) % step == 0
+            ).order_by(numbered.c.position).limit(real_estates).all()
+            addresses = session.query(Address).order_by(Address.zip_code, Address.street_name).limit(
+                real_estates
+            ).all()
+        finally:
+            session.close()
+        if not rows:
+            raise LookupError('No real estates found in the configured database.')
+
+        reprojector = Reprojector()
+        srs = 'epsg:{0}'.format(Config.get('srid'))
+        paths = collections.defaultdict(list)
+        for row in rows:
+            point = to_shape(row.point)
+            paths['getegrid_en'].append('{0}/getegrid/json?EN={1},{2}'.format(prefix, point.x, point.y))
+            gnss = reprojector.transform((point.x, point.y), from_srs=srs, to_srs='epsg:4326')
+            paths['getegrid_gnss'].append('{0}/getegrid/json?GNSS={1},{2}'.format(prefix, *gnss))
+            paths['getegrid_identdn'].append('{0}/getegrid/json?{1}'.format(prefix, urlencode({
+                'IDENTDN': row.identdn,
+                'NUMBER': row.number
+            })))
+            for response_format in ['json', 'xml', 'pdf']:
+                paths['extract_{0}'.format(response_format)].append(
+                    '{0}/extract/{1}?EGRID={2}&LANG={3}'.format(prefix, response_format, row.egrid,
+                                                                self._language)
+                )
+        for address in addresses:
+            paths['getegrid_address'].append('{0}/getegrid/json?{1}'.format(prefix, urlencode({
+                'POSTALCODE': address.zip_code,
+                'LOCALISATION': address.street_name,
+                'NUMBER': address.street_number
+            })))
+
+        client = TestApp(self._app)
+        images = set()
+        for path in paths['extract_json'][:extracts]:
+            response = client.get(path, expect_errors=True)
+            if response.status_int == 200:
+                images.update(find_image_paths(response.json, pyramid_oereb.route_prefix))
+        for path in sorted(images):
+            paths[classify(path)].append(path)
+        return dict(paths)
+
+    def _create_send(self, base_url):
+        if base_url is None:
+            from webtest import TestApp
+            client = TestApp(self._app)
+
+            def send(path):
+                return client.get(path, expect_errors=True).status_int
+        else:
+            import requests
+            session = requests.Session()
+
+            def send(path):
+                return session.get(base_url + path, timeout=self._timeout).status_code
+        return send
+
+    def _run_client(self, index, paths, statistics, base_url, deadline, budget):
+        rnd = random.Random(self._seed + index)
+        send = self._create_send(base_url)
+        while deadline is None or time.perf_counter() < deadline:
+            if budget is not None:
+                with budget['lock']:
+                    if budget['left'] <= 0:
+                        break
+                    budget['left'] -= 1
+            item = paths.next(rnd)
+            if item is None:
+                break
+            endpoint, path = item
+            start = time.perf_counter()
+            try:
+                status = send(path)
+            except Exception as e:
+                log.debug('Request of {0} failed: {1}'.format(path, e))
+                status = None
+            statistics.add(endpoint, time.perf_counter() - start, status)
+
+    def run(self, paths, duration=None, requests=None):
+        """
+        Sends the requests of the clients until the duration has passed, the number of requests has been
+        sent or the paths are exhausted.
+
+        Args:
+            paths (MixedPaths or ReplayedPaths): The requested paths.
+            duration (float or None): The duration of the run in seconds.
+            requests (int or None): The total number of requests.
+
+        Returns:
+            dict: The results as they are written to the JSON file.
+        """
+        server = None
+        base_url = None
+        if self._server:
+            from waitress.server import create_server
+            server = create_server(self._app, host='127.0.0.1', port=0, threads=self._clients)
+            base_url = 'http://127.0.0.1:{0}'.format(server.effective_port)
+            threading.Thread(target=server.run, daemon=True).start()
+        statistics = Statistics()
+        budget = {'left': requests, 'lock': threading.Lock()} if requests is not None else None
+        start = time.perf_counter()
+        deadline = start + duration if duration is not None else None
+        clients = [
+            threading.Thread(
+                target=self._run_client,
+                args=(index, paths, statistics, base_url, deadline, budget),
+                name='pyramid_oereb_load_{0}'.format(index)
+            )
+            for index in range(self._clients)
+        ]
+        try:
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+        finally:
+            if server is not None:
+                server.close()
+        elapsed = time.perf_counter() - start
+        results = {
+            'format_version': RESULTS_VERSION,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'settings': {
+                'clients': self._clients,
+                'server': self._server,
+                'duration': duration,
+                'requests': requests,
+                'language': self._language
+            },
+            'elapsed_s': round(elapsed, 3)
+        }
+        results.update(statistics.summarize(elapsed))
+        return results
+
+    def stop(self):
+        self._stub.stop()
+
+
+def format_results(results):
+    """
+    Args:
+        results (dict): The results of :meth:`LoadGenerator.run`.
+
+    Returns:
+        str: The results as table.
+    """
+    row = '{0:<20} {1:>8} {2:>7} {3:>9} {4:>10} {5:>10} {6:>10}'
+    lines = [row.format('endpoint', 'count', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms')]
+    summaries = list(results['endpoints'].items())
+    if results['total'] is not None:
+        summaries.append(('total', results['total']))
+    for endpoint, summary in summaries:
+        lines.append(row.format(
+            endpoint, summary['count'], '{0:.1%}'.format(summary['error_rate']), summary['throughput'],
+            summary['p50_ms'], summary['p95_ms'], summary['p99_ms']
+        ))
+    return '\n'.join(lines)
+
+
+def parse_mix(value):
+    """
+    Args:
+        value (str): The weights of the endpoints, e.g. 'extract_json=3,symbol=1'.
+
+    Returns:
+        dict: The weights by endpoint.
+
+    Raises:
+        ValueError: Raised if an endpoint is unknown.
+    """
+    mix = {}
+    for item in value.split(','):
+        endpoint, weight = item.split('=', 1)
+        endpoint = endpoint.strip()
+        if endpoint not in ENDPOINTS:
+            raise ValueError('Unknown endpoint {0}, use one of {1}.'.format(endpoint, ', '.join(ENDPOINTS)))
+        mix[endpoint] = float(weight)
+    return mix
+
+
+def _run():
+    """
+    Generates load and writes the latencies as JSON. Check 'python -m dev.benchmark.load --help' for
+    available options.
+    """
+    parser = optparse.OptionParser(
+        usage='usage: %prog [options]',
+        description='Sends the requests of concurrent clients to the application in the same process.'
+    )
+    parser.add_option(
+        '-c', '--configuration',
+        dest='configuration',
+        metavar='YAML',
+        type='string',
+        help='The absolute path to the configuration yaml file.'
+    )
+    parser.add_option(
+        '-s', '--section',
+        dest='section',
+        metavar='SECTION',
+        type='string',
+        default='pyramid_oereb',
+        help='The section which contains configruation (default is: pyramid_oereb).'
+    )
+    parser.add_option(
+        '--clients',
+        type='int',
+        default=4,
+        help='The number of concurrent clients (default is: 4).'
+    )
+    parser.add_option(
+        '--duration',
+        type='float',
+        help='The duration of the run in seconds (default is: 60 without --requests).'
+    )
+    parser.add_option(
+        '--requests',
+        type='int',
+        help='The total number of requests.'
+    )
+    parser.add_option(
+        '--mix',
+        type='string',
+        help='The weights of the endpoints, e.g. extract_json=3,symbol=1 (default is: {0}).'.format(
+            ','.join('{0}={1}'.format(endpoint, weight) for endpoint, weight in DEFAULT_MIX.items())
+        )
+    )
+    parser.add_option(
+        '--access-log',
+        dest='access_log',
+        metavar='LOG',
+        type='string',
+        help='An access log whose GET requests are replayed in their order instead of the mix.'
+    )
+    parser.add_option(
+        '--loop',
+        action='store_true',
+        default=False,
+        help='Start over at the end of the access log.'
+    )
+    parser.add_option(
+        '--real-estates',
+        dest='real_estates',
+        type='int',
+        default=20,
+        help='The number of real estates the mix is created for (default is: 20).'
+    )
+    parser.add_option(
+        '--server',
+        action='store_true',
+        default=False,
+        help='Send the requests through a local waitress server instead of calling the application directly.'
+    )
+    parser.add_option(
+        '--stub-latency',
+        dest='stub_latency',
+        type='float',
+        default=0.0,
+        help='The delay of the stubbed view and print services in milliseconds (default is: 0).'
+    )
+    parser.add_option(
+        '--seed',
+        type='int',
+        default=0,
+        help='The seed of the random choices of the clients (default is: 0).'
+    )
+    parser.add_option(
+        '-o', '--output',
+        dest='output',
+        metavar='JSON',
+        type='string',
+        help='The file the results are written to (default is: stdout).'
+    )
+    options, args = parser.parse_args()
+    if not options.configuration:
+        parser.error('No configuration file set.')
+    try:
+        mix = parse_mix(options.mix) if options.mix else DEFAULT_MIX
+    except ValueError as e:
+        parser.error(str(e))
+    duration = options.duration
+    if duration is None and options.requests is None and (not options.access_log or options.loop):
+        duration = 60.0
+    generator = LoadGenerator(
+        options.configuration,
+        section=options.section,
+        clients=options.clients,
+        server=options.server,
+        stub_latency=options.stub_latency / 1000,
+        seed=options.seed
+    )
+    try:
+        if options.access_log:
+            paths = ReplayedPaths(
+                read_access_log(options.access_log, pyramid_oereb.route_prefix),
+                loop=options.loop
+            )
+        else:
+            paths = MixedPaths(generator.get_paths(real_estates=options.real_estates), mix)
+        results = generator.run(paths, duration=duration, requests=options.requests)
+    finally:
+        generator.stop()
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    print(format_results(results), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    _run()
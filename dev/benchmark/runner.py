@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+import datetime
+import gc
+import json
+import logging
+import math
+import optparse
+import platform
+import statistics
+import sys
+import time
+from importlib.metadata import PackageNotFoundError, version
+
+from pyramid.config import Configurator
+from pyramid.renderers import render
+from pyramid.request import Request
+from pyramid.scripting import prepare
+
+from pyramid_oereb.core.config import Config
+from dev.benchmark.synthetic_data import EGRID_PREFIX
+
+log = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+"""int: The version of the format of the results."""
+
+
+def summarize(name, kind, durations):
+    """
+    Summarizes the measured durations of a benchmark.
+
+    Args:
+        name (str): The name of the benchmark.
+        kind (str): The kind of the benchmark, micro or macro.
+        durations (list of float): The durations of the runs in seconds.
+
+    Returns:
+        dict: The name, the kind, the number of runs, the statistics of the durations in milliseconds and
+        the runs per second.
+    """
+    durations_ms = sorted([duration * 1000 for duration in durations])
+    mean = statistics.mean(durations_ms)
+    return {
+        'name': name,
+        'kind': kind,
+        'runs': len(durations_ms),
+        'min_ms': round(durations_ms[0], 3),
+        'max_ms': round(durations_ms[-1], 3),
+        'mean_ms': round(mean, 3),
+        'median_ms': round(statistics.median(durations_ms), 3),
+        'p95_ms': round(durations_ms[max(int(math.ceil(len(durations_ms) * 0.95)) - 1, 0)], 3),
+        'stdev_ms': round(statistics.stdev(durations_ms), 3) if len(durations_ms) > 1 else 0.0,
+        'per_second': round(1000 / mean, 3) if mean else None
+    }
+
+
+def measure(func, inputs, repeat, warmup=1, setup=None):
+    """
+    Measures the duration of the function called with each of the inputs. The garbage collection is done
+    before each run and the result of ``setup`` is created outside of the measured time.
+
+    Args:
+        func (callable): The measured function. It is called with the input or the result of setup.
+        inputs (list): The inputs the function is called with one after another.
+        repeat (int): The number of measured runs per input.
+        warmup (int): The number of runs per input which are not measured.
+        setup (callable or None): Creates the argument of the function from the input.
+
+    Returns:
+        list of float: The durations in seconds.
+    """
+    durations = []
+    for run in range(warmup + repeat):
+        for value in inputs:
+            argument = setup(value) if setup is not None else value
+            gc.collect()
+            start = time.perf_counter()
+            func(argument)
+            if run >= warmup:
+                durations.append(time.perf_counter() - start)
+    return durations
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compares the results with the ones of a baseline, e.g. the last release.
+
+    Args:
+        results (dict): The results.
+        baseline (dict): The results of the baseline.
+        threshold (float): The relative increase of the median duration regarded as regression.
+
+    Returns:
+        list of dict: The comparison of each benchmark found in both results: name, the medians and their
+        relative change and whether it is a regression.
+    """
+    baseline_medians = {result['name']: result['median_ms'] for result in baseline.get('results', [])}
+    comparison = []
+    for result in results.get('results', []):
+        baseline_median = baseline_medians.get(result['name'])
+        if not baseline_median:
+            continue
+        change = (result['median_ms'] - baseline_median) / baseline_median
+        comparison.append({
+            'name': result['name'],
+            'median_ms': result['median_ms'],
+            'baseline_median_ms': baseline_median,
+            'change': round(change, 4),
+            'regression': change > threshold
+        })
+    return comparison
+
+
+class BenchmarkSuite(object):
+    """
+    Runs the benchmarks of the application against the configured database, usually filled with
+    :class:`dev.benchmark.synthetic_data.SyntheticData`. The micro benchmarks measure single steps of the
+    extract, the macro benchmarks whole requests through the WSGI application. Images are not downloaded,
+    so the results do not depend on the WMS.
+    """
+
+    def __init__(self, configuration, section='pyramid_oereb', real_estates=10, repeat=5, warmup=1,
+                 language='de'):
+        """
+
+        Args:
+            configuration (str): Path to the configuration yaml file.
+            section (str): The used section within the yaml file. Default is `pyramid_oereb`.
+            real_estates (int): The number of synthetic real estates the benchmarks are run for.
+            repeat (int): The number of measured runs per real estate.
+            warmup (int): The number of runs per real estate which are not measured.
+            language (str): The language of the extracts.
+        """
+        self._configuration = configuration
+        self._section = section
+        self._real_estates = real_estates
+        self._repeat = repeat
+        self._warmup = warmup
+        self._language = language
+
+        config = Configurator(settings={
+            'pyramid_oereb.cfg.file': configuration,
+            'pyramid_oereb.cfg.section': section
+        })
+        config.include('pyramid_oereb', route_prefix='oereb')
+        self._app = config.make_wsgi_app()
+        self._registry = config.registry
+
+    def get_real_estates(self):
+        """
+        Returns:
+            list of pyramid_oereb.core.records.real_estate.RealEstateRecord: The synthetic real estates
+            evenly distributed over all of them.
+        """
+        from pyramid_oereb import database_adapter
+        from pyramid_oereb.contrib.data_sources.standard.models.main import RealEstate
+        from pyramid_oereb.core.processor import create_processor
+
+        session = database_adapter.get_session(Config.get('app_schema').get('db_connection'))
+        try:
+            egrids = [row.egrid for row in session.query(RealEstate.egrid).filter(
+                RealEstate.egrid.like('{0}%'.format(EGRID_PREFIX))
+            ).order_by(RealEstate.egrid).all()]
+        finally:
+            session.close()
+        if not egrids:
+            raise LookupError('No synthetic real estates found, load them with dev.benchmark.synthetic_data')
+        step = max(len(egrids) // self._real_estates, 1)
+        params = self.get_params('json')
+        reader = create_processor().real_estate_reader
+        return [reader.read(params, egrid=egrid)[0] for egrid in egrids[::step][:self._real_estates]]
+
+    def get_params(self, response_format, real_estate=None):
+        """
+        Args:
+            response_format (str): The format of the extract.
+            real_estate (pyramid_oereb.core.records.real_estate.RealEstateRecord or None): The real estate.
+
+        Returns:
+            pyramid_oereb.core.views.webservice.Parameter: The parameters of an extract without images.
+        """
+        from pyramid_oereb.core.views.webservice import Parameter
+        return Parameter(
+            response_format,
+            egrid=real_estate.egrid if real_estate is not None else None,
+            language=self._language
+        )
+
+    def _measure(self, name, kind, func, inputs, setup=None):
+        log.info('Running benchmark {0}'.format(name))
+        durations = measure(func, inputs, self._repeat, warmup=self._warmup, setup=setup)
+        return summarize(name, kind, durations)
+
+    def run_micro(self, real_estates):
+        """
+        Runs the micro benchmarks: the processing of an extract, the tolerance check and the renderers.
+
+        Args:
+            real_estates (list of pyramid_oereb.core.records.real_estate.RealEstateRecord): The real
+                estates.
+
+        Returns:
+            list of dict: The summaries of the benchmarks.
+        """
+        from pyramid_oereb.core.processor import create_processor
+
+        processor = create_processor()
+        sld_url = 'http://localhost/oereb/sld'
+        results = []
+
+        def process(real_estate):
+            processor.process(real_estate, self.get_params('json', real_estate), sld_url)
+        results.append(self._measure('processor.process', 'micro', process, real_estates))
+
+        def read_extract(real_estate):
+            municipality = Config.municipality_by_fosnr(real_estate.fosnr)
+            return processor.extract_reader.read(self.get_params('json', real_estate), real_estate,
+                                                 municipality)
+        results.append(self._measure(
+            'processor.plr_tolerance_check', 'micro', processor.plr_tolerance_check, real_estates,
+            setup=read_extract
+        ))
+
+        extracts = [
+            processor.process(real_estate, self.get_params('json', real_estate), sld_url)
+            for real_estate in real_estates
+        ]
+        with prepare(registry=self._registry) as env:
+            request = env['request']
+            for response_format in ['json', 'xml']:
+                renderer_name = 'pyramid_oereb_extract_{0}'.format(response_format)
+
+                def render_extract(extract):
+                    params = self.get_params(response_format, extract.real_estate)
+                    render(renderer_name, (extract, params), request=request)
+                results.append(self._measure(
+                    'renderer.{0}'.format(response_format), 'micro', render_extract, extracts
+                ))
+        return results
+
+    def run_macro(self, real_estates):
+        """
+        Runs the macro benchmarks: the requests of extracts (JSON and XML) and of the EGRIDs (by coordinate
+        and by IdentDN and number) through the application.
+
+        Args:
+            real_estates (list of pyramid_oereb.core.records.real_estate.RealEstateRecord): The real
+                estates.
+
+        Returns:
+            list of dict: The summaries of the benchmarks.
+        """
+        results = []
+        for response_format in ['json', 'xml']:
+            paths = [
+                '/oereb/extract/{0}?EGRID={1}&LANG={2}'.format(response_format, real_estate.egrid,
+                                                               self._language)
+                for real_estate in real_estates
+            ]
+            results.append(self._measure(
+                'get_extract_by_id.{0}'.format(response_format), 'macro', self.request, paths
+            ))
+        paths = []
+        for real_estate in real_estates:
+            point = real_estate.limit.representative_point()
+            paths.append('/oereb/getegrid/json?EN={0},{1}'.format(point.x, point.y))
+        results.append(self._measure('get_egrid.en', 'macro', self.request, paths))
+        paths = [
+            '/oereb/getegrid/json?IDENTDN={0}&NUMBER={1}'.format(real_estate.identdn, real_estate.number)
+            for real_estate in real_estates
+        ]
+        results.append(self._measure('get_egrid.identdn', 'macro', self.request, paths))
+        return results
+
+    def request(self, path):
+        """
+        Sends a GET request to the application.
+
+        Args:
+            path (str): The path with the query string.
+
+        Returns:
+            webob.Response: The response.
+
+        Raises:
+            AssertionError: Raised if the response is not successful.
+        """
+        response = Request.blank(path).get_response(self._app)
+        assert response.status_code == 200, '{0} returned {1}'.format(path, response.status)
+        return response
+
+    def run(self):
+        """
+        Runs all benchmarks.
+
+        Returns:
+            dict: The results as they are written to the JSON file.
+        """
+        real_estates = self.get_real_estates()
+        results = self.run_micro(real_estates) + self.run_macro(real_estates)
+        try:
+            package_version = version('pyramid_oereb')
+        except PackageNotFoundError:
+            package_version = None
+        return {
+            'format_version': RESULTS_VERSION,
+            'pyramid_oereb': package_version,
+            'python': platform.python_version(),
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'settings': {
+                'real_estates': len(real_estates),
+                'repeat': self._repeat,
+                'warmup': self._warmup,
+                'language': self._language
+            },
+            'results': results
+        }
+
+
+def _run():
+    """
+    Runs the benchmarks and writes the results as JSON. Check 'python -m dev.benchmark.runner --help' for
+    available options.
+    """
+    parser = optparse.OptionParser(
+        usage='usage: %prog [options]',
+        description='Runs the benchmarks against the configured database.'
+    )
+    parser.add_option(
+        '-c', '--configuration',
+        dest='configuration',
+        metavar='YAML',
+        type='string',
+        help='The absolute path to the configuration yaml file.'
+    )
+    parser.add_option(
+        '-s', '--section',
+        dest='section',
+        metavar='SECTION',
+        type='string',
+        default='pyramid_oereb',
+        help='The section which contains configruation (default is: pyramid_oereb).'
+    )
+    parser.add_option(
+        '--real-estates',
+        dest='real_estates',
+        type='int',
+        default=10,
+        help='The number of synthetic real estates the benchmarks are run for (default is: 10).'
+    )
+    parser.add_option(
+        '--repeat',
+        type='int',
+        default=5,
+        help='The number of measured runs per real estate (default is: 5).'
+    )
+    parser.add_option(
+        '--warmup',
+        type='int',
+        default=1,
+        help='The number of runs per real estate which are not measured (default is: 1).'
+    )
+    parser.add_option(
+        '-o', '--output',
+        dest='output',
+        metavar='JSON',
+        type='string',
+        help='The file the results are written to (default is: stdout).'
+    )
+    parser.add_option(
+        '--baseline',
+        dest='baseline',
+        metavar='JSON',
+        type='string',
+        help='The results of a former run to compare with. Exits with 1 if a benchmark regressed.'
+    )
+    parser.add_option(
+        '--threshold',
+        type='float',
+        default=0.1,
+        help='The relative increase of the median regarded as regression (default is: 0.1).'
+    )
+    options, args = parser.parse_args()
+    if not options.configuration:
+        parser.error('No configuration file set.')
+    results = BenchmarkSuite(
+        options.configuration,
+        section=options.section,
+        real_estates=options.real_estates,
+        repeat=options.repeat,
+        warmup=options.warmup
+    ).run()
+    regressions = []
+    if options.baseline:
+        with open(options.baseline) as f:
+            results['comparison'] = compare(results, json.load(f), options.threshold)
+        regressions = [result['name'] for result in results['comparison'] if result['regression']]
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    if regressions:
+        print('Regressions: {0}'.format(', '.join(regressions)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    _run()
@@ -0,0 +1,603 @@
+# -*- coding: utf-8 -*-
+import base64
+import codecs
+import datetime
+import json
+import logging
+import math
+import optparse
+import os
+import random
+
+from shapely import wkt
+from shapely.geometry import GeometryCollection, LineString, MultiLineString, MultiPoint, MultiPolygon, \
+    Polygon
+from sqlalchemy import insert
+
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.contrib.data_sources.standard.sources.plr import StandardThemeConfigParser
+
+log = logging.getLogger(__name__)
+
+EGRID_PREFIX = 'CHBENCH'
+"""str: The prefix of the EGRIDs of the synthetic real estates (followed by 7 digits)."""
+
+SAMPLE_DIRECTORIES = {
+    'ch.BelasteteStandorteOeffentlicherVerkehr': 'contaminated_public_transport_sites',
+    'ch.Nutzungsplanung': 'land_use_plans',
+    'ch.Grundwasserschutzzonen': 'groundwater_protection_zones',
+    'ch.BaulinienNationalstrassen': 'motorways_building_lines',
+    'ch.BelasteteStandorteMilitaer': 'contaminated_military_sites',
+    'ch.StatischeWaldgrenzen': 'forest_perimeters'
+}
+"""dict: The directories of the sample data used as template for the themes. Other themes use the land use
+plans."""
+
+PARCEL_SIZE = 50.0
+"""float: The edge length of the synthetic real estates in meters."""
+
+PUBLISHED_FROM = datetime.date(2020, 1, 1)
+LANGUAGES = ['de', 'fr', 'it', 'rm', 'en']
+BATCH_SIZE = 1000
+
+
+def create_parcel(minx, miny, size, vertices):
+    """
+    Creates a square real estate whose boundary consists of the passed number of vertices.
+
+    Args:
+        minx (float): The x coordinate of the lower left corner.
+        miny (float): The y coordinate of the lower left corner.
+        size (float): The edge length.
+        vertices (int): The number of vertices, at least 4.
+
+    Returns:
+        shapely.geometry.Polygon: The real estate.
+    """
+    vertices = max(vertices, 4)
+    corners = [(minx, miny), (minx + size, miny), (minx + size, miny + size), (minx, miny + size)]
+    coordinates = []
+    for index, (x, y) in enumerate(corners):
+        next_x, next_y = corners[(index + 1) % 4]
+        # The vertices are distributed over the edges, every edge starts with its corner
+        count = vertices // 4 + (1 if index < vertices % 4 else 0)
+        for step in range(count):
+            coordinates.append((x + (next_x - x) * step / count, y + (next_y - y) * step / count))
+    return Polygon(coordinates)
+
+
+def create_polygon(x, y, radius, vertices, rnd):
+    """
+    Creates a star shaped polygon with randomly varied distances of the vertices to the center. The
+    polygon is always valid.
+
+    Args:
+        x (float): The x coordinate of the center.
+        y (float): The y coordinate of the center.
+        radius (float): The maximum distance of the vertices to the center.
+        vertices (int): The number of vertices, at least 3.
+        rnd (random.Random): The random generator.
+
+    Returns:
+        shapely.geometry.Polygon: The polygon.
+    """
+    vertices = max(vertices, 3)
+    coordinates = []
+    for index in range(vertices):
+        angle = 2 * math.pi * index / vertices
+        distance = radius * rnd.uniform(0.6, 1.0)
+        coordinates.append((x + distance * math.cos(angle), y + distance * math.sin(angle)))
+    return Polygon(coordinates)
+
+
+def to_geometry_type(polygon, geometry_type):
+    """
+    Converts the polygon to the geometry type of a geometry column.
+
+    Args:
+        polygon (shapely.geometry.Polygon): The polygon.
+        geometry_type (str): The geometry type of the column, e.g. GEOMETRYCOLLECTION.
+
+    Returns:
+        shapely.geometry.base.BaseGeometry: The geometry.
+    """
+    geometry_type = (geometry_type or 'GEOMETRY').upper()
+    if geometry_type == 'POINT':
+        return polygon.centroid
+    if geometry_type == 'MULTIPOINT':
+        return MultiPoint([polygon.centroid])
+    if geometry_type == 'LINESTRING':
+        return LineString(polygon.exterior.coords)
+    if geometry_type == 'MULTILINESTRING':
+        return MultiLineString([polygon.exterior.coords])
+    if geometry_type == 'MULTIPOLYGON':
+        return MultiPolygon([polygon])
+    if geometry_type == 'GEOMETRYCOLLECTION':
+        return GeometryCollection([polygon])
+    return polygon
+
+
+def to_ewkt(geometry):
+    """
+    Args:
+        geometry (shapely.geometry.base.BaseGeometry): The geometry.
+
+    Returns:
+        str: The geometry as EWKT with the configured SRID.
+    """
+    return 'SRID={0};{1}'.format(Config.get('srid'), geometry.wkt)
+
+
+class SyntheticData(object):
+    """
+    Generates synthetic real estates and public law restrictions of a configurable size to benchmark the
+    application. The themes using the standard or the interlis 2.3 models are filled, the offices, view
+    services, legend entries and documents are seeded from the sample data.
+
+    The existing public law restrictions of the filled themes are deleted, so the data should be loaded
+    into a dedicated benchmark database.
+    """
+
+    def __init__(self, configuration, section='pyramid_oereb', c2ctemplate_style=False,
+                 directory='sample_data', parcels=100, plrs_per_parcel=5, vertices=32, documents_per_plr=2,
+                 seed=1):
+        """
+
+        Args:
+            configuration (str): Path to the configuration yaml file.
+            section (str): The used section within the yaml file. Default is `pyramid_oereb`.
+            c2ctemplate_style (bool): True if the yaml use a c2c template style (vars.[section]).
+                Default is False.
+            directory (str): Location of the sample data. Default is `sample_data`.
+            parcels (int): The number of real estates.
+            plrs_per_parcel (int): The number of public law restrictions per real estate. They are
+                distributed over the themes.
+            vertices (int): The number of vertices of the geometries.
+            documents_per_plr (int): The number of documents per public law restriction.
+            seed (int): The seed of the random generator. The same seed generates the same data.
+        """
+        self._directory = directory
+        self._parcels = parcels
+        self._plrs_per_parcel = plrs_per_parcel
+        self._vertices = vertices
+        self._documents_per_plr = documents_per_plr
+        self._random = random.Random(seed)
+        self._origin = None
+
+        Config.init(configuration, section, c2ctemplate_style)
+
+    def _read_sample(self, *path):
+        with codecs.open(os.path.join(self._directory, *path), encoding='utf-8') as f:
+            return json.load(f)
+
+    def get_themes(self):
+        """
+        Returns:
+            list of tuple: The code and the models of the themes which can be filled.
+        """
+        themes = []
+        for plr in Config.get('plrs'):
+            if not plr.get('source', {}).get('params', {}).get('model_factory'):
+                log.info('Theme {0} is skipped, it does not use database models.'.format(plr['code']))
+                continue
+            themes.append((plr['code'], StandardThemeConfigParser(**plr).get_models()))
+        return themes
+
+    def get_origin(self):
+        """
+        Returns:
+            tuple of float: The lower left corner of the first real estate of the sample data.
+        """
+        if self._origin is None:
+            sample = self._read_sample('dev.real_estates.json')[0]
+            minx, miny, _, _ = wkt.loads(sample['limit'].split(';', 1)[-1]).bounds
+            self._origin = minx, miny
+        return self._origin
+
+    def get_parcels(self):
+        """
+        Returns the synthetic real estates. They are placed in a grid starting at the first real estate of
+        the sample data and belong to its municipality.
+
+        Returns:
+            list of dict: The real estates.
+        """
+        sample = self._read_sample('dev.real_estates.json')[0]
+        minx, miny = self.get_origin()
+        columns = int(math.ceil(math.sqrt(self._parcels)))
+        parcels = []
+        for index in range(self._parcels):
+            limit = create_parcel(
+                minx + (index % columns) * PARCEL_SIZE,
+                miny + (index // columns) * PARCEL_SIZE,
+                PARCEL_SIZE,
+                self._vertices
+            )
+            parcels.append({
+                'identdn': sample['identdn'],
+                'number': 'B{0}'.format(index + 1),
+                'egrid': '{0}{1:07d}'.format(EGRID_PREFIX, index + 1),
+                'type': sample['type'],
+                'canton': sample['canton'],
+                'municipality': sample['municipality'],
+                'fosnr': sample['fosnr'],
+                'land_registry_area': int(limit.area),
+                'limit': to_ewkt(MultiPolygon([limit]))
+            })
+        return parcels
+
+    def load(self):
+        """
+        Replaces the synthetic real estates and the data of the themes.
+        """
+        from pyramid_oereb import database_adapter
+        from pyramid_oereb.contrib.data_sources.standard.models.main import RealEstate
+
+        parcels = self.get_parcels()
+        with database_adapter.pin_primary():
+            session = database_adapter.get_session(Config.get('app_schema').get('db_connection'))
+            try:
+                session.query(RealEstate).filter(
+                    RealEstate.egrid.like('{0}%'.format(EGRID_PREFIX))
+                ).delete(synchronize_session=False)
+                self._insert(session, RealEstate, parcels)
+                session.commit()
+            finally:
+                session.close()
+            print('Loaded {0} real estates.'.format(len(parcels)))
+
+            themes = self.get_themes()
+            plrs = {code: [] for code, _ in themes}
+            for index in range(len(parcels)):
+                for number in range(self._plrs_per_parcel):
+                    code, _ = themes[(index * self._plrs_per_parcel + number) % len(themes)]
+                    plrs[code].append(self.create_plr_geometry(index))
+
+            for code, models in themes:
+                session = database_adapter.get_session(models.db_connection)
+                try:
+                    self._clear(session, models)
+                    if hasattr(models, 'MultilingualUri'):
+                        self._load_interlis_theme(session, code, models, plrs[code])
+                    else:
+                        self._load_standard_theme(session, code, models, plrs[code])
+                    session.commit()
+                finally:
+                    session.close()
+                print('Loaded {0} public law restrictions of theme {1}.'.format(len(plrs[code]), code))
+
+    def create_plr_geometry(self, index):
+        """
+        Returns a random polygon around a point of the passed real estate. Its radius is between a fifth
+        and four fifths of the edge of the real estate, so it often overlaps the neighbours.
+
+        Args:
+            index (int): The index of the real estate.
+
+        Returns:
+            shapely.geometry.Polygon: The polygon.
+        """
+        minx, miny = self.get_origin()
+        columns = int(math.ceil(math.sqrt(self._parcels)))
+        x = minx + (index % columns + self._random.random()) * PARCEL_SIZE
+        y = miny + (index // columns + self._random.random()) * PARCEL_SIZE
+        radius = PARCEL_SIZE * self._random.uniform(0.2, 0.8)
+        return create_polygon(x, y, radius, self._vertices, self._random)
+
+    def _get_templates(self, code):
+        directory = SAMPLE_DIRECTORIES.get(code, 'land_use_plans')
+        return {
+            name: self._read_sample(directory, '{0}.json'.format(name))
+            for name in ['office', 'view_service', 'legend_entry', 'document']
+        }
+
+    @staticmethod
+    def _insert(session, model, rows):
+        for start in range(0, len(rows), BATCH_SIZE):
+            session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+    @staticmethod
+    def _key(model, value):
+        """
+        Returns the primary key value matching the type of the primary key column of the model.
+        """
+        column = model.__table__.primary_key.columns.values()[0]
+        if column.type.python_type is str:
+            return str(value)
+        return value
+
+    @staticmethod
+    def _clear(session, models):
+        names = ['PublicLawRestrictionDocument', 'Geometry', 'PublicLawRestriction', 'LocalisedUri',
+                 'LocalisedBlob', 'MultilingualUri', 'MultilingualBlob', 'LegendEntry', 'Document',
+                 'ViewService', 'Office']
+        for name in names:
+            model = getattr(models, name, None)
+            if model is not None:
+                session.query(model).delete(synchronize_session=False)
+
+    def _plr_rows(self, templates, polygons, key):
+        """
+        Returns the generic rows of the public law restrictions, their geometries, documents and the links
+        between the public law restrictions and the documents.
+        """
+        legend_entries = templates['legend_entry']
+        documents = []
+        plrs = []
+        geometries = []
+        links = []
+        for index, polygon in enumerate(polygons):
+            plr_id = key('PublicLawRestriction', index + 1)
+            plrs.append({
+                'id': plr_id,
+                'legend_entry': index % len(legend_entries)
+            })
+            geometries.append({
+                'id': key('Geometry', index + 1),
+                'public_law_restriction_id': plr_id,
+                'geom': polygon
+            })
+            for number in range(self._documents_per_plr):
+                document_index = index * self._documents_per_plr + number
+                template = templates['document'][document_index % len(templates['document'])]
+                document_id = key('Document', document_index + 1)
+                documents.append((document_id, template, document_index + 1))
+                links.append({
+                    'id': key('PublicLawRestrictionDocument', document_index + 1),
+                    'public_law_restriction_id': plr_id,
+                    'document_id': document_id
+                })
+        return plrs, geometries, documents, links
+
+    def _load_standard_theme(self, session, code, models, polygons):
+        templates = self._get_templates(code)
+
+        def key(name, value):
+            return self._key(getattr(models, name), value)
+
+        offices = [
+            dict(office, id=key('Office', office['id'])) for office in templates['office']
+        ]
+        office_id = offices[0]['id']
+        view_service = dict(templates['view_service'][0], id=key('ViewService', 1))
+        legend_entries = [
+            dict(
+                legend_entry,
+                id=key('LegendEntry', index + 1),
+                theme=code,
+                sub_theme=None,
+                view_service_id=view_service['id']
+            )
+            for index, legend_entry in enumerate(templates['legend_entry'])
+        ]
+        plrs, geometries, documents, links = self._plr_rows(templates, polygons, key)
+        geometry_type = models.Geometry.__table__.c.geom.type.geometry_type
+        self._insert(session, models.Office, offices)
+        self._insert(session, models.ViewService, [view_service])
+        self._insert(session, models.LegendEntry, legend_entries)
+        self._insert(session, models.Document, [
+            {
+                'id': document_id,
+                'document_type': template['document_type'],
+                'index': template['index'],
+                'law_status': 'inKraft',
+                'title': {
+                    language: '{0} {1}'.format(text, number) for language, text in template['title'].items()
+                },
+                'abbreviation': template.get('abbreviation'),
+                'official_number': template.get('official_number'),
+                'text_at_web': template.get('text_at_web'),
+                'office_id': office_id,
+                'published_from': PUBLISHED_FROM
+            }
+            for document_id, template, number in documents
+        ])
+        self._insert(session, models.PublicLawRestriction, [
+            {
+                'id': plr['id'],
+                'law_status': 'inKraft',
+                'published_from': PUBLISHED_FROM,
+                'view_service_id': view_service['id'],
+                'legend_entry_id': legend_entries[plr['legend_entry']]['id'],
+                'office_id': office_id
+            }
+            for plr in plrs
+        ])
+        self._insert(session, models.Geometry, [
+            dict(
+                geometry,
+                geom=to_ewkt(to_geometry_type(geometry['geom'], geometry_type)),
+                law_status='inKraft',
+                published_from=PUBLISHED_FROM
+            )
+            for geometry in geometries
+        ])
+        self._insert(session, models.PublicLawRestrictionDocument, links)
+
+    def _load_interlis_theme(self, session, code, models, polygons):
+        templates = self._get_templates(code)
+
+        def key(name, value):
+            return self._key(getattr(models, name), value)
+
+        uris = []
+        localised_uris = []
+
+        def add_uri(column, owner_id, values):
+            uri_id = key('MultilingualUri', len(uris) + 1)
+            uris.append({'t_id': uri_id, column: owner_id})
+            for language, text in (values or {}).items():
+                localised_uris.append({
+                    't_id': key('LocalisedUri', len(localised_uris) + 1),
+                    'language': language,
+                    'text': text,
+                    'multilingualuri_id': uri_id
+                })
+
+        def multilingual(name, values):
+            return {
+                '{0}_{1}'.format(name, language): (values or {}).get(language) for language in LANGUAGES
+            }
+
+        offices = []
+        for office in templates['office']:
+            office_id = key('Office', office['id'])
+            offices.append(dict(t_id=office_id, **multilingual('name', office['name'])))
+            add_uri('office_id', office_id, office.get('office_at_web'))
+        office_id = offices[0]['t_id']
+        view_service_id = key('ViewService', 1)
+        add_uri('view_service_id', view_service_id, templates['view_service'][0]['reference_wms'])
+        legend_entries = [
+            dict(
+                t_id=key('LegendEntry', index + 1),
+                symbol=base64.b64decode(legend_entry['symbol']),
+                type_code=legend_entry['type_code'],
+                type_code_list=legend_entry['type_code_list'],
+                theme=code,
+                view_service_id=view_service_id,
+                **multilingual('legend_text', legend_entry['legend_text'])
+            )
+            for index, legend_entry in enumerate(templates['legend_entry'])
+        ]
+        plrs, geometries, documents, links = self._plr_rows(templates, polygons, key)
+        document_rows = []
+        for document_id, template, number in documents:
+            title = {
+                language: '{0} {1}'.format(text, number) for language, text in template['title'].items()
+            }
+            document_rows.append(dict(
+                t_id=document_id,
+                document_type=template['document_type'],
+                index=template['index'],
+                law_status='inKraft',
+                office_id=office_id,
+                published_from=PUBLISHED_FROM,
+                **multilingual('title', title),
+                **multilingual('abbreviation', template.get('abbreviation')),
+                **multilingual('official_number', template.get('official_number'))
+            ))
+            add_uri('document_id', document_id, template.get('text_at_web'))
+
+        self._insert(session, models.Office, offices)
+        self._insert(session, models.ViewService, [{'t_id': view_service_id}])
+        self._insert(session, models.LegendEntry, legend_entries)
+        self._insert(session, models.Document, document_rows)
+        self._insert(session, models.MultilingualUri, uris)
+        self._insert(session, models.LocalisedUri, localised_uris)
+        self._insert(session, models.PublicLawRestriction, [
+            {
+                't_id': plr['id'],
+                'law_status': 'inKraft',
+                'published_from': PUBLISHED_FROM,
+                'view_service_id': view_service_id,
+                'legend_entry_id': legend_entries[plr['legend_entry']]['t_id'],
+                'office_id': office_id
+            }
+            for plr in plrs
+        ])
+        self._insert(session, models.Geometry, [
+            {
+                't_id': geometry['id'],
+                'surface': to_ewkt(geometry['geom']),
+                'law_status': 'inKraft',
+                'published_from': PUBLISHED_FROM,
+                'public_law_restriction_id': geometry['public_law_restriction_id']
+            }
+            for geometry in geometries
+        ])
+        self._insert(session, models.PublicLawRestrictionDocument, [
+            dict(t_id=link['id'], public_law_restriction_id=link['public_law_restriction_id'],
+                 document_id=link['document_id'])
+            for link in links
+        ])
+
+
+def _run():
+    """
+    Loads synthetic benchmark data into the configured database. Check 'python -m
+    dev.benchmark.synthetic_data --help' for available options.
+    """
+    parser = optparse.OptionParser(
+        usage='usage: %prog [options]',
+        description='Loads synthetic benchmark data into the configured database.'
+    )
+    parser.add_option(
+        '-c', '--configuration',
+        dest='configuration',
+        metavar='YAML',
+        type='string',
+        help='The absolute path to the configuration yaml file.'
+    )
+    parser.add_option(
+        '-s', '--section',
+        dest='section',
+        metavar='SECTION',
+        type='string',
+        default='pyramid_oereb',
+        help='The section which contains configruation (default is: pyramid_oereb).'
+    )
+    parser.add_option(
+        '-d', '--dir',
+        dest='directory',
+        metavar='DIRECTORY',
+        type='string',
+        default='sample_data',
+        help='The directory containing the sample data (default is: sample_data).'
+    )
+    parser.add_option(
+        '--parcels',
+        type='int',
+        default=100,
+        help='The number of real estates (default is: 100).'
+    )
+    parser.add_option(
+        '--plrs-per-parcel',
+        dest='plrs_per_parcel',
+        type='int',
+        default=5,
+        help='The number of public law restrictions per real estate (default is: 5).'
+    )
+    parser.add_option(
+        '--vertices',
+        type='int',
+        default=32,
+        help='The number of vertices per geometry (default is: 32).'
+    )
+    parser.add_option(
+        '--documents-per-plr',
+        dest='documents_per_plr',
+        type='int',
+        default=2,
+        help='The number of documents per public law restriction (default is: 2).'
+    )
+    parser.add_option(
+        '--seed',
+        type='int',
+        default=1,
+        help='The seed of the random generator (default is: 1).'
+    )
+    parser.add_option(
+        '--c2ctemplate-style',
+        dest='c2ctemplate_style',
+        action='store_true',
+        default=False,
+        help='Is the yaml file using a c2ctemplate style (starting with vars)'
+    )
+    options, args = parser.parse_args()
+    if not options.configuration:
+        parser.error('No configuration file set.')
+    SyntheticData(
+        options.configuration,
+        section=options.section,
+        c2ctemplate_style=options.c2ctemplate_style,
+        directory=options.directory,
+        parcels=options.parcels,
+        plrs_per_parcel=options.plrs_per_parcel,
+        vertices=options.vertices,
+        documents_per_plr=options.documents_per_plr,
+        seed=options.seed
+    ).load()
+
+
+if __name__ == '__main__':
+    _run()
@@ -58,6 +58,37 @@ def includeme(config):
         'pyramid_oereb': Config.get_config()
     })
 
+    from pyramid_oereb.core.renderer.templates import template_registry
+    template_cache_config = Config.get_template_cache_config()
+    template_registry.configure(
+        module_directory=template_cache_config.get('module_directory'),
+        filesystem_checks=template_cache_config.get('filesystem_checks', True)
+    )
+    template_registry.preload()
+
+    data_reload_config = Config.get_data_reload_config()
+    if data_reload_config:
+        from pyramid.events import NewRequest
+        from pyramid_oereb.core.data_reload import create_data_reloader
+        data_reloader = create_data_reloader(data_reload_config)
+        config.add_subscriber(data_reloader.on_new_request, NewRequest)
+
+    metrics_config = Config.get_metrics_config()
+    if metrics_config.get('enabled', False):
+        from pyramid_oereb.core.metrics import init_metrics_collector
+        init_metrics_collector(metrics_config)
+        config.add_tween('pyramid_oereb.core.metrics.metrics_tween_factory')
+
+    profiling_config = Config.get_profiling_config()
+    if profiling_config.get('enabled', False):
+        from pyramid_oereb.core.profiling import init_profiler
+        init_profiler(profiling_config)
+
+    slow_queries_config = Config.get_slow_queries_config()
+    if slow_queries_config.get('enabled', False):
+        from pyramid_oereb.core.slow_queries import init_slow_query_recorder
+        init_slow_query_recorder(slow_queries_config)
+
     config.add_renderer('pyramid_oereb_extract_json', 'pyramid_oereb.core.renderer.extract.json_.Renderer')
     config.add_renderer('pyramid_oereb_extract_xml', 'pyramid_oereb.core.renderer.extract.xml_.Renderer')
     config.add_renderer('pyramid_oereb_extract_print', Config.get('print').get('renderer'))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the clipping of the public law restriction geometries to the bbox of the extract in the
+database. Large geometries (e.g. the perimeter of a whole groundwater protection area) are transferred and
+converted only as far as they are visible on the map of the extract. The bbox is extended by the largest
+tolerance, so the tolerance check gets the same results as with the complete geometries.
+
+The statement needs PostGIS 3.1 or later.
+"""
+import logging
+
+from sqlalchemy import case, func, or_
+
+log = logging.getLogger(__name__)
+
+
+def get_clip_bounds(bbox, tolerances=None):
+    """
+    Returns the bounds the geometries are clipped to.
+
+    Args:
+        bbox (shapely.geometry.base.BaseGeometry): The bbox of the extract.
+        tolerances (dict or None): The tolerances by geometry type or for 'ALL' types.
+
+    Returns:
+        tuple of float: The bounds (minx, miny, maxx, maxy) extended by the largest tolerance.
+    """
+    margin = max(tolerances.values()) if tolerances else 0.0
+    minx, miny, maxx, maxy = bbox.bounds
+    return minx - margin, miny - margin, maxx + margin, maxy + margin
+
+
+def clip_geometry(geom, envelope):
+    """
+    Returns the SQL expression of the geometry clipped to the envelope. Geometries covered by the envelope
+    are returned as they are. Only the parts with the same dimension as the geometry are kept of the
+    intersections, so a polygon touching the envelope results in an empty polygon.
+
+    Args:
+        geom (sqlalchemy.sql.elements.ColumnElement): The geometry column.
+        envelope (sqlalchemy.sql.elements.ColumnElement): The envelope to clip to.
+
+    Returns:
+        sqlalchemy.sql.elements.ColumnElement: The clipped geometry.
+    """
+    return case(
+        (func.ST_CoveredBy(geom, envelope), geom),
+        else_=func.ST_CollectionExtract(func.ST_Intersection(geom, envelope), func.ST_Dimension(geom) + 1)
+    )
+
+
+def query_clipped_geometries(session, model, id_column, geoms, public_law_restriction_ids, bbox, srid,
+                             tolerances=None):
+    """
+    Reads the geometries of the passed public law restrictions clipped to the bbox. Geometries outside of
+    the bbox are not read at all.
+
+    Args:
+        session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+        model (sqlalchemy.orm.decl_api.DeclarativeMeta): The geometry model.
+        id_column (sqlalchemy.orm.attributes.InstrumentedAttribute): The primary key of the geometry model.
+        geoms (dict): The geometry columns of the model by the label of the clipped geometry.
+        public_law_restriction_ids (list): The ids of the public law restrictions.
+        bbox (shapely.geometry.base.BaseGeometry): The bbox of the extract.
+        srid (int): The SRID of the geometries.
+        tolerances (dict or None): The tolerances by geometry type or for 'ALL' types.
+
+    Returns:
+        list: The rows with the attributes of the geometry (id, public_law_restriction_id, law_status,
+        published_from, published_until, geo_metadata) and the clipped geometries labeled like the keys of
+        ``geoms``.
+    """
+    envelope = func.ST_MakeEnvelope(*get_clip_bounds(bbox, tolerances), srid)
+    return session.query(
+        id_column.label('id'),
+        model.public_law_restriction_id.label('public_law_restriction_id'),
+        model.law_status.label('law_status'),
+        model.published_from.label('published_from'),
+        model.published_until.label('published_until'),
+        model.geo_metadata.label('geo_metadata'),
+        *[clip_geometry(geom, envelope).label(label) for label, geom in geoms.items()]
+    ).filter(
+        model.public_law_restriction_id.in_(public_law_restriction_ids)
+    ).filter(
+        or_(*[func.ST_Intersects(geom, envelope) for geom in geoms.values()])
+    ).order_by(id_column).all()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the measuring of the intersections of the public law restriction geometries with a real
+estate in the database. Instead of transferring the geometries and intersecting them in Python, only the
+number of points, the length or the area of each intersection is read. The result is the same as the one
+of :meth:`pyramid_oereb.core.records.geometry.GeometryRecord.calculate`.
+
+The statement needs PostgreSQL 12 or later and PostGIS.
+"""
+import logging
+
+from geoalchemy2 import Geometry
+from geoalchemy2.shape import from_shape
+from sqlalchemy import case, func, literal
+
+log = logging.getLogger(__name__)
+
+GEOMETRY_TYPES_BY_DIMENSION = ['Point', 'LineString', 'Polygon']
+
+
+def get_limit(real_estate, geometry_type, tolerances=None):
+    """
+    Returns the limit of the real estate buffered by the tolerance of the passed geometry type.
+
+    Args:
+        real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+        geometry_type (str): The geometry type, one of Point, LineString or Polygon.
+        tolerances (dict or None): The tolerances by geometry type or for 'ALL' types.
+
+    Returns:
+        shapely.geometry.base.BaseGeometry: The limit.
+    """
+    tolerance = tolerances.get('ALL', tolerances.get(geometry_type)) if tolerances else None
+    if tolerance:
+        return real_estate.limit.buffer(tolerance)
+    return real_estate.limit
+
+
+def query_geometry_measures(session, model, id_column, geom, public_law_restriction_ids, real_estate, srid,
+                            tolerances=None):
+    """
+    Measures the intersections of all parts of the geometries of the passed public law restrictions with the
+    real estate. The buffers of the tolerances are calculated with shapely like the tolerance check does.
+
+    Args:
+        session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+        model (sqlalchemy.orm.decl_api.DeclarativeMeta): The geometry model.
+        id_column (sqlalchemy.orm.attributes.InstrumentedAttribute): The primary key of the geometry model.
+        geom (sqlalchemy.sql.elements.ColumnElement): The geometry column or expression.
+        public_law_restriction_ids (list): The ids of the public law restrictions.
+        real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+        srid (int): The SRID of the geometries.
+        tolerances (dict or None): The tolerances by geometry type or for 'ALL' types.
+
+    Returns:
+        list: The rows with the attributes of the geometry (public_law_restriction_id, law_status,
+        published_from, published_until, geo_metadata), the geometry type and the dimension of the part and
+        the geometry type, emptiness and measure of its intersection with the real estate.
+    """
+    parts = session.query(
+        id_column.label('id'),
+        model.public_law_restriction_id.label('public_law_restriction_id'),
+        model.law_status.label('law_status'),
+        model.published_from.label('published_from'),
+        model.published_until.label('published_until'),
+        model.geo_metadata.label('geo_metadata'),
+        func.ST_Dump(geom).geom.label('part')
+    ).filter(
+        model.public_law_restriction_id.in_(public_law_restriction_ids)
+    ).filter(
+        geom.isnot(None)
+    ).subquery()
+
+    dimension = func.ST_Dimension(parts.c.part)
+    limits = [
+        get_limit(real_estate, geometry_type, tolerances) for geometry_type in GEOMETRY_TYPES_BY_DIMENSION
+    ]
+    with_tolerances = not all([limit is real_estate.limit for limit in limits])
+    limits = [literal(from_shape(limit, srid=srid), Geometry(srid=srid)) for limit in limits]
+    if with_tolerances:
+        limit = case((dimension == 0, limits[0]), (dimension == 1, limits[1]), else_=limits[2])
+    else:
+        limit = limits[0]
+
+    # Materialized, so the intersection is calculated only once for all the measures
+    intersections = session.query(
+        parts,
+        dimension.label('dimension'),
+        func.ST_Intersection(parts.c.part, limit).label('intersection')
+    ).cte('intersections').prefix_with('MATERIALIZED')
+
+    intersection = intersections.c.intersection
+    # Only the parts with the same dimension as the geometry are used of a geometry collection
+    result = case(
+        (
+            func.GeometryType(intersection) == 'GEOMETRYCOLLECTION',
+            func.ST_CollectionExtract(intersection, intersections.c.dimension + 1)
+        ),
+        else_=intersection
+    )
+    measure = case(
+        (func.ST_Dimension(result) == 0, func.ST_NumGeometries(result)),
+        (func.ST_Dimension(result) == 1, func.ST_Length(result)),
+        else_=func.ST_Area(result)
+    )
+    return session.query(
+        intersections.c.id,
+        intersections.c.public_law_restriction_id,
+        intersections.c.law_status,
+        intersections.c.published_from,
+        intersections.c.published_until,
+        intersections.c.geo_metadata,
+        func.ST_GeometryType(intersections.c.part).label('geom_type'),
+        func.ST_GeometryType(result).label('result_type'),
+        func.ST_IsEmpty(intersection).label('intersection_empty'),
+        func.ST_IsEmpty(result).label('result_empty'),
+        measure.label('measure')
+    ).order_by(intersections.c.id).all()
+
+
+def get_geometry_type(st_geometry_type):
+    """
+    Translates the geometry type returned by ST_GeometryType into the one of shapely.
+
+    Args:
+        st_geometry_type (str): The geometry type, e.g. ST_MultiPolygon.
+
+    Returns:
+        str: The shapely geometry type, e.g. MultiPolygon.
+    """
+    if st_geometry_type.startswith('ST_'):
+        return st_geometry_type[3:]
+    return st_geometry_type
+
+
+def get_result_type(row):
+    """
+    Returns the geometry type of the measured intersection the same way as the tolerance check does it.
+
+    Args:
+        row: A row returned by :func:`query_geometry_measures`.
+
+    Returns:
+        str or None: The geometry type or None if the geometry does not intersect the real estate.
+    """
+    if row.intersection_empty:
+        return None
+    if row.result_empty:
+        # Nothing of the same dimension has been extracted from the geometry collection
+        return 'GeometryCollection'
+    return get_geometry_type(row.result_type)
+
+
+def get_measure(row):
+    """
+    Returns the measure of the intersection with the same type as the tolerance check returns it.
+
+    Args:
+        row: A row returned by :func:`query_geometry_measures`.
+
+    Returns:
+        float or int or None: The number of points, the length or the area of the intersection.
+    """
+    if row.measure is None or row.result_type is None:
+        return None
+    if get_geometry_type(row.result_type) in ['Point', 'MultiPoint']:
+        return int(row.measure)
+    return row.measure
@@ -3,6 +3,8 @@ from sqlalchemy import LargeBinary, String, Integer, Date, Text
 from geoalchemy2.types import Geometry as GeoAlchemyGeometry
 from sqlalchemy.orm import declarative_base, relationship
 
+from pyramid_oereb.contrib.data_sources.standard import add_indexes
+
 
 class Models(object):
 
@@ -515,6 +517,8 @@ def model_factory(schema_name, pk_type, srid, db_connection):
             Document
         )
 
+    add_indexes(Base)
+
     return Models(
         Office, Document, ViewService,
         LegendEntry, PublicLawRestriction, Geometry, PublicLawRestrictionDocument,
@@ -1,24 +1,28 @@
 # -*- coding: utf-8 -*-
 import logging
 import importlib
-import binascii
+from functools import partial
 
 from geoalchemy2.shape import to_shape, from_shape
 from shapely.geometry import Point, LineString, Polygon, MultiPoint, MultiLineString, MultiPolygon, \
     GeometryCollection
-from sqlalchemy import or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import or_, func
+from sqlalchemy.orm import defer, selectinload
 from geoalchemy2.functions import ST_DWithin
 
 from pyramid_oereb import Config
-from pyramid_oereb.core import b64
-from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.records.geometry import MeasuredGeometryRecord
 from pyramid_oereb.core.records.plr import EmptyPlrRecord
 from pyramid_oereb.core.sources import BaseDatabaseSource
 from pyramid_oereb.core.sources.plr import PlrBaseSource
+from pyramid_oereb.core.sources.plr_metadata import DEFAULT_TTL, PlrSourceMetadata, plr_source_metadata
+from pyramid_oereb.core.sources.symbol_cache import symbol_cache
 from pyramid_oereb.contrib.data_sources.interlis_2_3.interlis_2_3_utils import from_multilingual_text_to_dict
 from pyramid_oereb.contrib.data_sources.interlis_2_3.interlis_2_3_utils import from_multilingual_uri_to_dict
 from pyramid_oereb.contrib import eliminate_duplicated_document_records
+from pyramid_oereb.contrib.data_sources.geometry_clipping import query_clipped_geometries
+from pyramid_oereb.contrib.data_sources.geometry_measures import get_geometry_type, get_measure, \
+    get_result_type, query_geometry_measures
 
 log = logging.getLogger(__name__)
 
@@ -103,6 +107,29 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             law_status (dict of str): The configuration dictionary of the law status. It consists of
                 the code and text which must be a dictionary containing language (as configured)
                 as key and text as value.
+
+        The source parameter ``combined_query`` switches the source to the combined query mode: the legend
+        entries of the visible extent are fetched for all law status in one single statement and the check
+        if the theme contains any data is done using the cached metadata instead of counting the table per
+        request.
+
+        With the source parameter ``cache_metadata`` (enabled by default in the combined query mode) the
+        number of geometries and their extent are read on startup and kept in the
+        :ref:`api-pyramid_oereb-core-sources-plr_metadata-plrsourcemetadataregistry`. They are refreshed
+        after ``metadata_ttl`` seconds or after an explicit invalidation. If the caching is enabled by the
+        combined query mode, ``metadata_ttl`` defaults to
+        :attr:`pyramid_oereb.core.sources.plr_metadata.DEFAULT_TTL`, otherwise the metadata are kept until
+        they are invalidated. Real estates outside the extent of the theme data are handled without
+        querying the database.
+
+        With the source parameter ``database_measures`` the intersections of the geometries with the real
+        estate are measured in the database for extracts without geometries. Only the number of points, the
+        length or the area of each intersection is read instead of the geometries (PostgreSQL 12 or later).
+
+        With the source parameter ``clip_geometries`` the geometries are clipped to the bbox of the extract
+        (extended by the largest tolerance) in the database, so large geometries are only transferred as far
+        as they are visible on the map (PostGIS 3.1 or later). The unclipped geometry of a record is loaded
+        on demand by :attr:`pyramid_oereb.core.records.geometry.GeometryRecord.unclipped_geom`.
         """
         config_parser = StandardThemeConfigParser(**kwargs)
         self.models = config_parser.get_models()
@@ -117,18 +144,34 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         self.legend_entry_model = self.models.LegendEntry
         self.datasource = []
 
+        source_params = kwargs.get('source').get('params')
+        self._combined_query = source_params.get('combined_query', False)
+        self._cache_metadata = source_params.get('cache_metadata', self._combined_query)
+        self._metadata_ttl = source_params.get(
+            'metadata_ttl', None if 'cache_metadata' in source_params else DEFAULT_TTL
+        )
+        self._database_measures = source_params.get('database_measures', False)
+        self._clip_geometries = source_params.get('clip_geometries', False)
+
         self._tolerances = self._plr_info.get('tolerances')
         if not self._tolerances and self._plr_info.get('tolerance'):
             # use backup value tolerance for retro compatibility
             self._tolerances = {'ALL': self._plr_info.get('tolerance')}
 
+        if self._cache_metadata:
+            session = self.get_session()
+            try:
+                self.get_metadata(session)
+            finally:
+                session.close()
+
     def from_db_to_legend_entry_record(self, legend_entry_from_db):
         theme = Config.get_theme_by_code_sub_code(legend_entry_from_db.theme, legend_entry_from_db.sub_theme)
         legend_entry_record = self._legend_entry_record_class(
-            ImageRecord(
-                b64.decode(
-                    binascii.b2a_base64(legend_entry_from_db.symbol).decode('ascii')
-                )
+            symbol_cache.get(
+                self._plr_info.get('code'),
+                legend_entry_from_db.t_id,
+                legend_entry_from_db.symbol
             ),
             from_multilingual_text_to_dict(
                 de=legend_entry_from_db.legend_text_de,
@@ -276,6 +319,140 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
 
         return geometry_records
 
+    def from_db_to_measured_geometry_records(self, measures_from_db):
+        """
+        Translates the measured geometry parts read from database into the internal record format.
+
+        Args:
+            measures_from_db (list): The rows returned by
+                :func:`pyramid_oereb.contrib.data_sources.geometry_measures.query_geometry_measures`.
+
+        Returns:
+            dict: The lists of pyramid_oereb.core.records.geometry.MeasuredGeometryRecord by the id of
+            their public law restriction.
+        """
+        geometry_records = dict()
+        for measure_from_db in measures_from_db:
+            law_status = Config.get_law_status_by_data_code(
+                self._plr_info.get('code'),
+                measure_from_db.law_status
+            )
+            geometry_records.setdefault(measure_from_db.public_law_restriction_id, []).append(
+                MeasuredGeometryRecord(
+                    law_status,
+                    measure_from_db.published_from,
+                    measure_from_db.published_until,
+                    get_geometry_type(measure_from_db.geom_type),
+                    get_result_type(measure_from_db),
+                    get_measure(measure_from_db),
+                    measure_from_db.geo_metadata
+                )
+            )
+        return geometry_records
+
+    def collect_geometry_measures(self, session, real_estate, public_law_restriction_ids):
+        """
+        Measures the intersections of the geometries of the passed public law restrictions with the real
+        estate in the database.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate in its record representation.
+            public_law_restriction_ids (list): The ids of the public law restrictions.
+
+        Returns:
+            list: The measured geometry parts.
+        """
+        return query_geometry_measures(
+            session,
+            self._model_,
+            self._model_.t_id,
+            func.coalesce(self._model_.point, self._model_.line, self._model_.surface),
+            public_law_restriction_ids,
+            real_estate,
+            Config.get('srid'),
+            self._tolerances
+        )
+
+    def from_db_to_clipped_geometry_records(self, clipped_geometries_from_db):
+        """
+        Translates the clipped geometries read from database into the internal record format. The unclipped
+        geometries are loaded on demand.
+
+        Args:
+            clipped_geometries_from_db (list): The rows returned by
+                :func:`pyramid_oereb.contrib.data_sources.geometry_clipping.query_clipped_geometries`.
+
+        Returns:
+            dict: The lists of pyramid_oereb.core.records.geometry.GeometryRecord by the id of their public
+            law restriction.
+        """
+        geometry_records = dict()
+        for clipped_geometry_from_db in clipped_geometries_from_db:
+            records = geometry_records.setdefault(
+                clipped_geometry_from_db.public_law_restriction_id, []
+            )
+            for geometry_record in self.from_db_to_geometry_records([clipped_geometry_from_db]):
+                if geometry_record.geom.is_empty:
+                    # Only the boundary of the geometry touches the bbox
+                    continue
+                geometry_record.set_unclipped_geom(
+                    partial(self.read_unclipped_geometry, clipped_geometry_from_db.id)
+                )
+                records.append(geometry_record)
+        return geometry_records
+
+    def collect_clipped_geometries(self, session, bbox, public_law_restriction_ids):
+        """
+        Reads the geometries of the passed public law restrictions clipped to the bbox.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            bbox (shapely.geometry.base.BaseGeometry): The bbox of the extract.
+            public_law_restriction_ids (list): The ids of the public law restrictions.
+
+        Returns:
+            list: The clipped geometries.
+        """
+        return query_clipped_geometries(
+            session,
+            self._model_,
+            self._model_.t_id,
+            {
+                'point': self._model_.point,
+                'line': self._model_.line,
+                'surface': self._model_.surface
+            },
+            public_law_restriction_ids,
+            bbox,
+            Config.get('srid'),
+            self._tolerances
+        )
+
+    def read_unclipped_geometry(self, geometry_id):
+        """
+        Reads a geometry as it is stored in the database.
+
+        Args:
+            geometry_id (int or str): The id of the geometry.
+
+        Returns:
+            shapely.geometry.base.BaseGeometry or None: The geometry or None if it does not exist anymore.
+        """
+        session = self.get_session()
+        try:
+            geom = session.query(
+                func.coalesce(self._model_.point, self._model_.line, self._model_.surface)
+            ).filter(
+                self._model_.t_id == geometry_id
+            ).scalar()
+        finally:
+            session.close()
+        if geom is None:
+            return None
+        return to_shape(geom)
+
     def from_db_to_office_record(self, offices_from_db):
         office_record = self._office_record_class(
             from_multilingual_text_to_dict(
@@ -340,7 +517,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             ))
         return document_records
 
-    def from_db_to_plr_record(self, params, public_law_restriction_from_db, legend_entries_from_db):
+    def from_db_to_plr_record(self, params, public_law_restriction_from_db, legend_entries_from_db,
+                              geometry_records=None):
         thresholds = self._plr_info.get('thresholds')
         min_length = thresholds.get('length').get('limit')
         length_unit = thresholds.get('length').get('unit')
@@ -353,11 +531,7 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             legend_entries_from_db,
             legend_entry_record.theme.sub_code
         )
-        symbol = ImageRecord(
-            b64.decode(
-                binascii.b2a_base64(public_law_restriction_from_db.legend_entry.symbol).decode('ascii')
-            )
-        )
+        symbol = legend_entry_record.symbol
         view_service_record = self.from_db_to_view_service_record(
             public_law_restriction_from_db.view_service,
             legend_entry_records,
@@ -370,7 +544,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             theme.document_records,
             self.get_document_records(params, public_law_restriction_from_db)
         )
-        geometry_records = self.from_db_to_geometry_records(public_law_restriction_from_db.geometries)
+        if geometry_records is None:
+            geometry_records = self.from_db_to_geometry_records(public_law_restriction_from_db.geometries)
         law_status = Config.get_law_status_by_data_code(
             self._plr_info.get('code'),
             public_law_restriction_from_db.law_status
@@ -412,7 +587,7 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         document_records = self.from_db_to_document_records(documents_from_db)
         return document_records
 
-    def collect_related_geometries_by_real_estate(self, session, real_estate):
+    def collect_related_geometries_by_real_estate(self, session, real_estate, with_geometries=True):
         """
         Extracts all geometries in the topic which have spatial relation with the passed real estate
 
@@ -420,6 +595,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             session (sqlalchemy.orm.Session): The requested clean session instance ready for use
             real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
                 estate in its record representation.
+            with_geometries (bool): False if the geometries of the public law restrictions are not read,
+                e.g. because their intersections are measured in the database or they are read clipped.
 
         Returns:
             list: The result of the related geometries unique by the public law restriction id
@@ -450,9 +627,7 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
                         self._tolerances.get('ALL', self._tolerances.get('Polygon', 0))
                     )
                 ))
-        return query.distinct(self._model_.public_law_restriction_id).options(
-            selectinload(self.models.Geometry.public_law_restriction)
-            .selectinload(self.models.PublicLawRestriction.geometries),
+        options = [
             selectinload(self.models.Geometry.public_law_restriction)
             .selectinload(self.models.PublicLawRestriction.legal_provisions)
             .selectinload(self.models.PublicLawRestrictionDocument.document)
@@ -468,7 +643,19 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
             .selectinload(self.models.PublicLawRestriction.responsible_office)
             .selectinload(self.models.Office.multilingual_uri)
             .selectinload(self.models.MultilingualUri.localised_uri)
-        ).all()
+        ]
+        if with_geometries:
+            options.append(
+                selectinload(self.models.Geometry.public_law_restriction)
+                .selectinload(self.models.PublicLawRestriction.geometries)
+            )
+        else:
+            options.extend([
+                defer(self._model_.point),
+                defer(self._model_.line),
+                defer(self._model_.surface)
+            ])
+        return query.distinct(self._model_.public_law_restriction_id).options(*options).all()
 
     def get_legend_entries_from_db(self, session, legend_entry_ids):
         """
@@ -484,6 +671,22 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         return session.query(self.legend_entry_model).filter(
             self.legend_entry_model.t_id.in_(legend_entry_ids)).all()
 
+    def bbox_filter(self, bbox):
+        """
+        Creates the spatial filter which selects all geometries intersecting the passed bounding box.
+
+        Args:
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+
+        Returns:
+            sqlalchemy.sql.elements.BooleanClauseList: The clause element.
+        """
+        return or_(
+            self._model_.point.ST_Intersects(from_shape(bbox, srid=Config.get('srid'))),
+            self._model_.line.ST_Intersects(from_shape(bbox, srid=Config.get('srid'))),
+            self._model_.surface.ST_Intersects(from_shape(bbox, srid=Config.get('srid')))
+        )
+
     def collect_legend_entries_by_bbox(self, session, bbox):
         """
         Extracts all legend entries in the topic which have spatial relation with the passed bounding box of
@@ -498,11 +701,8 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         """
         # Select the legend entries of all plr within bbox
         geometries = session.query(self._model_).filter(
-                      or_(
-                       self._model_.point.ST_Intersects(from_shape(bbox, srid=Config.get('srid'))),
-                       self._model_.line.ST_Intersects(from_shape(bbox, srid=Config.get('srid'))),
-                       self._model_.surface.ST_Intersects(from_shape(bbox, srid=Config.get('srid')))
-                      )).distinct(self._model_.public_law_restriction_id).options(
+                      self.bbox_filter(bbox)
+                      ).distinct(self._model_.public_law_restriction_id).options(
                         selectinload(self.models.Geometry.public_law_restriction)
                       ).all()
 
@@ -530,6 +730,113 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
 
         return legend_entries_from_db
 
+    def collect_legend_entries_by_bbox_combined(self, session, bbox):
+        """
+        Does the same as :meth:`collect_legend_entries_by_bbox` but uses one single statement: the
+        distinct pairs of law status and legend entry id of all PLRs within the bounding box are selected
+        in a sub query which is joined to the legend entries.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+
+        Returns:
+            list: The result of the related geometries unique by the public law restriction id and law status
+        """
+        plr_model = self.models.PublicLawRestriction
+        legend_entry_ids = session.query(
+            plr_model.law_status.label('law_status'),
+            plr_model.legend_entry_id.label('legend_entry_id')
+        ).join(
+            self._model_,
+            self._model_.public_law_restriction_id == plr_model.t_id
+        ).filter(
+            self.bbox_filter(bbox)
+        ).distinct().subquery()
+        results = session.query(self.legend_entry_model, legend_entry_ids.c.law_status).join(
+            legend_entry_ids,
+            self.legend_entry_model.t_id == legend_entry_ids.c.legend_entry_id
+        ).all()
+
+        legend_entries_by_law_status = dict()
+        for legend_entry, law_status in results:
+            legend_entries_by_law_status.setdefault(law_status, []).append(legend_entry)
+        return [
+            [legend_entries, law_status]
+            for law_status, legend_entries in legend_entries_by_law_status.items()
+        ]
+
+    def theme_has_data(self, session):
+        """
+        Checks if there are any geometries in the theme. In the combined query mode the check is done only
+        once and the result is kept for the lifetime of the source.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+
+        Returns:
+            bool: True if the theme contains data.
+        """
+        if not self._cache_metadata:
+            return session.query(self._model_).count() > 0
+        return self.get_metadata(session).has_data
+
+    def read_metadata(self, session):
+        """
+        Reads the number of geometries and their extent from the database in one single statement.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+
+        Returns:
+            pyramid_oereb.core.sources.plr_metadata.PlrSourceMetadata: The metadata of the theme data.
+        """
+        geom = func.coalesce(self._model_.point, self._model_.line, self._model_.surface)
+        count, min_x, min_y, max_x, max_y = session.query(
+            func.count(self._model_.t_id),
+            func.ST_XMin(func.ST_Extent(geom)),
+            func.ST_YMin(func.ST_Extent(geom)),
+            func.ST_XMax(func.ST_Extent(geom)),
+            func.ST_YMax(func.ST_Extent(geom))
+        ).one()
+        extent = None if count == 0 else (min_x, min_y, max_x, max_y)
+        return PlrSourceMetadata(count, extent)
+
+    def get_metadata(self, session):
+        """
+        Returns the metadata of the theme data from the registry. They are read from the database if
+        necessary.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+
+        Returns:
+            pyramid_oereb.core.sources.plr_metadata.PlrSourceMetadata: The metadata of the theme data.
+        """
+        return plr_source_metadata.get(
+            self._plr_info.get('code'),
+            lambda: self.read_metadata(session),
+            ttl=self._metadata_ttl
+        )
+
+    def theme_extent_intersects(self, session, real_estate):
+        """
+        Checks if the extent of the theme data intersects the real estate. The biggest configured tolerance
+        is taken into account. Without cached metadata, this check is always positive.
+
+        Args:
+            session (sqlalchemy.orm.Session): The requested clean session instance ready for use
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate in its record representation.
+
+        Returns:
+            bool: False if the theme data can not be related to the real estate.
+        """
+        if not self._cache_metadata:
+            return True
+        tolerance = max(self._tolerances.values()) if self._tolerances else 0.0
+        return self.get_metadata(session).intersects(real_estate.limit.bounds, tolerance)
+
     def read(self, params, real_estate, bbox):
         """
         The read point which creates a extract, depending on a passed real estate.
@@ -549,17 +856,27 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
         if Config.availability_by_theme_code_municipality_fosnr(self._plr_info['code'], real_estate.fosnr):
             session = self._adapter_.get_session(self._key_)
             try:
-                if session.query(self._model_).count() == 0:
+                if not self.theme_has_data(session):
                     # We can stop here already because there are no items in the database
                     records = [EmptyPlrRecord(
                             Config.get_theme_by_code_sub_code(self._plr_info['code'])
                         )]
+                elif not self.theme_extent_intersects(session, real_estate):
+                    # The theme data is too far away from the real estate, so we can stop here without
+                    # querying the geometries
+                    records = [EmptyPlrRecord(Config.get_theme_by_code_sub_code(self._plr_info['code']))]
                 else:
                     # We need to investigate more in detail
 
+                    # Measure the intersections in the database if the geometries are not rendered
+                    database_measures = self._database_measures and not params.with_geometry
+
+                    # Clip the geometries to the bbox if they are read
+                    clip_geometries = self._clip_geometries and not database_measures
+
                     # Try to find geometries which have spatial relation with real estate
                     geometry_results = self.collect_related_geometries_by_real_estate(
-                        session, real_estate
+                        session, real_estate, with_geometries=not (database_measures or clip_geometries)
                     )
                     if len(geometry_results) == 0:
                         # We checked if there are spatially related elements in database. But there is none.
@@ -572,17 +889,49 @@ class DatabaseSource(BaseDatabaseSource, PlrBaseSource):
                         # information related to the found geometries.
 
                         # get legend_entries per law_status
-                        legend_entries_from_db = self.collect_legend_entries_by_bbox(session, bbox)
+                        if self._combined_query:
+                            legend_entries_from_db = self.collect_legend_entries_by_bbox_combined(
+                                session, bbox
+                            )
+                        else:
+                            legend_entries_from_db = self.collect_legend_entries_by_bbox(session, bbox)
+
+                        public_law_restriction_ids = [
+                            geometry_result.public_law_restriction_id for geometry_result in geometry_results
+                        ]
+                        geometry_records = None
+                        if database_measures:
+                            geometry_records = self.from_db_to_measured_geometry_records(
+                                self.collect_geometry_measures(
+                                    session, real_estate, public_law_restriction_ids
+                                )
+                            )
+                        elif clip_geometries:
+                            geometry_records = self.from_db_to_clipped_geometry_records(
+                                self.collect_clipped_geometries(session, bbox, public_law_restriction_ids)
+                            )
 
                         for geometry_result in geometry_results:
-                            records.append(
-                                self.from_db_to_plr_record(
+                            public_law_restriction_from_db = geometry_result.public_law_restriction
+                            legend_entries = next(
+                                elem for elem in legend_entries_from_db
+                                if elem[1] == public_law_restriction_from_db.law_status
+                            )[0]
+                            if geometry_records is not None:
+                                records.append(self.from_db_to_plr_record(
                                     params,
-                                    geometry_result.public_law_restriction,
-                                    next(elem for elem in legend_entries_from_db
-                                         if elem[1] == geometry_result.public_law_restriction.law_status)[0]
-                                )
-                            )
+                                    public_law_restriction_from_db,
+                                    legend_entries,
+                                    geometry_records=geometry_records.get(
+                                        geometry_result.public_law_restriction_id, []
+                                    )
+                                ))
+                            else:
+                                records.append(self.from_db_to_plr_record(
+                                    params,
+                                    public_law_restriction_from_db,
+                                    legend_entries
+                                ))
 
             finally:
                 session.close()
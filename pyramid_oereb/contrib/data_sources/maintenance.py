@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the maintenance of the tables of the configured sources. It reports the indexes of
+the models (see :func:`pyramid_oereb.contrib.data_sources.standard.add_indexes`) which are missing in the
+database, e.g. in tables created before the indexes were generated, and stores the rows of the tables with
+geometries in spatial order (``CLUSTER`` on the GiST index) before updating the statistics of the planner
+(``ANALYZE``).
+"""
+import optparse
+import logging
+import sys
+
+from geoalchemy2.types import Geometry
+from pyramid.path import DottedNameResolver
+from sqlalchemy import inspect, text
+
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.contrib.data_sources.standard import tables
+from pyramid_oereb.contrib.data_sources.standard.sources.plr import StandardThemeConfigParser
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+
+
+def get_configured_tables(theme_code=None):
+    """
+    Collects the tables of the main schema and of the themes using models of the standard sources.
+
+    Args:
+        theme_code (str or None): The code of the only theme to collect. If set, the main schema is left
+            out.
+
+    Returns:
+        list of tuple: The label, the database connection and the tables of the main schema and each
+        theme.
+    """
+    configured_tables = []
+    if theme_code is None:
+        app_schema = Config.get('app_schema')
+        main_base_class = DottedNameResolver().maybe_resolve('{package}.Base'.format(
+            package=app_schema.get('models')
+        ))
+        configured_tables.append(
+            (app_schema.get('name'), app_schema.get('db_connection'), tables(main_base_class))
+        )
+    for theme_config in Config.get('plrs'):
+        if theme_code is not None and theme_config.get('code') != theme_code:
+            continue
+        params = theme_config.get('source', {}).get('params', {})
+        if 'model_factory' not in params:
+            log.info('Theme {0} skipped, it does not use the standard models.'.format(
+                theme_config.get('code')
+            ))
+            continue
+        models = StandardThemeConfigParser(**theme_config).get_models()
+        configured_tables.append((theme_config.get('code'), params.get('db_connection'), tables(models.Base)))
+    return configured_tables
+
+
+def get_geometry_index(table):
+    """
+    Args:
+        table (sqlalchemy.schema.Table): The table.
+
+    Returns:
+        sqlalchemy.schema.Index or None: The GiST index of the first geometry column or None if the table
+        has no geometry.
+    """
+    for column in table.columns:
+        if not isinstance(column.type, Geometry):
+            continue
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.dialect_options['postgresql']['using'] == 'gist' and \
+                    [c.name for c in index.columns] == [column.name]:
+                return index
+    return None
+
+
+def find_missing_indexes(connection, tables_to_check):
+    """
+    Compares the indexes of the models with the ones in the database. An index of the models is present if
+    the database has an index (or the primary key) of the same method starting with its columns.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): The connection to the database.
+        tables_to_check (list of sqlalchemy.schema.Table): The tables.
+
+    Returns:
+        list of sqlalchemy.schema.Index: The indexes missing in the database. Tables which do not exist are
+        left out.
+    """
+    inspector = inspect(connection)
+    missing = []
+    for table in tables_to_check:
+        if not inspector.has_table(table.name, schema=table.schema):
+            log.warning('Table {0}.{1} does not exist.'.format(table.schema, table.name))
+            continue
+        existing = [(
+            inspector.get_pk_constraint(table.name, schema=table.schema).get('constrained_columns') or [],
+            None
+        )]
+        for index in inspector.get_indexes(table.name, schema=table.schema):
+            existing.append((
+                index.get('column_names') or [],
+                index.get('dialect_options', {}).get('postgresql_using')
+            ))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            names = [column.name for column in index.columns]
+            using = index.dialect_options['postgresql']['using']
+            if not any(
+                columns[:len(names)] == names and (method or 'btree') == (using or 'btree')
+                for columns, method in existing
+            ):
+                missing.append(index)
+    return missing
+
+
+def get_maintenance_sql(tables_to_maintain, cluster=True, analyze=True):
+    """
+    Args:
+        tables_to_maintain (list of sqlalchemy.schema.Table): The tables.
+        cluster (bool): True to order the rows of the tables with geometries by their GiST index.
+        analyze (bool): True to update the statistics of the tables.
+
+    Returns:
+        list of str: The maintenance statements, one per table and operation.
+    """
+    statements = []
+    for table in tables_to_maintain:
+        name = '{0}.{1}'.format(table.schema, table.name) if table.schema else table.name
+        index = get_geometry_index(table)
+        if cluster and index is not None:
+            statements.append('CLUSTER {0} USING {1};'.format(name, index.name))
+        if analyze:
+            statements.append('ANALYZE {0};'.format(name))
+    return statements
+
+
+def maintain_tables():
+    parser = optparse.OptionParser(
+        usage='usage: %prog [options]',
+        description='Check the indexes of the configured tables and order the tables with geometries '
+                    'spatially (CLUSTER) and update their statistics (ANALYZE).'
+    )
+    parser.add_option(
+        '-c', '--configuration',
+        dest='configuration',
+        metavar='YAML',
+        type='string',
+        help='The absolute path to the configuration yaml file.'
+    )
+    parser.add_option(
+        '-s', '--section',
+        dest='section',
+        metavar='SECTION',
+        type='string',
+        default='pyramid_oereb',
+        help='The section which contains configuration (default is: pyramid_oereb).'
+    )
+    parser.add_option(
+        '--c2ctemplate-style',
+        dest='c2ctemplate_style',
+        action='store_true',
+        default=False,
+        help='Is the yaml file using a c2ctemplate style (starting with vars)'
+    )
+    parser.add_option(
+        '-t', '--theme',
+        dest='theme',
+        metavar='CODE',
+        type='string',
+        help='The code of the only theme to maintain (default is the main schema and all themes).'
+    )
+    parser.add_option(
+        '--check',
+        dest='check',
+        action='store_true',
+        default=False,
+        help='Only report the missing indexes and exit with status 1 if there are any.'
+    )
+    parser.add_option(
+        '--no-cluster',
+        dest='cluster',
+        action='store_false',
+        default=True,
+        help='Skip the spatial ordering of the tables (CLUSTER), which locks each table exclusively.'
+    )
+    parser.add_option(
+        '--no-analyze',
+        dest='analyze',
+        action='store_false',
+        default=True,
+        help='Skip the update of the statistics (ANALYZE).'
+    )
+    parser.add_option(
+        '--dry-run',
+        dest='dry_run',
+        action='store_true',
+        default=False,
+        help='Print the maintenance statements instead of executing them.'
+    )
+    options, args = parser.parse_args()
+    if not options.configuration:
+        parser.error('No configuration file set.')
+
+    if Config.get_config() is None:
+        Config.init(
+            options.configuration,
+            options.section,
+            options.c2ctemplate_style
+        )
+    if options.theme and Config.get_theme_config_by_code(options.theme) is None:
+        parser.error('Specified theme not found in configuration.')
+
+    from pyramid_oereb import database_adapter
+    missing_count = 0
+    with database_adapter.pin_primary():
+        for label, db_connection, configured_tables in get_configured_tables(options.theme):
+            session = database_adapter.get_session(db_connection)
+            try:
+                missing = find_missing_indexes(session.connection(), configured_tables)
+                for index in missing:
+                    print('{0}: missing index {1} on {2}.{3} ({4})'.format(
+                        label, index.name, index.table.schema, index.table.name,
+                        ', '.join(column.name for column in index.columns)
+                    ))
+                missing_count += len(missing)
+                if options.check:
+                    continue
+                for statement in get_maintenance_sql(configured_tables, options.cluster, options.analyze):
+                    if options.dry_run:
+                        print(statement)
+                        continue
+                    log.info('{0}: {1}'.format(label, statement))
+                    session.execute(text(statement))
+                    session.commit()
+            finally:
+                session.close()
+    if options.check and missing_count > 0:
+        sys.exit(1)
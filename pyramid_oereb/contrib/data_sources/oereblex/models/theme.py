@@ -2,6 +2,7 @@ from sqlalchemy import Column, ForeignKey
 from sqlalchemy import String, Integer, Date
 from sqlalchemy.orm import declarative_base, relationship
 
+from pyramid_oereb.contrib.data_sources.standard import add_indexes
 from pyramid_oereb.contrib.data_sources.standard.models import (
     get_office,
     get_view_service,
@@ -100,6 +101,7 @@ def model_factory(schema_name, pk_type, geometry_type, srid, db_connection):
         legend_entry = relationship('LegendEntry', backref='public_law_restrictions')
 
     Geometry = get_geometry(Base, schema_name, pk_type, geometry_type, srid, PublicLawRestriction)
+    add_indexes(Base)
 
     return Models(
         Office, ViewService,
@@ -3,6 +3,7 @@ import logging
 
 import datetime
 from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.metrics import observe_call
 from geolink_formatter import XML
 from requests.auth import HTTPBasicAuth
 
@@ -132,7 +133,8 @@ class OEREBlexSource(Base):
             'locale': language
         }
         log.debug("read() getting documents, url: {}, parser: {}".format(url, self._parser))
-        documents = self._parser.from_url(url, request_params, proxies=self._proxies, auth=self._auth)
+        with observe_call('oereblex'):
+            documents = self._parser.from_url(url, request_params, proxies=self._proxies, auth=self._auth)
         log.debug("read() got documents")
 
         # Convert to records
@@ -1,14 +1,70 @@
 # -*- coding: utf-8 -*-
 
 import re
-from sqlalchemy.schema import CreateTable
+from geoalchemy2.types import Geometry
+from sqlalchemy import Index
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlalchemy.dialects import postgresql
 
+INDEXED_COLUMNS = ('law_status',)
+"""tuple of str: The keys of the columns filtered by the queries of the sources, which get a B-tree index."""
+
+UNIQUE_INDEXES = (('egrid',), ('identdn', 'number'))
+"""tuple of tuple: The keys of the columns which identify a real estate, indexed uniquely in tables with an
+EGRID."""
+
 
 def tables(base):
     return base.metadata.sorted_tables
 
 
+def is_indexed(table, columns):
+    """
+    Args:
+        table (sqlalchemy.schema.Table): The table.
+        columns (list of sqlalchemy.schema.Column): The columns.
+
+    Returns:
+        bool: True if the columns are the leading columns of the primary key or of an index of the table.
+    """
+    names = [column.name for column in columns]
+    candidates = [[column.name for column in table.primary_key.columns]]
+    candidates.extend([column.name for column in index.columns] for index in table.indexes)
+    return any(candidate[:len(names)] == names for candidate in candidates)
+
+
+def add_indexes(base):
+    """
+    Adds the indexes needed by the queries of the sources to the tables of the models, so they are created
+    with the tables: a GiST index on each geometry column, a B-tree index on each foreign key and law status
+    column and unique indexes on the EGRID and on IdentDN and number of the real estates. Columns which are
+    already indexed are left out.
+
+    Args:
+        base (sqlalchemy.orm.decl_api.DeclarativeMeta): The SQLAlchemy base of the models.
+    """
+    for table in tables(base):
+        keys = table.columns.keys()
+        for column in list(table.columns):
+            if is_indexed(table, [column]):
+                continue
+            if isinstance(column.type, Geometry):
+                Index('idx_{0}_{1}'.format(table.name, column.name)[:63], column, postgresql_using='gist')
+            elif column.foreign_keys or column.key in INDEXED_COLUMNS:
+                Index('ix_{0}_{1}'.format(table.name, column.name)[:63], column)
+        if 'egrid' not in keys:
+            continue
+        for unique_keys in UNIQUE_INDEXES:
+            if not all(key in keys for key in unique_keys):
+                continue
+            columns = [table.columns[key] for key in unique_keys]
+            if not is_indexed(table, columns):
+                Index(
+                    'ux_{0}_{1}'.format(table.name, '_'.join(column.name for column in columns))[:63],
+                    *columns, unique=True
+                )
+
+
 def create_schema_sql(schema_name):
     """
     Args:
@@ -30,7 +86,7 @@ def create_tables_sql(tables_to_create, if_not_exists=False):
             ... CREATE IF NOT EXISTS tables_to_create ...
 
     Returns:
-        a string with the sql statement used to create the tables
+        a string with the sql statement used to create the tables and their indexes
     """
     sqls = []
     for table in tables_to_create:
@@ -40,6 +96,25 @@ def create_tables_sql(tables_to_create, if_not_exists=False):
                     .compile(dialect=postgresql.dialect())).replace('DATETIME', 'timestamp')
             )
         )
+    sqls.append(create_indexes_sql(tables_to_create, if_not_exists))
+    return ''.join(sqls)
+
+
+def create_indexes_sql(tables_to_create, if_not_exists=False):
+    """
+    Args:
+        tables_to_create (list of sqlalchemy.schema.Table): The table objects from sqlalchemy.
+        if_not_exists (bool): defaults to false. Determines if the index is created if it already exists.
+
+    Returns:
+        str: The sql statements creating the indexes of the tables.
+    """
+    sqls = []
+    for table in tables_to_create:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            sqls.append('{};\n'.format(
+                CreateIndex(index, if_not_exists=if_not_exists).compile(dialect=postgresql.dialect())
+            ))
     return ''.join(sqls)
 
 
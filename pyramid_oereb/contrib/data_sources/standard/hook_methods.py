@@ -1,13 +1,11 @@
 # -*- coding: utf-8 -*-
 import logging
-import binascii
 
 from pyramid.httpexceptions import HTTPNotFound, HTTPServerError
 
 from pyramid_oereb.contrib.data_sources.standard.sources.plr import StandardThemeConfigParser
 from pyramid_oereb import database_adapter
-from pyramid_oereb.core import b64
-from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.sources.symbol_cache import symbol_cache
 
 
 log = logging.getLogger(__name__)
@@ -16,7 +14,9 @@ log = logging.getLogger(__name__)
 def get_symbol(params, theme_config):
     """
     Returns the symbol for the requested theme and type code from database. It queries the model
-    for the legend entry pyramid_oereb.contrib.data_sources.standard.models.get_legend_entry
+    for the legend entry pyramid_oereb.contrib.data_sources.standard.models.get_legend_entry if the symbol
+    is not yet available in the :ref:`api-pyramid_oereb-core-sources-symbol_cache-symbolcache`. The cache
+    is cleared when the data is reloaded (see :meth:`pyramid_oereb.core.config.Config.reload_data`).
 
     Args:
         params (dict): The URL parameters which were handed over via request.
@@ -38,6 +38,11 @@ def get_symbol(params, theme_config):
         )
         raise HTTPServerError
 
+    theme_code = theme_config.get('code')
+    cached = symbol_cache.find(theme_code, identifier)
+    if cached is not None:
+        return cached.content, cached.mimetype
+
     config_parser = StandardThemeConfigParser(**theme_config)
     session = database_adapter.get_session(config_parser.db_connection)
 
@@ -54,15 +59,12 @@ def get_symbol(params, theme_config):
         if legend_entry:
             symbol = getattr(legend_entry, 'symbol', None)
             if symbol:
-                if isinstance(symbol, str):
-                    body = b64.decode(symbol)
-                elif isinstance(symbol, bytes):
-                    body = b64.decode(binascii.b2a_base64(symbol).decode('ascii'))
-                else:
+                try:
+                    image = symbol_cache.get(theme_code, identifier, symbol)
+                except TypeError:
                     log.error(f'Symbol was not str nor bytes type but {type(symbol)}. this is not supported.')
                     raise HTTPServerError
-                content_type = ImageRecord.get_mimetype(bytearray(body))
-                return body, content_type
+                return image.content, image.mimetype
             else:
                 log.error(f'No symbol definition is available for legend entry {log_string}')
                 raise HTTPServerError
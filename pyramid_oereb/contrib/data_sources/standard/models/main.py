@@ -24,6 +24,7 @@ Note:
     variables.
 
 """
+from pyramid_oereb.contrib.data_sources.standard import add_indexes
 from pyramid_oereb.contrib.data_sources.standard.models import get_office, get_document
 from sqlalchemy import Column, PrimaryKeyConstraint, ForeignKey, UniqueConstraint, DateTime
 from sqlalchemy import Unicode, String, text, Integer, Boolean, Float
@@ -381,3 +382,6 @@ class DataIntegration(Base):
     office_id = Column(ForeignKey(Office.id), nullable=False)
     office = relationship(Office)
     checksum = Column(String, nullable=True)
+
+
+add_indexes(Base)
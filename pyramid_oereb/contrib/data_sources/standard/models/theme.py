@@ -1,6 +1,7 @@
 from sqlalchemy import String, Integer
 from sqlalchemy.orm import declarative_base
 
+from pyramid_oereb.contrib.data_sources.standard import add_indexes
 from pyramid_oereb.contrib.data_sources.standard.models import (
     get_office,
     get_document,
@@ -57,6 +58,7 @@ def model_factory(schema_name, pk_type, geometry_type, srid, db_connection):
     Geometry = get_geometry(Base, schema_name, pk_type, geometry_type, srid, PublicLawRestriction)
     PublicLawRestrictionDocument = get_public_law_restriction_document(Base, schema_name, pk_type,
                                                                        PublicLawRestriction, Document)
+    add_indexes(Base)
 
     return Models(
         Office, Document, ViewService,
@@ -9,6 +9,7 @@ from urllib import parse as urlparse
 
 from pyramid.httpexceptions import HTTPBadRequest
 from pyramid_oereb import Config
+from pyramid_oereb.core.metrics import observe_call
 from pyramid_oereb.core.renderer.extract.json_ import Renderer as JsonRenderer
 from pyramid_oereb.core.url import parse_url
 from pyramid.httpexceptions import HTTPInternalServerError
@@ -113,11 +114,12 @@ class Renderer(JsonRenderer):
             return json.dumps(spec, sort_keys=True, indent=4)
         pdf_url = urlparse.urljoin(print_config['base_url'] + '/', 'buildreport.pdf')
         pdf_headers = print_config['headers']
-        print_result = requests.post(
-            pdf_url,
-            headers=pdf_headers,
-            data=json.dumps(spec)
-        )
+        with observe_call('mapfish_print') as call:
+            print_result = call.check(requests.post(
+                pdf_url,
+                headers=pdf_headers,
+                data=self._serializer_.dumps(spec)
+            ))
         try:
             log.debug('Validation of the TOC length with compute_toc_pages set to {} and expected_toc_length set to {}'.format(print_config.get('compute_toc_pages'), print_config.get('expected_toc_length'))) # noqa
             with io.BytesIO() as pdf:
@@ -139,11 +141,12 @@ class Renderer(JsonRenderer):
                     log.warning('nbTocPages in result pdf: {} are not equal to the one predicted : {}, request new pdf'.format(true_nb_of_toc,extract_as_dict['nbTocPages'])) # noqa
                     log.debug('Secondary PDF extract call STARTED')
                     extract_as_dict['nbTocPages'] = true_nb_of_toc
-                    print_result = requests.post(
-                        pdf_url,
-                        headers=pdf_headers,
-                        data=json.dumps(spec)
-                    )
+                    with observe_call('mapfish_print') as call:
+                        print_result = call.check(requests.post(
+                            pdf_url,
+                            headers=pdf_headers,
+                            data=self._serializer_.dumps(spec)
+                        ))
                     log.debug('Secondary PDF extract call to fix TOC pages number DONE')
 
         except PdfReadError as e:
@@ -614,7 +617,8 @@ class Renderer(JsonRenderer):
         extract_dict['PrintCantonLogo'] = Config.get('print', {}).get('print_canton_logo', True)
         extract_dict['PrintMunicipalityName'] = Config.get('print', {}).get('print_municipality_name', True)
 
-        log.debug("After transformation, extract_dict is {}".format(json.dumps(extract_dict, indent=4)))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("After transformation, extract_dict is {}".format(json.dumps(extract_dict, indent=4)))
         return extract_dict
 
     @staticmethod
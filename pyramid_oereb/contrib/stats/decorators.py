@@ -1,8 +1,13 @@
 import logging
 import json
 
+from pyramid_oereb.core.profiling import get_profiler
+
 LOG = logging.getLogger('JSON')
 
+MASK = '***'
+"""str: The value logged instead of a secret."""
+
 
 def log_response(wrapped):
     def wrapper(context, request):
@@ -22,11 +27,20 @@ def _serialize_response(response):
     return {'response': x}
 
 
+def _mask(values, name):
+    return dict((key, MASK if key.lower() == name.lower() else value) for key, value in values.items())
+
+
 def _serialize_request(request):
     x = {}
     x['headers'] = dict(request.headers)
     x['traversed'] = str(request.traversed)
     x['parameters'] = dict(request.GET)
+    # The secret triggering the profiling must not end up in the logs
+    profiler = get_profiler()
+    if profiler is not None:
+        x['headers'] = _mask(x['headers'], profiler.header)
+        x['parameters'] = _mask(x['parameters'], profiler.parameter)
     x['path'] = str(request.path)
     x['view_name'] = str(request.view_name)
     return {'request': x}
@@ -80,3 +80,33 @@ CREATE OR REPLACE VIEW ${schema_name|u}.stats_daily_extract_by_id AS
         COUNT(1) FILTER (WHERE  output_format = 'xml') AS format_xml
     FROM ${schema_name|u}.stats_get_extract_by_id WHERE cast(status_code as INTEGER) = 200
     GROUP BY 1;
+
+/*stats_extract_timing: the durations of the stages of the extracts if the timing is enabled*/
+DROP VIEW IF EXISTS ${schema_name|u}.stats_extract_timing CASCADE;
+CREATE OR REPLACE VIEW ${schema_name|u}.stats_extract_timing AS
+    SELECT created_at,
+           cast(cast(msg AS json) -> 'response' ->> 'status_code' AS INTEGER) AS status_code,
+           cast(msg AS json) -> 'response' -> 'extras' ->> 'output_format' AS output_format,
+           span ->> 'name' AS stage,
+           span ->> 'label' AS label,
+           cast(span ->> 'duration' AS DOUBLE PRECISION) AS duration,
+           coalesce(cast(span ->> 'partial' AS BOOLEAN), false) AS partial
+    FROM ${schema_name|u}.${tablename|u},
+         json_array_elements(cast(msg AS json) -> 'response' -> 'extras' -> 'timing') AS span
+    WHERE logger = 'JSON' AND cast(msg AS json) -> 'response' ->'extras' ->> 'service' = 'GetExtractById';
+
+/*stats_daily_extract_timing: the durations by day, stage and label (e.g. the theme of a PLR source). The partial
+  spans (render and total of streamed extracts, measured until the first chunk) are grouped separately.*/
+DROP VIEW IF EXISTS ${schema_name|u}.stats_daily_extract_timing;
+CREATE OR REPLACE VIEW ${schema_name|u}.stats_daily_extract_timing AS
+    SELECT
+        date_trunc('day', created_at) AS day,
+        stage,
+        label,
+        partial,
+        COUNT(1) AS nb_spans,
+        avg(duration) AS avg_duration,
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY duration) AS p95_duration,
+        max(duration) AS max_duration
+    FROM ${schema_name|u}.stats_extract_timing WHERE status_code = 200
+    GROUP BY 1, 2, 3, 4;
@@ -1,16 +1,316 @@
 # -*- coding: utf-8 -*-
+import itertools
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from io import open
-from sqlalchemy import create_engine, orm
+from sqlalchemy import create_engine, event, orm, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+from pyramid_oereb.core.slow_queries import instrument_engine
 
 
 log = logging.getLogger(__name__)
 
 
+class PoolMetrics(object):
+
+    def __init__(self):
+        """
+        The counters of the connection checkouts of one pool.
+        """
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self._lock_ = threading.Lock()
+
+    def add_checkout(self, wait_time, overflow):
+        """
+        Counts a successful checkout.
+
+        Args:
+            wait_time (float): The seconds waited for the connection.
+            overflow (bool): True if the connection has been opened beyond the size of the pool.
+        """
+        with self._lock_:
+            self.checkouts += 1
+            if overflow:
+                self.overflow_checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def add_timeout(self, wait_time):
+        """
+        Counts a checkout which failed because the pool was exhausted.
+
+        Args:
+            wait_time (float): The seconds waited for the connection.
+        """
+        with self._lock_:
+            self.timeouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The current counters.
+        """
+        with self._lock_:
+            return {
+                'checkouts': self.checkouts,
+                'overflow_checkouts': self.overflow_checkouts,
+                'timeouts': self.timeouts,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    The default pool of SQLAlchemy measuring how long the checkouts wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(InstrumentedQueuePool, self).__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        overflow = self.overflow()
+        try:
+            connection = super(InstrumentedQueuePool, self)._do_get()
+        except TimeoutError:
+            self.metrics.add_timeout(time.perf_counter() - start)
+            log.warning('Connection pool exhausted: {0}'.format(self.status()))
+            raise
+        # Only a checkout which opened a connection beyond the size of the pool is an overflow checkout
+        opened_overflow = self.overflow() > max(overflow, 0)
+        self.metrics.add_checkout(time.perf_counter() - start, opened_overflow)
+        return connection
+
+    def recreate(self):
+        pool = super(InstrumentedQueuePool, self).recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def check_connection(connectable):
+    """
+    Checks if the database answers a trivial statement.
+
+    Args:
+        connectable (sqlalchemy.orm.Session or sqlalchemy.engine.Connection): The session or connection to
+            check.
+
+    Returns:
+        bool: True if the database is reachable.
+    """
+    try:
+        connectable.execute(text('SELECT 1'))
+        return True
+    except Exception:
+        return False
+
+
+def check_engine(engine):
+    """
+    Checks if the database of an engine answers a trivial statement using a connection of its pool.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine to check.
+
+    Returns:
+        bool: True if the database is reachable.
+    """
+    try:
+        with engine.connect() as connection:
+            return check_connection(connection)
+    except Exception:
+        return False
+
+
+class ConnectionMember(object):
+
+    def __init__(self, connection_string, engine, session):
+        """
+        One database of a :class:`ConnectionGroup`.
+
+        Args:
+            connection_string (str): The rfc1738 URL string which defines the database connection.
+            engine (sqlalchemy.engine.Engine): The engine of the database.
+            session (sqlalchemy.orm.scoped_session): The session factory bound to the engine.
+        """
+        self.connection_string = connection_string
+        self.engine = engine
+        self.session = session
+        self.healthy = True
+        self.checked = time.monotonic()
+
+    @property
+    def busy(self):
+        """
+        Returns:
+            int: The number of connections currently in use.
+        """
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool):
+            return pool.checkedout()
+        return 0
+
+
+class ConnectionGroup(object):
+
+    ROUTINGS = ('round_robin', 'least_busy')
+    """tuple of str: The available routings of the sessions."""
+
+    def __init__(self, primary, replicas, routing='round_robin', include_primary=True, check_interval=30):
+        """
+        A primary database and its read replicas used as one logical connection. The sessions are routed to
+        the healthy members. Members are checked again in the background after ``check_interval`` seconds,
+        so unreachable ones are ejected and re-admitted as soon as they answer again. Disconnects reported
+        by the engine eject a member immediately.
+
+        Args:
+            primary (ConnectionMember): The primary database.
+            replicas (list of ConnectionMember): The read replicas.
+            routing (str): round_robin to use the members in turn or least_busy to use the member with
+                the fewest connections in use.
+            include_primary (bool): False if the primary is only used if no replica is healthy.
+            check_interval (float): The seconds after which the health of a member is checked again.
+        """
+        if routing not in self.ROUTINGS:
+            raise ValueError('Unknown routing {0}, use one of {1}'.format(routing, ', '.join(self.ROUTINGS)))
+        self.primary = primary
+        self.replicas = replicas
+        self.routing = routing
+        self.check_interval = check_interval
+        self._readers_ = ([primary] if include_primary else []) + replicas
+        self._counter_ = itertools.count()
+        self._lock_ = threading.Lock()
+        self._checks_ = dict()
+        self._executor_ = None
+        self._pid_ = None
+        for member in [primary] + replicas:
+            event.listen(member.engine, 'handle_error', self._get_error_handler(member))
+
+    @property
+    def members(self):
+        """
+        Returns:
+            list of ConnectionMember: The primary and the replicas.
+        """
+        return [self.primary] + self.replicas
+
+    def _get_error_handler(self, member):
+        def handle_error(exception_context):
+            if exception_context.is_disconnect:
+                self.set_health(member, False)
+        return handle_error
+
+    def set_health(self, member, healthy):
+        """
+        Ejects or re-admits a member.
+
+        Args:
+            member (ConnectionMember): The member.
+            healthy (bool): The result of the check.
+        """
+        with self._lock_:
+            if member.healthy != healthy:
+                log.warning('Database {0} {1}'.format(
+                    make_url(member.connection_string).render_as_string(hide_password=True),
+                    'is reachable again' if healthy else 'is not reachable, ejected'
+                ))
+            member.healthy = healthy
+            member.checked = time.monotonic()
+
+    def check(self, member):
+        """
+        Checks the health of a member.
+
+        Args:
+            member (ConnectionMember): The member.
+
+        Returns:
+            bool: True if the member is healthy.
+        """
+        healthy = check_engine(member.engine)
+        self.set_health(member, healthy)
+        return healthy
+
+    def schedule_check(self, member):
+        """
+        Checks the health of a member in a background thread unless it is being checked already. The
+        sessions are routed by the current health of the member until the check is done, so no request
+        waits for an unreachable database.
+
+        Args:
+            member (ConnectionMember): The member.
+
+        Returns:
+            concurrent.futures.Future: The running check of the member.
+        """
+        with self._lock_:
+            # Threads do not survive a fork, e.g. of gunicorn with preloaded applications
+            if self._executor_ is None or self._pid_ != os.getpid():
+                self._executor_ = ThreadPoolExecutor(
+                    len(self.members), thread_name_prefix='pyramid_oereb_health_check'
+                )
+                self._checks_ = dict()
+                self._pid_ = os.getpid()
+            future = self._checks_.get(member)
+            if future is None or future.done():
+                future = self._executor_.submit(self.check, member)
+                self._checks_[member] = future
+            return future
+
+    def get_member(self, primary=False):
+        """
+        Returns the member a session is bound to.
+
+        Args:
+            primary (bool): True to get the primary, e.g. to read the own writes.
+
+        Returns:
+            ConnectionMember: The chosen member. The primary if no other member is healthy.
+        """
+        if primary:
+            return self.primary
+        now = time.monotonic()
+        for member in self._readers_:
+            if now - member.checked >= self.check_interval:
+                self.schedule_check(member)
+        candidates = [member for member in self._readers_ if member.healthy]
+        if len(candidates) == 0:
+            return self.primary
+        if self.routing == 'least_busy':
+            return min(candidates, key=lambda member: member.busy)
+        return candidates[next(self._counter_) % len(candidates)]
+
+
 class DatabaseAdapter(object):
     _connections_ = dict()
+    _pinned_ = threading.local()
+
+    POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+    """tuple of str: The options of the configuration passed to the pool."""
+
+    DEFAULT_OPTIONS = {
+        'pool_recycle': 30
+    }
+    """dict: The options used if they are not configured."""
+
+    GROUP_OPTIONS = ('replicas', 'routing', 'include_primary', 'check_interval')
+    """tuple of str: The options of the configuration defining a :class:`ConnectionGroup`."""
 
     def __init__(self):
         """
@@ -18,26 +318,142 @@ class DatabaseAdapter(object):
         It enables distinct session sharing on the rfc1738 URL string. This reduces the amount of used
         sessions drastically.
         """
-        pass
+        self._pool_config_ = dict()
+
+    def configure(self, pool_config):
+        """
+        Sets the configuration of the connection pools of the connections added afterwards.
+
+        Args:
+            pool_config (dict): The pool options (pool_size, max_overflow, pool_timeout, pool_recycle,
+                pool_pre_ping and statement_timeout in milliseconds) used for all connections and the list
+                ``connections`` of the options for single connections identified by their
+                ``db_connection``. A connection with ``replicas`` (list of connection strings) becomes a
+                :class:`ConnectionGroup` using the options ``routing``, ``include_primary`` and
+                ``check_interval``.
+        """
+        self._pool_config_ = pool_config or dict()
+
+    def get_connection_options(self, connection_string):
+        """
+        Returns the configured pool options of a connection.
+
+        Args:
+            connection_string (str): The rfc1738 URL string which defines the database
+                connection
+
+        Returns:
+            dict: The options of the connection, the ones of the connection override the common ones.
+        """
+        options = dict(self.DEFAULT_OPTIONS)
+        options.update({
+            key: value for key, value in self._pool_config_.items() if key != 'connections'
+        })
+        for connection in self._pool_config_.get('connections') or []:
+            if connection.get('db_connection') == connection_string:
+                options.update({key: value for key, value in connection.items() if key != 'db_connection'})
+        return options
 
-    def add_connection(self, connection_string):
+    def create_engine(self, connection_string, **options):
+        """
+        Creates the engine of a connection with an instrumented pool. Its slow queries are recorded if the
+        recording is enabled.
+
+        Args:
+            connection_string (str): The rfc1738 URL string which defines the database
+                connection
+            **options: The pool options, see :meth:`configure`.
+
+        Returns:
+            sqlalchemy.engine.Engine: The engine.
+        """
+        engine_options = {'poolclass': InstrumentedQueuePool}
+        for key, value in options.items():
+            if key in self.POOL_OPTIONS:
+                engine_options[key] = value
+            elif key == 'statement_timeout':
+                engine_options['connect_args'] = {
+                    'options': '-c statement_timeout={0}'.format(int(value))
+                }
+            else:
+                log.warning('Unknown database pool option: {0}'.format(key))
+        engine = create_engine(connection_string, **engine_options)
+        instrument_engine(engine)
+        return engine
+
+    def add_connection(self, connection_string, **options):
         """
         Adds a new connection to this object. Also creates the necessary engine and session object.
 
         Args:
             connection_string (str): The rfc1738 URL string which defines the database
                 connection
+            **options: The pool options overriding the configured ones, see :meth:`configure`.
         """
         if connection_string not in self._connections_:
-            engine = create_engine(connection_string, pool_recycle=30)
+            connection_options = self.get_connection_options(connection_string)
+            connection_options.update(options)
+            group_options = {
+                key: connection_options.pop(key) for key in self.GROUP_OPTIONS if key in connection_options
+            }
+            engine = self.create_engine(connection_string, **connection_options)
             session = orm.scoped_session(orm.sessionmaker(bind=engine))
-            self._connections_[connection_string] = {
+            connection = {
                 'engine': engine,
                 'session': session
             }
+            replicas = group_options.pop('replicas', None)
+            if replicas:
+                connection['group'] = ConnectionGroup(
+                    ConnectionMember(connection_string, engine, session),
+                    [
+                        self._create_member(replica, connection_options)
+                        for replica in replicas
+                    ],
+                    **group_options
+                )
+            self._connections_[connection_string] = connection
         else:
             log.info('Connection already exists: {0}'.format(connection_string))
 
+    def _create_member(self, connection_string, options):
+        engine = self.create_engine(connection_string, **options)
+        return ConnectionMember(connection_string, engine, orm.scoped_session(orm.sessionmaker(bind=engine)))
+
+    @contextmanager
+    def pin_primary(self):
+        """
+        Routes all sessions requested by the current thread to the primary databases while the context is
+        active, e.g. for scripts reading their own writes.
+        """
+        self._pinned_.depth = getattr(self._pinned_, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            self._pinned_.depth -= 1
+
+    def check_health(self, key):
+        """
+        Checks all databases of a connection.
+
+        Args:
+            key (str): The key to identify the desired connection in the pool of available
+                connections.
+
+        Returns:
+            dict: The health of each database by its URL without the password.
+        """
+        connection = self._connections_.get(key)
+        group = connection.get('group')
+        if group is None:
+            return {
+                make_url(key).render_as_string(hide_password=True): check_engine(connection.get('engine'))
+            }
+        return {
+            make_url(member.connection_string).render_as_string(hide_password=True): group.check(member)
+            for member in group.members
+        }
+
     def get_connections(self):
         """
         Returns a dictionary with the available connections.
@@ -47,6 +463,37 @@ class DatabaseAdapter(object):
         """
         return self._connections_
 
+    def get_pool_metrics(self):
+        """
+        Returns the state and the counters of the connection pools. The connections are identified by their
+        URL without the password.
+
+        Returns:
+            dict: The size, the number of connections in use, idle and in overflow and the
+            :class:`PoolMetrics` counters of each pool.
+        """
+        metrics = dict()
+        for connection_string, connection in self._connections_.items():
+            if connection.get('group') is None:
+                engines = [(connection_string, connection.get('engine'))]
+            else:
+                engines = [
+                    (member.connection_string, member.engine) for member in connection['group'].members
+                ]
+            for url, engine in engines:
+                pool = engine.pool
+                if not isinstance(pool, InstrumentedQueuePool):
+                    continue
+                pool_metrics = {
+                    'size': pool.size(),
+                    'in_use': pool.checkedout(),
+                    'idle': pool.checkedin(),
+                    'overflow': max(pool.overflow(), 0)
+                }
+                pool_metrics.update(pool.metrics.as_dict())
+                metrics[make_url(url).render_as_string(hide_password=True)] = pool_metrics
+        return metrics
+
     def get_session(self, key, request=None):
         """
         The point where you will get what you need: The session to talk to the database!
@@ -59,13 +506,19 @@ class DatabaseAdapter(object):
                 the right way.
 
         Returns:
-            sqlalchemy.orm.Session: The requested clean session instance ready for use
+            sqlalchemy.orm.Session: The requested clean session instance ready for use. If the connection
+            has replicas, it is bound to the member chosen by the routing of its :class:`ConnectionGroup`.
 
         Raises:
             KeyError
         """
         if key in self._connections_:
-            session = self._connections_.get(key).get('session')
+            connection = self._connections_.get(key)
+            group = connection.get('group')
+            if group is None:
+                session = connection.get('session')
+            else:
+                session = group.get_member(primary=getattr(self._pinned_, 'depth', 0) > 0).session
             return session()
         else:
             self.add_connection(key)
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 import os
+import threading
+from contextvars import ContextVar
+from types import MappingProxyType
 
 import logging
 import pyaml_env
@@ -24,12 +27,98 @@ from pyramid_oereb.core.readers.document import DocumentReader
 from pyramid_oereb.core.readers.office import OfficeReader
 from pyramid_oereb.core.readers.general_information import GeneralInformationReader
 from pyramid_oereb.core.readers.map_layering import MapLayeringReader
+from pyramid_oereb.core.sources.plr_metadata import plr_source_metadata
+from pyramid_oereb.core.sources.symbol_cache import symbol_cache
 from sqlalchemy.exc import ProgrammingError
 
 log = logging.getLogger(__name__)
 
+DATA_NAMES = (
+    'law_status', 'document_types', 'offices', 'themes', 'theme_document', 'documents',
+    'general_information', 'real_estate_types', 'map_layering', 'logos', 'availabilities', 'glossaries',
+    'disclaimers', 'municipalities'
+)
+"""tuple of str: The names of the data read by the configuration from the configured sources."""
 
-class Config(object):
+_deleted = object()
+
+_pinned_data = ContextVar('pyramid_oereb_config_data', default=None)
+
+
+class ConfigData(object):
+
+    def __init__(self, **data):
+        """
+        A snapshot of the data read by the configuration from the configured sources together with the
+        indexes built from it. The configuration replaces its snapshot as a whole, so the data and the
+        indexes of a snapshot always belong together.
+
+        Args:
+            **data: The data by the names of :data:`DATA_NAMES`. Missing data is None.
+        """
+        for name in DATA_NAMES:
+            setattr(self, name, data.get(name))
+        self.indexes = dict()
+        self.translated_records = dict()
+
+    def replace(self, **data):
+        """
+        Args:
+            **data: The data to replace by the names of :data:`DATA_NAMES`.
+
+        Returns:
+            ConfigData: A new snapshot containing the passed data and the other data of this snapshot. Its
+            indexes are built on demand.
+        """
+        values = dict((name, getattr(self, name)) for name in DATA_NAMES)
+        values.update(data)
+        return ConfigData(**values)
+
+
+def _data_property(name):
+    def fget(cls):
+        value = getattr(cls.get_data(), name)
+        if value is _deleted:
+            raise AttributeError(name)
+        return value
+
+    def fset(cls, value):
+        with cls._reload_lock:
+            cls._data = cls._data.replace(**{name: value})
+            if _pinned_data.get() is not None:
+                _pinned_data.set(cls._data)
+
+    def fdel(cls):
+        fset(cls, _deleted)
+
+    return property(fget, fset, fdel)
+
+
+class ConfigType(type):
+    """
+    The type of the configuration. The data read from the configured sources (e.g. ``Config.themes``) is
+    accessed through the :class:`ConfigData` snapshot pinned to the current request or, outside of a
+    request, through the current snapshot. Assigning a value replaces the snapshot by a new one containing
+    the value.
+    """
+
+    law_status = _data_property('law_status')
+    document_types = _data_property('document_types')
+    offices = _data_property('offices')
+    themes = _data_property('themes')
+    theme_document = _data_property('theme_document')
+    documents = _data_property('documents')
+    general_information = _data_property('general_information')
+    real_estate_types = _data_property('real_estate_types')
+    map_layering = _data_property('map_layering')
+    logos = _data_property('logos')
+    availabilities = _data_property('availabilities')
+    glossaries = _data_property('glossaries')
+    disclaimers = _data_property('disclaimers')
+    municipalities = _data_property('municipalities')
+
+
+class Config(object, metaclass=ConfigType):
     """
     A central point where we can access to the application configuration.
     Init it with a config file (Config.init(configfile, configsection))
@@ -37,20 +126,8 @@ class Config(object):
     """
 
     _config = None
-    themes = None
-    logos = None
-    document_types = None
-    documents = None
-    general_information = None
-    law_status = None
-    real_estate_types = None
-    map_layering = None
-    theme_document = None
-    offices = None
-    availabilities = None
-    glossaries = None
-    disclaimers = None
-    municipalities = None
+    _data = ConfigData()
+    _reload_lock = threading.Lock()
 
     @staticmethod
     def init(configfile, configsection, c2ctemplate_style=False, init_data=False):
@@ -68,6 +145,7 @@ class Config(object):
         assert Config._config is None
 
         Config._config = _parse(configfile, configsection, c2ctemplate_style)
+        Config.init_database_pool()
         if init_data:
             Config.init_law_status()
             Config.init_document_types()
@@ -84,6 +162,126 @@ class Config(object):
             Config.init_glossaries()
             Config.init_disclaimers()
             Config.init_municipalities()
+            Config.build_indexes()
+
+    @staticmethod
+    def init_database_pool():
+        """
+        Passes the configuration of the connection pools to the database adapter before the sources add
+        their connections.
+        """
+        from pyramid_oereb import database_adapter
+        database_adapter.configure(Config.get_database_pool_config())
+
+    @staticmethod
+    def _get_index(name, sources, build, data=None):
+        """
+        Returns an index of the configured data. The index is built once per snapshot of the data and
+        rebuilt only if one of the objects it was built from has been replaced, e.g. the configuration.
+
+        Args:
+            name (str or tuple): The name of the index.
+            sources (tuple): The objects the index is built from.
+            build (callable): The function building the index from the passed objects.
+            data (ConfigData or None): The snapshot holding the index. Defaults to the current one.
+
+        Returns:
+            dict: The index.
+        """
+        indexes = (Config.get_data() if data is None else data).indexes
+        entry = indexes.get(name)
+        if entry is None or any(old is not new for old, new in zip(entry[0], sources)):
+            entry = (sources, build(*sources))
+            indexes[name] = entry
+        return entry[1]
+
+    @staticmethod
+    def _index_by(items, get_key):
+        index = dict()
+        for item in items or []:
+            index.setdefault(get_key(item), item)
+        return MappingProxyType(index)
+
+    @staticmethod
+    def _get_code_index(name, data=None):
+        data = Config.get_data() if data is None else data
+        return Config._get_index(name, (getattr(data, name),), lambda items: Config._index_by(
+            items, lambda record: record.code
+        ), data)
+
+    @staticmethod
+    def _get_lookup_index(lookups, key):
+        return Config._get_index(('lookups', id(lookups), key), (lookups,), lambda items: Config._index_by(
+            [item for item in items if key in item], lambda item: item[key]
+        ))
+
+    @staticmethod
+    def _get_translated_record(record_class, lookup, record):
+        # The translated record is shared as long as neither the lookup nor the record are replaced
+        translated_records = Config.get_data().translated_records
+        key = (record_class, id(lookup), id(record))
+        entry = translated_records.get(key)
+        if entry is None or entry[0] is not lookup or entry[1] is not record:
+            log.debug(
+                'Translating code {} => code {} of {}'.format(
+                    lookup['data_code'], lookup['extract_code'], record.title
+                )
+            )
+            entry = (lookup, record, record_class(lookup['extract_code'], record.title))
+            translated_records[key] = entry
+        return entry[2]
+
+    @staticmethod
+    def _get_theme_index(data=None):
+        data = Config.get_data() if data is None else data
+        return Config._get_index('themes', (data.themes,), lambda themes: Config._index_by(
+            themes, lambda theme: (theme.code, theme.sub_code)
+        ), data)
+
+    @staticmethod
+    def _get_theme_config_index(data=None):
+        themes = Config._config.get('plrs') if Config._config else None
+        return Config._get_index('theme_configs', (themes,), lambda items: Config._index_by(
+            items if isinstance(items, list) else [], lambda theme: theme.get('code').lower()
+        ), data)
+
+    @staticmethod
+    def _get_availability_index(data=None):
+        def build(availabilities):
+            index = dict()
+            for availability in availabilities or []:
+                index.setdefault((availability.theme_code, int(availability.fosnr)), availability.available)
+            return MappingProxyType(index)
+        data = Config.get_data() if data is None else data
+        return Config._get_index('availabilities', (data.availabilities,), build, data)
+
+    @staticmethod
+    def _get_municipality_index(data=None):
+        data = Config.get_data() if data is None else data
+        return Config._get_index('municipalities', (data.municipalities,), lambda records: Config._index_by(
+            records, lambda record: record.fosnr
+        ), data)
+
+    @staticmethod
+    def build_indexes(data=None):
+        """
+        Builds the indexes used to look up the themes, the theme configurations, the records of the code
+        lists, the availabilities and the municipalities. The indexes are rebuilt automatically if the data
+        they were built from is replaced.
+
+        Args:
+            data (ConfigData or None): The snapshot to build the indexes of. Defaults to the current one.
+        """
+        data = Config.get_data() if data is None else data
+        data.indexes.clear()
+        data.translated_records.clear()
+        Config._get_theme_index(data)
+        Config._get_theme_config_index(data)
+        Config._get_code_index('law_status', data)
+        Config._get_code_index('document_types', data)
+        Config._get_code_index('real_estate_types', data)
+        Config._get_availability_index(data)
+        Config._get_municipality_index(data)
 
     @staticmethod
     def get_config():
@@ -230,13 +428,16 @@ class Config(object):
         """
         Loads theme document records based on Config.themes, Config.theme_document and Config.documents.
         """
+        Config._assemble_relation_themes_documents(Config.themes, Config.theme_document, Config.documents)
 
-        if Config.theme_document is not None:
-            for theme in Config.themes:
+    @staticmethod
+    def _assemble_relation_themes_documents(themes, theme_document_records, documents):
+        if theme_document_records is not None:
+            for theme in themes:
                 theme_documents = []
-                for theme_document in Config.theme_document:
+                for theme_document in theme_document_records:
                     if theme_document.theme_id == theme.identifier:
-                        for document in Config.documents:
+                        for document in documents:
                             if theme_document.document_id == document.identifier:
                                 document_copy = document.copy()
                                 document_copy.article_numbers = theme_document.article_numbers
@@ -246,6 +447,76 @@ class Config(object):
         else:
             log.info('No global documents related to themes were provided!')
 
+    @staticmethod
+    def get_data():
+        """
+        Returns:
+            ConfigData: The snapshot pinned to the current context by :meth:`pin_data` or the current one.
+        """
+        return _pinned_data.get() or Config._data
+
+    @staticmethod
+    def pin_data():
+        """
+        Pins the current snapshot to the current context (e.g. the thread handling a request), so all data
+        read in this context belongs to the same snapshot even if the data is reloaded meanwhile. Threads
+        started with a copy of the context keep the pinned snapshot.
+        """
+        _pinned_data.set(Config._data)
+
+    @staticmethod
+    def unpin_data():
+        """
+        Releases the snapshot pinned to the current context.
+        """
+        _pinned_data.set(None)
+
+    @staticmethod
+    def reload_data():
+        """
+        Reads the data of all configured sources (themes, law status, documents, offices, logos,
+        availabilities, glossaries, disclaimers, municipalities etc.) again and replaces the data loaded so
+        far. The new data is read and assembled and its indexes are built in a new :class:`ConfigData`
+        snapshot, which replaces the current one in one step. Requests being processed keep working with
+        the records they already got. If reading any of the data fails, the reload is aborted and the
+        loaded data remains unchanged.
+
+        The cached metadata of the PLR sources, the cached symbols and the cached extracts are dropped with
+        the old data, so they are created again from the newly loaded data.
+
+        Raises:
+            Exception: The error of the failed read.
+        """
+
+        assert Config._config is not None
+
+        offices = Config._read_offices()
+        data = ConfigData(
+            law_status=Config._read_law_status(),
+            document_types=Config._read_document_types(),
+            offices=offices,
+            themes=Config._read_themes(),
+            theme_document=Config._read_theme_document(),
+            documents=Config._read_documents(offices),
+            general_information=Config._read_general_information(),
+            real_estate_types=Config._read_real_estate_types(),
+            map_layering=Config._read_map_layering(),
+            logos=Config._read_logos(),
+            availabilities=Config._read_availabilities(),
+            glossaries=Config._read_glossaries(),
+            disclaimers=Config._read_disclaimers(),
+            municipalities=Config._read_municipalities()
+        )
+        Config._assemble_relation_themes_documents(data.themes, data.theme_document, data.documents)
+        Config.build_indexes(data)
+        with Config._reload_lock:
+            Config._data = data
+        plr_source_metadata.invalidate()
+        symbol_cache.clear()
+        from pyramid_oereb.core.extract_cache import clear_extract_cache
+        clear_extract_cache()
+        log.info('Reloaded the data of the configured sources')
+
     @staticmethod
     def _read_themes():
         """
@@ -351,10 +622,14 @@ class Config(object):
         return law_status_records
 
     @staticmethod
-    def _read_documents():
+    def _read_documents(offices=None):
         """
         Reads settings of documents from config an intiates the relevant reader.
 
+        Args:
+            offices (list of pyramid_oereb.core.records.office.OfficeRecord or None): The offices the
+                documents refer to. Defaults to the loaded offices.
+
         Returns:
         list of pyramid_oereb.core.records.documents.DocumentRecord:
             The list of found records. Since these are not filtered by any criteria the list simply
@@ -371,7 +646,7 @@ class Config(object):
             document_config.get('source').get('class'),
             **document_config.get('source').get('params')
         )
-        document_records = document_reader.read(Config.offices)
+        document_records = document_reader.read(Config.offices if offices is None else offices)
         if len(document_records) == 0:
             log.error('No records found for documents.')
         return document_records
@@ -571,9 +846,9 @@ class Config(object):
 
         if Config.themes is None:
             raise ConfigurationError("Themes have not been initialized")
-        theme_result = [theme for theme in Config.themes if theme.sub_code == sub_code and theme.code == code]
-        if len(theme_result) > 0:
-            return theme_result[0]
+        theme = Config._get_theme_index().get((code, sub_code))
+        if theme is not None:
+            return theme
         else:
             raise ConfigurationError(
                 f"Theme {code} with sub-code {sub_code} not found in the application configuration"
@@ -1031,9 +1306,9 @@ class Config(object):
         """
 
         lookups = Config.get_document_types_lookups(theme_code)
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup_index(lookups, key).get(code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Document type lookup for theme {} with key "{}" and code "{}" is not '
             'defined in configuration!'.format(theme_code, key, code)
@@ -1074,13 +1349,7 @@ class Config(object):
 
         lookup = Config.get_document_type_lookup_by_data_code(theme_code, data_code)
         record = Config.get_document_type_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = DocumentTypeRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(DocumentTypeRecord, lookup, record)
 
     @staticmethod
     def get_main_document_types_lookups():
@@ -1118,9 +1387,9 @@ class Config(object):
         """
 
         lookups = Config.get_main_document_types_lookups()
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup_index(lookups, key).get(code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Document type lookup with key "{}" and code "{}" is not '
             'defined in configuration!'.format(key, code)
@@ -1158,13 +1427,7 @@ class Config(object):
 
         lookup = Config.get_main_document_type_lookup_by_data_code(data_code)
         record = Config.get_document_type_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = DocumentTypeRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(DocumentTypeRecord, lookup, record)
 
     @staticmethod
     def get_document_type_by_code(code):
@@ -1185,9 +1448,9 @@ class Config(object):
         if Config.document_types is None:
             raise ConfigurationError("The document types have not been initialized")
 
-        for document_type in Config.document_types:
-            if document_type.code == code:
-                return document_type
+        document_types = Config._get_code_index('document_types')
+        if code in document_types:
+            return document_types[code]
         raise ConfigurationError(f"Document type {code} not found in the application configuration")
 
     @staticmethod
@@ -1495,6 +1758,166 @@ class Config(object):
 
         return Config._config.get('extract')
 
+    @staticmethod
+    def get_plr_sources_max_workers():
+        """
+        Returns the number of threads used to read the PLR sources of an extract concurrently.
+
+        Returns:
+            int or None: The configured number of threads or None if the PLR sources should be read
+            one after another.
+        """
+
+        assert Config._config is not None
+
+        extract_config = Config._config.get('extract') or {}
+        return extract_config.get('plr_sources_max_workers')
+
+    @staticmethod
+    def get_extract_xml_streaming():
+        """
+        Returns whether the XML extract should be streamed in chunks while it is rendered.
+
+        Returns:
+            bool: True if the XML extract should be streamed.
+        """
+
+        assert Config._config is not None
+
+        extract_config = Config._config.get('extract') or {}
+        return extract_config.get('xml_streaming', False)
+
+    @staticmethod
+    def get_json_serializer():
+        """
+        Returns the configured JSON serializer of the JSON extract.
+
+        Returns:
+            str or None: The name of the serializer or None to use the fastest installed one.
+        """
+
+        assert Config._config is not None
+
+        extract_config = Config._config.get('extract') or {}
+        return extract_config.get('json_serializer')
+
+    @staticmethod
+    def get_wms_download_config():
+        """
+        Returns a dictionary of the configured settings for the download of the WMS images.
+
+        Returns:
+            dict: The configured download settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('wms_download') or {}
+
+    @staticmethod
+    def get_template_cache_config():
+        """
+        Returns a dictionary of the configured settings for the compiled template cache.
+
+        Returns:
+            dict: The configured template cache settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('template_cache') or {}
+
+    @staticmethod
+    def get_extract_cache_config():
+        """
+        Returns a dictionary of the configured settings for the cache of the rendered extracts.
+
+        Returns:
+            dict: The configured extract cache settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('extract_cache') or {}
+
+    @staticmethod
+    def get_database_pool_config():
+        """
+        Returns a dictionary of the configured settings for the database connection pools.
+
+        Returns:
+            dict: The configured pool settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('database_pool') or {}
+
+    @staticmethod
+    def get_timing_config():
+        """
+        Returns a dictionary of the configured settings for the measuring of the stages of the extracts.
+
+        Returns:
+            dict: The configured timing settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('timing') or {}
+
+    @staticmethod
+    def get_metrics_config():
+        """
+        Returns a dictionary of the configured settings for the metrics of the application.
+
+        Returns:
+            dict: The configured metrics settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('metrics') or {}
+
+    @staticmethod
+    def get_profiling_config():
+        """
+        Returns a dictionary of the configured settings for the profiling of extract requests.
+
+        Returns:
+            dict: The configured profiling settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('profiling') or {}
+
+    @staticmethod
+    def get_slow_queries_config():
+        """
+        Returns a dictionary of the configured settings for the recording of slow database queries.
+
+        Returns:
+            dict: The configured slow query settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('slow_queries') or {}
+
+    @staticmethod
+    def get_data_reload_config():
+        """
+        Returns a dictionary of the configured settings for the reload of the data while running.
+
+        Returns:
+            dict: The configured data reload settings. Empty if nothing is configured.
+        """
+
+        assert Config._config is not None
+
+        return Config._config.get('data_reload') or {}
+
     @staticmethod
     def get_availability_config():
         """
@@ -1671,9 +2094,9 @@ class Config(object):
                 'Law status lookup for theme {} is not '
                 'defined in configuration!'.format(theme_code)
             )
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup_index(lookups, key).get(code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Law status lookup for theme {} with key "{}" and code "{}" is not '
             'defined in configuration!'.format(theme_code, key, code)
@@ -1712,13 +2135,7 @@ class Config(object):
         """
         lookup = Config.get_law_status_lookup_by_data_code(theme_code, data_code)
         record = Config.get_law_status_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = LawStatusRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(LawStatusRecord, lookup, record)
 
     @staticmethod
     def get_main_law_status_lookups():
@@ -1755,9 +2172,9 @@ class Config(object):
         """
 
         lookups = Config.get_main_law_status_lookups()
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup_index(lookups, key).get(code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Document type lookup with key "{}" and code "{}" is not'
             'defined in configuration!'.format(key, code)
@@ -1794,13 +2211,7 @@ class Config(object):
 
         lookup = Config.get_main_law_status_lookup_by_data_code(data_code)
         record = Config.get_law_status_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                lookup['data_code'], lookup['extract_code'], record.title
-            )
-        )
-        translated_record = LawStatusRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(LawStatusRecord, lookup, record)
 
     @staticmethod
     def get_law_status_by_code(law_status_code):
@@ -1817,9 +2228,9 @@ class Config(object):
         if Config.law_status is None:
             raise ConfigurationError("The law status have not been initialized")
 
-        for record in Config.law_status:
-            if record.code == law_status_code:
-                return record
+        law_status = Config._get_code_index('law_status')
+        if law_status_code in law_status:
+            return law_status[law_status_code]
         raise ConfigurationError(f"Law status {law_status_code} not found in the application configuration")
 
     @staticmethod
@@ -1835,12 +2246,7 @@ class Config(object):
         """
 
         assert Config._config is not None
-        themes = Config._config.get('plrs')
-        if themes and isinstance(themes, list):
-            for theme in themes:
-                if theme.get('code').lower() == theme_code.lower():
-                    return theme
-        return None
+        return Config._get_theme_config_index().get(theme_code.lower())
 
     @staticmethod
     def get_real_estate_type_lookups():
@@ -1878,9 +2284,9 @@ class Config(object):
         """
 
         lookups = Config.get_real_estate_type_lookups()
-        for lookup in lookups:
-            if lookup[key] == code:
-                return lookup
+        lookup = Config._get_lookup_index(lookups, key).get(code)
+        if lookup is not None:
+            return lookup
         raise ConfigurationError(
             'Real estate type lookup with key "{}" and code "{}" is not '
             'defined in configuration!'.format(key, code)
@@ -1913,13 +2319,7 @@ class Config(object):
         """
         lookup = Config.get_real_estate_type_lookup_by_data_code(data_code)
         record = Config.get_real_estate_type_by_code(lookup['transfer_code'])
-        log.debug(
-            'Translating code {} => code {} of {}'.format(
-                data_code, lookup['extract_code'], record.title
-            )
-        )
-        translated_record = RealEstateTypeRecord(lookup['extract_code'], record.title)
-        return translated_record
+        return Config._get_translated_record(RealEstateTypeRecord, lookup, record)
 
     @staticmethod
     def get_real_estate_type_by_code(code):
@@ -1938,9 +2338,9 @@ class Config(object):
         if Config.real_estate_types is None:
             raise ConfigurationError("The real estate types have not been initialized")
 
-        for record in Config.real_estate_types:
-            if record.code == code:
-                return record
+        real_estate_types = Config._get_code_index('real_estate_types')
+        if code in real_estate_types:
+            return real_estate_types[code]
         raise ConfigurationError(f"Real estate type with {code} not found in the application configuration")
 
     @staticmethod
@@ -2072,10 +2472,7 @@ class Config(object):
         """
         if Config.availabilities is None:
             raise ConfigurationError("The availabilities have not been initialized")
-        for availability in Config.availabilities:
-            if int(fosnr) == int(availability.fosnr) and theme_code == availability.theme_code:
-                return availability.available
-        return True
+        return Config._get_availability_index().get((theme_code, int(fosnr)), True)
 
     @staticmethod
     def municipality_by_fosnr(fosnr):
@@ -2094,9 +2491,9 @@ class Config(object):
         """
         if Config.municipalities is None:
             raise ConfigurationError("The municipalities have not been initialized")
-        for municipality in Config.municipalities:
-            if municipality.fosnr == fosnr:
-                return municipality
+        municipalities = Config._get_municipality_index()
+        if fosnr in municipalities:
+            return municipalities[fosnr]
         raise ConfigurationError(
             'No municipality with fosnr {} could be found in the configured municipalities ({}).'.format(
                 fosnr,
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the reload of the data read by the configuration on startup (themes, law status,
+documents, offices, logos etc.) while the application is running. A background thread of every process
+polls the data integration records and optionally a trigger file and reloads the data as soon as one of
+them changes, so no worker has to be restarted after a data integration.
+"""
+import logging
+import os
+import threading
+
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.readers.data_integration import DataIntegrationReader, get_theme_versions
+
+log = logging.getLogger(__name__)
+
+
+class DataReloader(object):
+
+    def __init__(self, interval=300, data_integration_reader=None, trigger_file=None, reload=None):
+        """
+        The poller reloading the data of the configuration if the data integration records or the
+        modification time of the trigger file change.
+
+        Args:
+            interval (int or float): The time in seconds between two checks.
+            data_integration_reader (pyramid_oereb.core.readers.data_integration.DataIntegrationReader or
+                None): The reader of the data integration records.
+            trigger_file (str or None): A file which triggers a reload if it is touched, e.g. at the end of
+                a data integration script.
+            reload (callable or None): The function reloading the data. Defaults to
+                :meth:`pyramid_oereb.core.config.Config.reload_data`.
+        """
+        self.interval = interval
+        self._data_integration_reader_ = data_integration_reader
+        self._trigger_file_ = trigger_file
+        self._reload_ = reload or Config.reload_data
+        self._state_ = None
+        self._pid_ = None
+        self._thread_ = None
+        self._stopped_ = threading.Event()
+        self._lock_ = threading.Lock()
+
+    def get_state(self):
+        """
+        Returns:
+            tuple: The data versions of the themes and the modification time of the trigger file.
+        """
+        versions = None
+        if self._data_integration_reader_ is not None:
+            versions = sorted(get_theme_versions(self._data_integration_reader_.read()).items())
+        mtime = None
+        if self._trigger_file_ is not None:
+            try:
+                mtime = os.path.getmtime(self._trigger_file_)
+            except (IOError, OSError):
+                pass
+        return versions, mtime
+
+    def check(self):
+        """
+        Reloads the data if the state has changed since the last check. The first check only records the
+        state, since the data has been loaded on startup.
+
+        Returns:
+            bool: True if the data has been reloaded.
+        """
+        state = self.get_state()
+        if self._state_ is None or state == self._state_:
+            self._state_ = state
+            return False
+        log.info('Data integration changed, reloading the data')
+        self._reload_()
+        self._state_ = state
+        return True
+
+    def _run(self):
+        while not self._stopped_.is_set():
+            try:
+                self.check()
+            except Exception as ex:
+                # The data is checked again in the next interval
+                log.error(f"The data could not be reloaded: {ex}")
+            self._stopped_.wait(self.interval)
+
+    def ensure_running(self):
+        """
+        Starts the polling thread if it is not running in this process yet. Threads do not survive a fork,
+        so this is checked on each request (e.g. for gunicorn with preloaded applications).
+        """
+        if self._pid_ == os.getpid() and self._thread_ is not None:
+            return
+        with self._lock_:
+            if self._pid_ == os.getpid() and self._thread_ is not None:
+                return
+            self._pid_ = os.getpid()
+            self._stopped_.clear()
+            self._thread_ = threading.Thread(target=self._run, name='pyramid_oereb_data_reload', daemon=True)
+            self._thread_.start()
+
+    def stop(self):
+        """
+        Stops the polling thread.
+        """
+        self._stopped_.set()
+        with self._lock_:
+            if self._thread_ is not None and self._pid_ == os.getpid():
+                self._thread_.join()
+            self._thread_ = None
+            self._pid_ = None
+
+    def on_new_request(self, event):
+        """
+        The subscriber of the pyramid NewRequest event making sure the polling thread is running. The
+        current data of the configuration is pinned to the request, so a reload while it is processed does
+        not mix the old and the new data.
+
+        Args:
+            event (pyramid.events.NewRequest): The event.
+        """
+        self.ensure_running()
+        Config.pin_data()
+        event.request.add_finished_callback(lambda request: Config.unpin_data())
+
+
+def create_data_reloader(reload_config):
+    """
+    Creates the data reloader of the passed configuration.
+
+    Args:
+        reload_config (dict): The configuration of the data reload.
+
+    Returns:
+        pyramid_oereb.core.data_reload.DataReloader: The data reloader.
+    """
+    data_integration_reader = None
+    data_integration_config = reload_config.get('data_integration')
+    if data_integration_config:
+        data_integration_reader = DataIntegrationReader(
+            data_integration_config.get('source').get('class'),
+            **data_integration_config.get('source').get('params')
+        )
+    return DataReloader(
+        interval=reload_config.get('interval', 300),
+        data_integration_reader=data_integration_reader,
+        trigger_file=reload_config.get('trigger_file')
+    )
@@ -0,0 +1,692 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the cache of the rendered extracts. An extract only changes if the data of its themes,
+the real estate or the configuration changes. The rendered JSON and XML extracts are therefore stored in a
+backend (memory, disk or a server speaking the Redis protocol) and delivered again for the same request.
+The entries are keyed with a data version derived from the data integration records of the requested
+themes, so newly integrated data is never hidden behind an old entry. The real estate has no data version,
+so the entries always expire after a finite time to live.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlparse
+
+from pyramid.config import ConfigurationError
+from pyramid.path import DottedNameResolver
+from pyramid.response import Response
+
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.readers.data_integration import DataIntegrationReader, get_theme_versions
+
+log = logging.getLogger(__name__)
+
+
+EXTRACT_IDENTIFIER_TOKEN = b'\x00ExtractIdentifier\x00'
+"""
+The placeholder of the extract identifier in the stored extracts.
+"""
+
+CREATION_DATE_TOKEN = b'\x00CreationDate\x00'
+"""
+The placeholder of the creation date in the stored extracts.
+"""
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+"""
+The format of the creation date used by the JSON and the XML extract.
+"""
+
+DEFAULT_TTL = 86400
+"""
+The default time to live of the entries in seconds.
+"""
+
+
+class MemoryBackend(object):
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        """
+        A backend keeping the least recently used entries in the memory of the process.
+
+        Args:
+            max_size (int): The maximum size of all entries in bytes.
+        """
+        self._max_size_ = max_size
+        self._entries_ = OrderedDict()
+        self._size_ = 0
+        self._lock_ = threading.Lock()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            bytes or None: The stored value or None if it is not stored or expired.
+        """
+        with self._lock_:
+            entry = self._entries_.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.time():
+                self._remove(key)
+                return None
+            self._entries_.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """
+        Args:
+            key (str): The key of the entry.
+            value (bytes): The value to store.
+            ttl (int or None): The time to live of the entry in seconds. None means forever.
+        """
+        if len(value) > self._max_size_:
+            return
+        expires = time.time() + ttl if ttl else None
+        with self._lock_:
+            if key in self._entries_:
+                self._remove(key)
+            self._entries_[key] = (expires, value)
+            self._size_ += len(value)
+            while self._size_ > self._max_size_:
+                self._remove(next(iter(self._entries_)))
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._lock_:
+            self._entries_.clear()
+            self._size_ = 0
+
+    def _remove(self, key):
+        _, value = self._entries_.pop(key)
+        self._size_ -= len(value)
+
+
+class DiskBackend(object):
+
+    def __init__(self, path, max_size=1024 * 1024 * 1024):
+        """
+        A backend storing the entries as files in a directory, which survives restarts and can be shared
+        between the processes of one host.
+
+        Args:
+            path (str): The directory the entries are stored in.
+            max_size (int): The maximum size of all entries in bytes. The oldest entries are removed if it is
+                exceeded.
+        """
+        self._path_ = path
+        self._max_size_ = max_size
+        self._lock_ = threading.Lock()
+
+    def _file(self, key):
+        return os.path.join(self._path_, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.extract')
+
+    def _files(self):
+        files = []
+        if not os.path.isdir(self._path_):
+            return files
+        for entry in os.scandir(self._path_):
+            if entry.is_file() and entry.name.endswith('.extract'):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_mtime, stat.st_size))
+        return files
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            bytes or None: The stored value or None if it is not stored or expired.
+        """
+        path = self._file(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except (IOError, OSError):
+            return None
+        expires = struct.unpack('>d', content[:8])[0]
+        if expires and expires < time.time():
+            try:
+                os.remove(path)
+            except (IOError, OSError):
+                pass
+            return None
+        return content[8:]
+
+    def set(self, key, value, ttl=None):
+        """
+        Args:
+            key (str): The key of the entry.
+            value (bytes): The value to store.
+            ttl (int or None): The time to live of the entry in seconds. None means forever.
+        """
+        if len(value) > self._max_size_:
+            return
+        expires = time.time() + ttl if ttl else 0.
+        try:
+            os.makedirs(self._path_, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._path_, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(struct.pack('>d', expires))
+                f.write(value)
+            os.replace(tmp_path, self._file(key))
+            with self._lock_:
+                files = self._files()
+                size = sum(file_size for _, _, file_size in files)
+                for file_path, _, file_size in sorted(files, key=lambda f: f[1]):
+                    if size <= self._max_size_:
+                        break
+                    os.remove(file_path)
+                    size -= file_size
+        except (IOError, OSError) as ex:
+            log.warning(f"The extract could not be written to the cache directory: {ex}")
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._lock_:
+            for path, _, _ in self._files():
+                try:
+                    os.remove(path)
+                except (IOError, OSError):
+                    pass
+
+
+class RedisBackend(object):
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='pyramid_oereb:extract:', timeout=1.0):
+        """
+        A backend storing the entries in a server speaking the Redis protocol (RESP), e.g. Redis, Valkey or
+        KeyDB. Every thread uses its own connection. If the server is not reachable, the cache is skipped.
+
+        Args:
+            url (str): The URL of the server (redis://[:password@]host[:port][/db]).
+            prefix (str): The prefix of the keys of the entries.
+            timeout (float): The timeout of the connection and of the commands in seconds.
+        """
+        parsed = urlparse(url)
+        self._host_ = parsed.hostname or 'localhost'
+        self._port_ = parsed.port or 6379
+        self._password_ = parsed.password
+        self._db_ = int(parsed.path.strip('/') or 0)
+        self._prefix_ = prefix
+        self._timeout_ = timeout
+        self._local_ = threading.local()
+
+    def _connect(self):
+        connection = socket.create_connection((self._host_, self._port_), self._timeout_)
+        self._local_.connection = connection
+        self._local_.reader = connection.makefile('rb')
+        if self._password_:
+            self._execute('AUTH', self._password_)
+        if self._db_:
+            self._execute('SELECT', self._db_)
+
+    def _disconnect(self):
+        connection = getattr(self._local_, 'connection', None)
+        self._local_.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except (IOError, OSError):
+                pass
+
+    def _execute(self, *args):
+        command = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            command.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._local_.connection.sendall(b''.join(command))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local_.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise IOError('Connection closed by the server')
+        kind, value = line[:1], line[1:-2]
+        if kind == b'+':
+            return value
+        if kind == b'-':
+            raise IOError(value.decode('utf-8'))
+        if kind == b':':
+            return int(value)
+        if kind == b'$':
+            length = int(value)
+            if length < 0:
+                return None
+            return self._local_.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(value)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise IOError('Unexpected reply {0}'.format(line))
+
+    def command(self, *args):
+        """
+        Sends a command to the server.
+
+        Args:
+            args (str or bytes or int): The command and its arguments.
+
+        Returns:
+            bytes or int or list or None: The reply of the server or None if it failed.
+        """
+        try:
+            if getattr(self._local_, 'connection', None) is None:
+                self._connect()
+            return self._execute(*args)
+        except (IOError, OSError) as ex:
+            log.warning(f"The extract cache server could not be used: {ex}")
+            self._disconnect()
+            return None
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            bytes or None: The stored value or None if it is not stored or expired.
+        """
+        return self.command('GET', self._prefix_ + key)
+
+    def set(self, key, value, ttl=None):
+        """
+        Args:
+            key (str): The key of the entry.
+            value (bytes): The value to store.
+            ttl (int or None): The time to live of the entry in seconds. None means forever.
+        """
+        if ttl:
+            self.command('SET', self._prefix_ + key, value, 'EX', int(ttl))
+        else:
+            self.command('SET', self._prefix_ + key, value)
+
+    def clear(self):
+        """
+        Removes all entries with the prefix of this backend.
+        """
+        cursor = b'0'
+        while True:
+            reply = self.command('SCAN', cursor, 'MATCH', self._prefix_ + '*', 'COUNT', 1000)
+            if reply is None:
+                return
+            cursor, keys = reply
+            if keys:
+                self.command('DEL', *keys)
+            if cursor == b'0':
+                return
+
+
+class CachedExtract(object):
+
+    def __init__(self, content_type, body):
+        """
+        A rendered extract as it is stored in the cache. The extract identifier and the creation date are
+        replaced with placeholders, which are filled in again for each delivery.
+
+        Args:
+            content_type (str): The content type of the response.
+            body (bytes): The rendered extract containing the placeholders.
+        """
+        self.content_type = content_type
+        self.body = body
+
+    @classmethod
+    def from_body(cls, content_type, body, extract):
+        """
+        Creates the entry of a rendered extract.
+
+        Args:
+            content_type (str): The content type of the response.
+            body (bytes): The rendered extract.
+            extract (pyramid_oereb.core.records.extract.ExtractRecord): The rendered extract.
+
+        Returns:
+            pyramid_oereb.core.extract_cache.CachedExtract: The entry.
+        """
+        body = body.replace(extract.extract_identifier.encode('utf-8'), EXTRACT_IDENTIFIER_TOKEN)
+        body = body.replace(extract.creation_date.strftime(DATE_FORMAT).encode('utf-8'), CREATION_DATE_TOKEN)
+        return cls(content_type, body)
+
+    @classmethod
+    def from_response(cls, response, extract):
+        """
+        Creates the entry of a rendered extract. The body of the response is read completely.
+
+        Args:
+            response (pyramid.response.Response): The response containing the rendered extract.
+            extract (pyramid_oereb.core.records.extract.ExtractRecord): The rendered extract.
+
+        Returns:
+            pyramid_oereb.core.extract_cache.CachedExtract: The entry.
+        """
+        return cls.from_body(response.headers.get('Content-Type'), response.body, extract)
+
+    def dumps(self):
+        """
+        Returns:
+            bytes: The serialized entry.
+        """
+        return self.content_type.encode('utf-8') + b'\n' + self.body
+
+    @classmethod
+    def loads(cls, value):
+        """
+        Args:
+            value (bytes): The serialized entry.
+
+        Returns:
+            pyramid_oereb.core.extract_cache.CachedExtract: The entry.
+        """
+        content_type, body = value.split(b'\n', 1)
+        return cls(content_type.decode('utf-8'), body)
+
+    def render(self, extract_identifier=None, creation_date=None):
+        """
+        Fills in the extract identifier and the creation date.
+
+        Args:
+            extract_identifier (str or None): The identifier of the delivered extract. A new one is created
+                if None.
+            creation_date (datetime.datetime or None): The creation date of the delivered extract. Defaults
+                to now.
+
+        Returns:
+            bytes: The extract.
+        """
+        extract_identifier = extract_identifier or str(uuid.uuid4())
+        creation_date = creation_date or datetime.now()
+        return self.body.replace(
+            EXTRACT_IDENTIFIER_TOKEN, extract_identifier.encode('utf-8')
+        ).replace(
+            CREATION_DATE_TOKEN, creation_date.strftime(DATE_FORMAT).encode('utf-8')
+        )
+
+    def to_response(self):
+        """
+        Returns:
+            pyramid.response.Response: The response delivering the extract with a new identifier and
+            creation date.
+        """
+        response = Response(body=self.render())
+        response.headers['Content-Type'] = self.content_type
+        return response
+
+
+class RecordingIterator(object):
+
+    def __init__(self, app_iter, callback):
+        """
+        Wraps the app_iter of a streamed response and records the chunks while they are sent. The
+        concatenated chunks are passed to the callback once the app_iter is exhausted. Nothing is passed if
+        it is closed before, e.g. because the client disconnected.
+
+        Args:
+            app_iter (iterable of bytes): The app_iter of the response.
+            callback (callable): The function called with the complete body.
+        """
+        self._app_iter_ = app_iter
+        self._iterator_ = iter(app_iter)
+        self._callback_ = callback
+        self._chunks_ = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._iterator_)
+        except StopIteration:
+            if self._chunks_ is not None:
+                chunks, self._chunks_ = self._chunks_, None
+                self._callback_(b''.join(chunks))
+            raise
+        if self._chunks_ is not None:
+            self._chunks_.append(chunk)
+        return chunk
+
+    def close(self):
+        self._chunks_ = None
+        close = getattr(self._app_iter_, 'close', None)
+        if close is not None:
+            close()
+
+
+class ExtractCache(object):
+
+    FORMATS = ('json', 'xml')
+    """
+    The formats which can be cached. The printed PDF contains the extract identifier in a form which cannot
+    be replaced, so it is always created.
+    """
+
+    CONTENT_TYPES = ('application/json', 'application/xml')
+    """
+    The content types of the rendered extracts. Other responses, e.g. an error page, are not cached.
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, data_integration_reader=None, version_ttl=60,
+                 config_version=''):
+        """
+        The cache of the rendered extracts.
+
+        Args:
+            backend (pyramid_oereb.core.extract_cache.MemoryBackend or
+                pyramid_oereb.core.extract_cache.DiskBackend or
+                pyramid_oereb.core.extract_cache.RedisBackend): The backend storing the entries.
+            ttl (int): The time to live of an entry in seconds. It has to be finite, as changes of the real
+                estate are not part of the data version.
+            data_integration_reader (pyramid_oereb.core.readers.data_integration.DataIntegrationReader or
+                None): The reader of the data integration records the data version of the themes is
+                derived from. Without a reader the entries are only invalidated by their time to live.
+            version_ttl (int or float): The time in seconds the data integration records are kept before
+                they are read again.
+            config_version (str): A hash of the configuration, so entries of another configuration are not
+                used.
+        """
+        if not ttl or ttl < 0:
+            raise ConfigurationError('The time to live of the extract cache has to be a positive number')
+        self.backend = backend
+        self._ttl_ = ttl
+        self._data_integration_reader_ = data_integration_reader
+        self._version_ttl_ = version_ttl
+        self._config_version_ = config_version
+        self._theme_versions_ = None
+        self._theme_versions_read_ = None
+        self._lock_ = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_theme_versions(self):
+        """
+        Returns the data version of every theme. The data integration records are read at most once per
+        version time to live.
+
+        Returns:
+            dict: The data version (str) by theme code.
+        """
+        if self._data_integration_reader_ is None:
+            return {}
+        with self._lock_:
+            if self._theme_versions_ is not None and \
+                    time.monotonic() - self._theme_versions_read_ < self._version_ttl_:
+                return self._theme_versions_
+        versions = get_theme_versions(self._data_integration_reader_.read())
+        with self._lock_:
+            self._theme_versions_ = versions
+            self._theme_versions_read_ = time.monotonic()
+        return versions
+
+    def key(self, params, application_url):
+        """
+        Returns the key of the extract requested with the passed parameters.
+
+        Args:
+            params (pyramid_oereb.core.views.webservice.Parameter): The parameters of the extract request.
+            application_url (str): The URL of the application, which is part of the links in the extract.
+
+        Returns:
+            str or None: The key or None if the extract cannot be cached.
+        """
+        if params.format not in self.FORMATS or params.signed:
+            return None
+        try:
+            theme_versions = self.get_theme_versions()
+        except Exception as ex:
+            log.warning(f"The data version of the extract could not be read: {ex}")
+            return None
+        data_version = sorted([
+            (code, version) for code, version in theme_versions.items() if not params.skip_topic(code)
+        ])
+        key = json.dumps([
+            self._config_version_,
+            application_url,
+            params.egrid,
+            params.identdn,
+            params.number,
+            params.format,
+            params.language,
+            sorted(params.topics or []),
+            params.with_geometry,
+            params.images,
+            data_version
+        ])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The key of the extract.
+
+        Returns:
+            pyramid_oereb.core.extract_cache.CachedExtract or None: The cached extract or None if it is not
+            cached.
+        """
+        value = self.backend.get(key)
+        with self._lock_:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedExtract.loads(value)
+
+    def put(self, key, extract, response):
+        """
+        Stores a rendered extract. The app_iter of a streamed response is not read here, it is wrapped and the
+        extract is stored once it has been sent completely.
+
+        Args:
+            key (str): The key of the extract.
+            extract (pyramid_oereb.core.records.extract.ExtractRecord): The rendered extract.
+            response (pyramid.response.Response): The response containing the rendered extract.
+        """
+        if response.status_code != 200 or response.content_type not in self.CONTENT_TYPES:
+            return
+        content_type = response.headers.get('Content-Type')
+
+        def store(body):
+            self.backend.set(key, CachedExtract.from_body(content_type, body, extract).dumps(), self._ttl_)
+
+        if isinstance(response.app_iter, (list, tuple)):
+            store(b''.join(response.app_iter))
+        else:
+            response.app_iter = RecordingIterator(response.app_iter, store)
+
+    def info(self):
+        """
+        Returns:
+            dict: The hits, misses and hit rate of the cache.
+        """
+        with self._lock_:
+            requests_count = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / requests_count if requests_count else 0.0
+            }
+
+
+def create_extract_cache(cache_config, config_version=''):
+    """
+    Creates the extract cache of the passed configuration.
+
+    Args:
+        cache_config (dict): The configuration of the extract cache.
+        config_version (str): A hash of the application configuration.
+
+    Returns:
+        pyramid_oereb.core.extract_cache.ExtractCache: The extract cache.
+    """
+    backend_config = cache_config.get('backend') or {}
+    backend_class = DottedNameResolver().maybe_resolve(
+        backend_config.get('class', 'pyramid_oereb.core.extract_cache.MemoryBackend')
+    )
+    backend = backend_class(**(backend_config.get('params') or {}))
+    data_integration_reader = None
+    data_integration_config = cache_config.get('data_integration')
+    if data_integration_config:
+        data_integration_reader = DataIntegrationReader(
+            data_integration_config.get('source').get('class'),
+            **data_integration_config.get('source').get('params')
+        )
+    return ExtractCache(
+        backend,
+        ttl=cache_config.get('ttl', DEFAULT_TTL),
+        data_integration_reader=data_integration_reader,
+        version_ttl=(data_integration_config or {}).get('version_ttl', 60),
+        config_version=config_version
+    )
+
+
+_extract_cache = {}
+_extract_cache_lock = threading.Lock()
+
+
+def get_extract_cache():
+    """
+    Returns the extract cache of the application configuration. It is created on the first call.
+
+    Returns:
+        pyramid_oereb.core.extract_cache.ExtractCache or None: The extract cache or None if it is not
+        configured.
+    """
+    if 'cache' in _extract_cache:
+        return _extract_cache['cache']
+    with _extract_cache_lock:
+        if 'cache' not in _extract_cache:
+            cache_config = Config.get_extract_cache_config()
+            extract_cache = None
+            if cache_config:
+                config_version = hashlib.sha1(
+                    json.dumps(Config._config, sort_keys=True, default=str).encode('utf-8')
+                ).hexdigest()
+                extract_cache = create_extract_cache(cache_config, config_version)
+            _extract_cache['cache'] = extract_cache
+        return _extract_cache['cache']
+
+
+def clear_extract_cache():
+    """
+    Removes all entries of the extract cache of the application configuration if it has been created.
+    """
+    extract_cache = _extract_cache.get('cache')
+    if extract_cache is not None:
+        extract_cache.backend.clear()
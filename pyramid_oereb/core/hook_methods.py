@@ -1,12 +1,11 @@
 import datetime
 import re
-from mako.template import Template
-from pyramid.path import AssetResolver
 from functools import cmp_to_key
 
 from pyramid_oereb import route_prefix
 from pyramid_oereb.core import get_multilingual_element
 from pyramid_oereb.core.records.office import OfficeRecord
+from pyramid_oereb.core.renderer.templates import template_registry, resolve_template_dirs
 
 
 def get_symbol(params, theme_config):
@@ -141,11 +140,7 @@ def produce_sld_content(params, real_estate_config):
     Returns:
         str: The rendered SLD (XML) as text.
     """
-    template = Template(
-        filename=AssetResolver('pyramid_oereb').resolve('core/views/templates/sld.xml').abspath(),
-        input_encoding='utf-8',
-        output_encoding='utf-8'
-    )
+    template = template_registry.get_template(resolve_template_dirs(['core/views/templates']), 'sld.xml')
     template_params = {
         'layer_name': re.sub(
             '<.*?>', '', real_estate_config['visualisation']['layer']['name'], flags=re.DOTALL
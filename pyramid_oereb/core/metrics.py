@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the metrics of the application in the format of Prometheus. It needs the optional
+package prometheus_client. The metrics are only collected if they are enabled in the configuration,
+otherwise the instrumented code only checks if a collector exists.
+
+If the application runs in several processes (e.g. gunicorn workers), the environment variable
+``PROMETHEUS_MULTIPROC_DIR`` has to point to an empty directory shared by the processes before they are
+started. The metrics of all processes are then aggregated on each request of the metrics route. The
+counters keep the counts of stopped processes, the gauges of the database pool connections of a stopped
+process have to be removed by calling ``prometheus_client.multiprocess.mark_process_dead`` with its pid,
+e.g. in the ``child_exit`` hook of the gunicorn configuration.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from pyramid.config import ConfigurationError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+"""tuple of float: The default upper bounds of the buckets of the histograms in seconds."""
+
+ROUTE_SERVICES = {
+    'image/logo': 'GetLogo',
+    'image/symbol': 'GetSymbol',
+    'image/qrcode': 'GetQrCode',
+    'sld': 'GetSld',
+    'metrics': 'GetMetrics',
+    'slow_queries': 'GetSlowQueries'
+}
+"""dict: The service names of the routes whose responses do not contain statistics."""
+
+VARIANTS = ('json', 'xml', 'pdf', 'url')
+"""tuple of str: The formats used as variant label. Other passed formats are counted as 'other'."""
+
+_collector = {}
+_collector_lock = threading.Lock()
+
+
+class CallOutcome(object):
+
+    def __init__(self):
+        """
+        The outcome of a call of an external service, yielded by :func:`observe_call`. A call raising an
+        exception is an error, a call returning a response is an error if its status code is not 2xx.
+        """
+        self.error = False
+
+    def check(self, response):
+        """
+        Marks the call as failed if the passed response has a status code other than 2xx.
+
+        Args:
+            response (requests.Response): The response of the call.
+
+        Returns:
+            requests.Response: The passed response.
+        """
+        status_code = getattr(response, 'status_code', None)
+        if isinstance(status_code, int) and not 200 <= status_code < 300:
+            self.error = True
+        return response
+
+
+class _NullCallOutcome(CallOutcome):
+
+    def check(self, response):
+        return response
+
+
+_null_call = nullcontext(_NullCallOutcome())
+
+
+class MetricsCollector(object):
+
+    def __init__(self, path='/metrics', buckets=DEFAULT_BUCKETS, gauges_interval=1.0):
+        """
+        The metrics of the process. The gauges of the caches and the database pools are updated at most
+        every ``gauges_interval`` seconds after a request and on each request of the metrics route.
+
+        Args:
+            path (str): The path of the metrics route.
+            buckets (tuple of float): The upper bounds of the buckets of the histograms in seconds.
+            gauges_interval (float): The minimum seconds between two updates of the gauges.
+
+        Raises:
+            pyramid.config.ConfigurationError: Raised if prometheus_client is not installed.
+        """
+        try:
+            from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+        except ImportError:
+            raise ConfigurationError('The metrics need the package prometheus_client.')
+        self.path = path
+        self.registry = CollectorRegistry()
+        self.gauges_interval = gauges_interval
+        self._gauges_updated_ = None
+        self._counts_ = dict()
+        self._lock_ = threading.Lock()
+        self.requests = Counter(
+            'pyramid_oereb_requests', 'Number of requests by service, variant and status code',
+            ['service', 'variant', 'status'], registry=self.registry
+        )
+        self.request_duration = Histogram(
+            'pyramid_oereb_request_duration_seconds', 'Duration of the requests by service and variant',
+            ['service', 'variant'], buckets=buckets, registry=self.registry
+        )
+        self.stage_duration = Histogram(
+            'pyramid_oereb_stage_duration_seconds',
+            'Duration of the stages of the extracts, the label is the theme code of a PLR source',
+            ['stage', 'label'], buckets=buckets, registry=self.registry
+        )
+        self.call_duration = Histogram(
+            'pyramid_oereb_external_call_duration_seconds',
+            'Duration of the calls of external services (wms, oereblex, mapfish_print)',
+            ['target', 'outcome'], buckets=buckets, registry=self.registry
+        )
+        self.cache_hits = Counter(
+            'pyramid_oereb_cache_hits', 'Hits of the caches', ['cache'], registry=self.registry
+        )
+        self.cache_misses = Counter(
+            'pyramid_oereb_cache_misses', 'Misses of the caches', ['cache'], registry=self.registry
+        )
+        self.pool_connections = Gauge(
+            'pyramid_oereb_db_pool_connections', 'Connections of the database pools by state',
+            ['connection', 'state'], registry=self.registry, multiprocess_mode='livesum'
+        )
+        self.pool_checkouts = Counter(
+            'pyramid_oereb_db_pool_checkouts', 'Checkouts of the database pools by outcome',
+            ['connection', 'outcome'], registry=self.registry
+        )
+        self.pool_wait = Counter(
+            'pyramid_oereb_db_pool_wait_seconds', 'Total time waited for connections of the database pools',
+            ['connection'], registry=self.registry
+        )
+
+    def observe_request(self, service, variant, status, duration):
+        """
+        Counts a request.
+
+        Args:
+            service (str): The service, e.g. GetExtractById.
+            variant (str): The variant of the service, e.g. the format.
+            status (int): The status code of the response.
+            duration (float): The duration in seconds.
+        """
+        self.requests.labels(service, variant, str(status)).inc()
+        self.request_duration.labels(service, variant).observe(duration)
+
+    def observe_spans(self, spans):
+        """
+        Observes the durations of the stages of an extract.
+
+        Args:
+            spans (list of dict): The spans of a :class:`pyramid_oereb.core.timing.Timing`.
+        """
+        for span in spans:
+            self.stage_duration.labels(span['name'], span['label'] or '').observe(span['duration'] / 1000)
+
+    def observe_call(self, target, outcome, duration):
+        """
+        Observes the duration of a call of an external service.
+
+        Args:
+            target (str): The called service, e.g. wms.
+            outcome (str): success or error.
+            duration (float): The duration in seconds.
+        """
+        self.call_duration.labels(target, outcome).observe(duration)
+
+    def _add_count(self, counter, labels, count):
+        # The caches and pools count since the start of the process, the counter is increased by the
+        # difference to the last update. A smaller count means the statistics have been reset.
+        key = (counter, labels)
+        last = self._counts_.get(key, 0)
+        self._counts_[key] = count
+        increase = count - last if count >= last else count
+        if increase > 0:
+            counter.labels(*labels).inc(increase)
+
+    def update_gauges(self, force=False):
+        """
+        Updates the counters of the caches and the database pools and the gauges of the database pool
+        connections of the process.
+
+        Args:
+            force (bool): True to update the gauges even if the interval has not passed yet.
+        """
+        now = time.monotonic()
+        with self._lock_:
+            if not force and self._gauges_updated_ is not None and \
+                    now - self._gauges_updated_ < self.gauges_interval:
+                return
+            self._gauges_updated_ = now
+        from pyramid_oereb import database_adapter
+        cache_infos = get_cache_infos()
+        pool_metrics = database_adapter.get_pool_metrics()
+        with self._lock_:
+            for cache, info in cache_infos.items():
+                self._add_count(self.cache_hits, (cache,), info['hits'])
+                self._add_count(self.cache_misses, (cache,), info['misses'])
+            for connection, pool in pool_metrics.items():
+                for state in ('size', 'in_use', 'idle', 'overflow'):
+                    self.pool_connections.labels(connection, state).set(pool[state])
+                self._add_count(self.pool_checkouts, (connection, 'success'), pool['checkouts'])
+                self._add_count(self.pool_checkouts, (connection, 'overflow'), pool['overflow_checkouts'])
+                self._add_count(self.pool_checkouts, (connection, 'timeout'), pool['timeouts'])
+                self._add_count(self.pool_wait, (connection,), pool['wait_time_total'])
+
+    def render(self):
+        """
+        Renders the metrics of all processes if the multiprocess mode is active, otherwise the ones of
+        this process.
+
+        Returns:
+            tuple: The content (bytes) and the content type (str).
+        """
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+        self.update_gauges(force=True)
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            from prometheus_client import multiprocess
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self.registry
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def get_cache_infos():
+    """
+    Returns:
+        dict: The hits and misses of the process wide caches by their name.
+    """
+    from pyramid_oereb.core.extract_cache import get_extract_cache
+    from pyramid_oereb.core.processor import get_wms_image_cache
+    from pyramid_oereb.core.qr_code import qr_code_cache
+    from pyramid_oereb.core.sources.symbol_cache import symbol_cache
+    infos = {
+        'symbol': symbol_cache.info(),
+        'qr_code': qr_code_cache.info()
+    }
+    extract_cache = get_extract_cache()
+    if extract_cache is not None:
+        infos['extract'] = extract_cache.info()
+    wms_image_cache = get_wms_image_cache()
+    if wms_image_cache is not None:
+        info = wms_image_cache.info()
+        infos['wms_image'] = {'hits': info['memory_hits'] + info['disk_hits'], 'misses': info['misses']}
+    return infos
+
+
+def init_metrics_collector(metrics_config):
+    """
+    Creates the collector of the process if the metrics are enabled.
+
+    Args:
+        metrics_config (dict): The configured metrics settings.
+
+    Returns:
+        MetricsCollector or None: The collector or None if the metrics are not enabled.
+    """
+    with _collector_lock:
+        collector = None
+        if metrics_config.get('enabled', False):
+            collector = MetricsCollector(
+                path=metrics_config.get('path', '/metrics'),
+                buckets=tuple(metrics_config.get('buckets', DEFAULT_BUCKETS)),
+                gauges_interval=metrics_config.get('gauges_interval', 1.0)
+            )
+        _collector['collector'] = collector
+        return collector
+
+
+def get_metrics_collector():
+    """
+    Returns:
+        MetricsCollector or None: The collector of the process or None if the metrics are not enabled.
+    """
+    return _collector.get('collector')
+
+
+def observe_call(target):
+    """
+    Measures the duration of a call of an external service if the metrics are enabled. The context yields
+    a :class:`CallOutcome`, whose ``check`` method has to be called with the response, so responses with
+    an error status are not counted as success.
+
+    Args:
+        target (str): The called service, e.g. wms, oereblex or mapfish_print.
+
+    Returns:
+        contextlib.AbstractContextManager: The context measuring the call.
+    """
+    collector = _collector.get('collector')
+    if collector is None:
+        return _null_call
+    return _observe_call(collector, target)
+
+
+@contextmanager
+def _observe_call(collector, target):
+    start = time.perf_counter()
+    call = CallOutcome()
+    outcome = 'error'
+    try:
+        yield call
+        if not call.error:
+            outcome = 'success'
+    finally:
+        collector.observe_call(target, outcome, time.perf_counter() - start)
+
+
+def get_service(request, response):
+    """
+    Returns the service and its variant of a request of a pyramid_oereb route.
+
+    Args:
+        request (pyramid.request.Request): The request.
+        response (pyramid.response.Response or None): The response.
+
+    Returns:
+        tuple of str: The service and the variant.
+    """
+    extras = getattr(response, 'extras', None) or {}
+    service = extras.get('service')
+    variant = extras.get('output_format') or ''
+    if variant and variant not in VARIANTS:
+        variant = 'other'
+    if not service:
+        route_name = request.matched_route.name
+        service = ROUTE_SERVICES.get(route_name.split('/', 1)[-1], route_name)
+    return service, variant
+
+
+def metrics_tween_factory(handler, registry):
+    """
+    Creates the tween counting the requests of the pyramid_oereb routes.
+
+    Args:
+        handler (callable): The next handler.
+        registry (pyramid.registry.Registry): The registry of the application.
+
+    Returns:
+        callable: The tween.
+    """
+    from pyramid_oereb import route_prefix
+
+    def metrics_tween(request):
+        collector = _collector.get('collector')
+        if collector is None:
+            return handler(request)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = handler(request)
+            return response
+        finally:
+            route = request.matched_route
+            if route is not None and route.name.startswith('{0}/'.format(route_prefix)):
+                service, variant = get_service(request, response)
+                status = response.status_code if response is not None else 500
+                collector.observe_request(service, variant, status, time.perf_counter() - start)
+                collector.update_gauges()
+
+    return metrics_tween
@@ -10,6 +10,9 @@ from pyramid_oereb.core.config import Config
 from pyramid_oereb.core.records.plr import PlrRecord
 from pyramid_oereb.core.readers.extract import ExtractReader
 from pyramid_oereb.core.readers.real_estate import RealEstateReader
+from pyramid_oereb.core.timing import span
+from pyramid_oereb.core.tolerance_check import ToleranceCheck
+from pyramid_oereb.core.wms import WmsDownloader, WmsImageCache
 
 
 log = logging.getLogger(__name__)
@@ -17,7 +20,7 @@ log = logging.getLogger(__name__)
 
 class Processor(object):
 
-    def __init__(self, real_estate_reader, plr_sources, extract_reader):
+    def __init__(self, real_estate_reader, plr_sources, extract_reader, wms_downloader=None):
         """
         The Processor class is directly bound to the get_extract_by_id service in this application. Its task
         is to unsnarl the challenging model of the oereb extract and handle all objects inside this extract
@@ -31,10 +34,13 @@ class Processor(object):
                 public law restriction source instances for runtime use wrapped in a list.
             extract_reader (pyramid_oereb.lib.readers.extract.ExtractReader): The extract reader
                 instance for runtime use.
+            wms_downloader (pyramid_oereb.core.wms.WmsDownloader or None): The downloader used for the
+                images of the view services. If None, the images are downloaded one after another.
         """
         self._real_estate_reader_ = real_estate_reader
         self._plr_sources_ = plr_sources
         self._extract_reader_ = extract_reader
+        self._wms_downloader_ = wms_downloader
 
     def filter_published_documents(self, record):
         """
@@ -95,20 +101,26 @@ class Processor(object):
         inside_plrs = []
         outside_plrs = []
 
-        for public_law_restriction in real_estate.public_law_restrictions:
-            if isinstance(public_law_restriction, PlrRecord) and public_law_restriction.published:
-                # Test if the geometries list is now empty - if so remove plr from plr list
-                if public_law_restriction.calculate(real_estate, Config.get('geometry_types')):
-                    log.debug("plr_tolerance_check: keeping as potentially concerned plr {}".
-                              format(public_law_restriction))
-                    public_law_restriction = self.filter_documents_by_fosnr(public_law_restriction,
-                                                                            real_estate.fosnr)
-                    public_law_restriction = self.filter_published_documents(public_law_restriction)
-                    inside_plrs.append(public_law_restriction)
-                else:
-                    log.debug("plr_tolerance_check: removing from the concerned plrs {}".
-                              format(public_law_restriction))
-                    outside_plrs.append(public_law_restriction)
+        public_law_restrictions = [
+            public_law_restriction for public_law_restriction in real_estate.public_law_restrictions
+            if isinstance(public_law_restriction, PlrRecord) and public_law_restriction.published
+        ]
+        # All geometries are calculated in one batch, see PlrRecord.calculate for a single record
+        tested = ToleranceCheck(real_estate).calculate(public_law_restrictions, Config.get('geometry_types'))
+
+        for public_law_restriction, inside in zip(public_law_restrictions, tested):
+            # Test if the geometries list is now empty - if so remove plr from plr list
+            if inside:
+                log.debug("plr_tolerance_check: keeping as potentially concerned plr {}".
+                          format(public_law_restriction))
+                public_law_restriction = self.filter_documents_by_fosnr(public_law_restriction,
+                                                                        real_estate.fosnr)
+                public_law_restriction = self.filter_published_documents(public_law_restriction)
+                inside_plrs.append(public_law_restriction)
+            else:
+                log.debug("plr_tolerance_check: removing from the concerned plrs {}".
+                          format(public_law_restriction))
+                outside_plrs.append(public_law_restriction)
 
         # Check if theme is concerned
         def is_inside_plr(theme_code):
@@ -138,7 +150,7 @@ class Processor(object):
         return extract
 
     @staticmethod
-    def view_service_handling(real_estate, images, extract_format, language):
+    def view_service_handling(real_estate, images, extract_format, language, wms_downloader=None):
         """
         Handles all view service-related stuff. At the moment this is:
             * construction of the correct url (reference_wms, multilingual) depending on the real estate
@@ -151,6 +163,8 @@ class Processor(object):
             extract_format (string): The format currently used. For 'pdf' format,
                 the used map size will be adapted to the PDF format.
             language (string or None): Which language of the reference WMS should be used
+            wms_downloader (pyramid_oereb.core.wms.WmsDownloader or None): The downloader used for the
+                images. If None, the images are downloaded one after another.
 
         Returns:
             pyramid_oereb.lib.records.real_estate.RealEstateRecord: The updated extract.
@@ -170,14 +184,20 @@ class Processor(object):
             map_size[1],
             bbox
         )
-        if images:
-            real_estate.plan_for_land_register.download_wms_content(language)
-            real_estate.plan_for_land_register_main_page.download_wms_content(language)
-
+        view_services = [
+            real_estate.plan_for_land_register,
+            real_estate.plan_for_land_register_main_page
+        ]
         for public_law_restriction in real_estate.public_law_restrictions:
             public_law_restriction.view_service.get_full_wms_url(language, map_size[0], map_size[1], bbox)
-            if images:
-                public_law_restriction.view_service.download_wms_content(language)
+            view_services.append(public_law_restriction.view_service)
+
+        if images:
+            if wms_downloader is None:
+                for view_service in view_services:
+                    view_service.download_wms_content(language)
+            else:
+                wms_downloader.download(view_services, language)
         return real_estate
 
     @staticmethod
@@ -260,6 +280,14 @@ class Processor(object):
         """
         return self._extract_reader_
 
+    @property
+    def wms_downloader(self):
+        """
+        Returns:
+            pyramid_oereb.core.wms.WmsDownloader or None: The downloader of the images of the view services.
+        """
+        return self._wms_downloader_
+
     def process(self, real_estate, params, sld_url):
         """
         Central processing method to hook in from webservice.
@@ -277,8 +305,10 @@ class Processor(object):
         """
         log.debug("process() start")
         municipality = Config.municipality_by_fosnr(real_estate.fosnr)
-        extract_raw = self._extract_reader_.read(params, real_estate, municipality)
-        extract = self.plr_tolerance_check(extract_raw)
+        with span('extract_read'):
+            extract_raw = self._extract_reader_.read(params, real_estate, municipality)
+        with span('tolerance_check'):
+            extract = self.plr_tolerance_check(extract_raw)
 
         resolver = DottedNameResolver()
         sort_within_themes_method_string = Config.get('extract').get('sort_within_themes_method')
@@ -293,7 +323,14 @@ class Processor(object):
         # care of the circumstance that after tolerance check plrs will be dismissed which were
         # recognized as intersecting before. To avoid this, the tolerance check is gathering all plrs
         # intersecting and not intersecting and starts the legend entry sorting after.
-        self.view_service_handling(extract.real_estate, params.images, params.format, params.language)
+        with span('view_service'):
+            self.view_service_handling(
+                extract.real_estate,
+                params.images,
+                params.format,
+                params.language,
+                wms_downloader=self._wms_downloader_
+            )
 
         extract.disclaimers = Config.disclaimers
         extract.glossaries = Config.glossaries
@@ -342,13 +379,48 @@ def create_processor(real_estate_only=False):
 
             extract_reader = ExtractReader(
                 plr_sources,
-                plr_cadastre_authority
+                plr_cadastre_authority,
+                max_workers=Config.get_plr_sources_max_workers()
             )
 
+        wms_download_config = Config.get_wms_download_config()
+        wms_cache_config = wms_download_config.get('cache')
+        wms_cache = None
+        if wms_cache_config:
+            wms_cache = WmsImageCache(
+                ttl=wms_cache_config.get('ttl'),
+                memory_max_size=wms_cache_config.get('memory_max_size', 64 * 1024 * 1024),
+                disk_path=wms_cache_config.get('disk_path'),
+                disk_max_size=wms_cache_config.get('disk_max_size', 1024 * 1024 * 1024)
+            )
+        wms_downloader = WmsDownloader(
+            max_workers=wms_download_config.get('max_workers', 8),
+            max_per_host=wms_download_config.get('max_per_host', 4),
+            timeout=wms_download_config.get('timeout'),
+            retries=wms_download_config.get('retries', 0),
+            backoff_factor=wms_download_config.get('backoff_factor', 0.5),
+            cache=wms_cache
+        )
+
         processor = Processor(
             real_estate_reader=real_estate_reader,
             plr_sources=plr_sources,
             extract_reader=extract_reader,
+            wms_downloader=wms_downloader
         )
         _processor_cache[cache_key] = processor
         return processor
+
+
+def get_wms_image_cache():
+    """
+    Returns the image cache of the view services used by the processor of the extracts.
+
+    Returns:
+        pyramid_oereb.core.wms.WmsImageCache or None: The cache or None if no extract has been processed yet
+        or the cache is not configured.
+    """
+    processor = _processor_cache.get('full')
+    if processor is None or processor._wms_downloader_ is None:
+        return None
+    return processor._wms_downloader_.cache
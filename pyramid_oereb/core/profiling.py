@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the profiling of single extract requests on demand. It needs the optional package
+yappi. If the profiling is enabled in the configuration, a request is profiled if it passes the configured
+secret in a header or a parameter. The value may be followed by the clock type, e.g. ``secret:cpu``.
+
+The functions are tagged with the profile of the current context, which is passed to the worker threads of
+the PLR sources and the view services. So only the functions called for the profiled request are
+collected, even if other requests are processed at the same time. One request at a time is profiled per
+process, further triggers are processed without profiling.
+"""
+import base64
+import datetime
+import hmac
+import io
+import itertools
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from pyramid.config import ConfigurationError
+from pyramid.response import Response
+
+log = logging.getLogger(__name__)
+
+CLOCK_TYPES = ('wall', 'cpu')
+"""tuple of str: The supported clock types."""
+
+_current_profile = ContextVar('pyramid_oereb_profile', default=0)
+_profiler = {}
+_profiler_lock = threading.Lock()
+
+
+class Profile(object):
+
+    def __init__(self, clock_type):
+        """
+        The result of a profiled request.
+
+        Args:
+            clock_type (str): The clock type, wall or cpu.
+        """
+        self.clock_type = clock_type
+        self.duration = None
+        self.stats = None
+
+
+class Profiler(object):
+
+    def __init__(self, secret, header='X-Oereb-Profile', parameter='PROFILE', clock_type='wall',
+                 directory=None, limit=30):
+        """
+        The profiler of the process.
+
+        Args:
+            secret (str): The secret triggering the profiling of a request.
+            header (str): The header passing the secret.
+            parameter (str): The parameter passing the secret.
+            clock_type (str): The clock type used if the trigger does not define it, wall or cpu.
+            directory (str or None): The directory the profiles are written to. If None, the profile is
+                returned instead of the extract.
+            limit (int): The number of functions listed in the summary of a profile.
+
+        Raises:
+            pyramid.config.ConfigurationError: Raised if yappi is not installed or the settings are
+                invalid.
+        """
+        try:
+            import yappi
+        except ImportError:
+            raise ConfigurationError('The profiling needs the package yappi.')
+        if not secret:
+            raise ConfigurationError('The profiling needs a secret.')
+        if clock_type not in CLOCK_TYPES:
+            raise ConfigurationError('The clock type of the profiling has to be one of {0}.'.format(
+                ', '.join(CLOCK_TYPES)
+            ))
+        self.secret = secret
+        self.header = header
+        self.parameter = parameter
+        self.clock_type = clock_type
+        self.directory = directory
+        self.limit = limit
+        self._tags_ = itertools.count(1)
+        self._lock_ = threading.Lock()
+        yappi.set_tag_callback(_current_profile.get)
+
+    def get_clock_type(self, request):
+        """
+        Checks if the request triggers the profiling.
+
+        Args:
+            request (pyramid.request.Request): The request.
+
+        Returns:
+            str or None: The clock type of the profile or None if the request is not profiled.
+        """
+        value = request.headers.get(self.header) or request.params.get(self.parameter)
+        if not value:
+            return None
+        secret, _, clock_type = value.partition(':')
+        if not hmac.compare_digest(secret.encode('utf-8'), self.secret.encode('utf-8')):
+            log.warning('Profiling triggered with a wrong secret.')
+            return None
+        clock_type = clock_type.lower() or self.clock_type
+        return clock_type if clock_type in CLOCK_TYPES else self.clock_type
+
+    @contextmanager
+    def profile(self, clock_type):
+        """
+        Profiles the enclosed block and the worker threads started from it.
+
+        Args:
+            clock_type (str): The clock type, wall or cpu.
+
+        Yields:
+            Profile or None: The profile, which is complete after the block. None if another request is
+            profiled at the same time.
+        """
+        import yappi
+        if not self._lock_.acquire(blocking=False):
+            log.warning('Profiling skipped, another request is profiled.')
+            yield None
+            return
+        try:
+            profile = Profile(clock_type)
+            tag = next(self._tags_)
+            yappi.clear_stats()
+            yappi.set_clock_type(clock_type)
+            token = _current_profile.set(tag)
+            start = time.perf_counter()
+            yappi.start(builtins=False, profile_threads=True)
+            try:
+                yield profile
+            finally:
+                yappi.stop()
+                profile.duration = time.perf_counter() - start
+                _current_profile.reset(token)
+                profile.stats = yappi.convert2pstats(yappi.get_func_stats(tag=tag))
+                yappi.clear_stats()
+        finally:
+            self._lock_.release()
+
+    def summarize(self, profile, egrid, spans):
+        """
+        Args:
+            profile (Profile): The profile.
+            egrid (str or None): The EGRID of the extract.
+            spans (list of dict): The spans of the :class:`pyramid_oereb.core.timing.Timing` of the request.
+
+        Returns:
+            dict: The EGRID, the clock type, the duration in milliseconds, the timing and the functions
+            with the longest cumulative time.
+        """
+        functions = sorted(profile.stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return {
+            'egrid': egrid,
+            'clock_type': profile.clock_type,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'duration': round(profile.duration * 1000, 3),
+            'timing': spans,
+            'functions': [
+                {
+                    'function': pstats.func_std_string(func),
+                    'calls': value[1],
+                    'own_time': round(value[2] * 1000, 3),
+                    'cumulative_time': round(value[3] * 1000, 3)
+                }
+                for func, value in functions[:self.limit]
+            ]
+        }
+
+    def output(self, profile, response, egrid, spans):
+        """
+        Writes the profile to the configured directory or returns it instead of the extract.
+
+        The files are named by the time, the EGRID and the clock type: the statistics in the format of
+        pstats (``.pstats``), the collapsed stacks for flame graphs (``.collapsed``) and the summary
+        (``.json``). The name is sent in the header of the response.
+
+        Args:
+            profile (Profile): The profile.
+            response (pyramid.response.Response): The response of the profiled request.
+            egrid (str or None): The EGRID of the extract.
+            spans (list of dict): The spans of the :class:`pyramid_oereb.core.timing.Timing` of the request.
+
+        Returns:
+            pyramid.response.Response: The response of the request or the one containing the profile.
+        """
+        summary = self.summarize(profile, egrid, spans)
+        summary['status'] = response.status_code
+        collapsed = collapse(profile.stats)
+        if self.directory is None:
+            summary['collapsed'] = collapsed
+            summary['pstats'] = base64.b64encode(marshal.dumps(profile.stats.stats)).decode('ascii')
+            return Response(json.dumps(summary), content_type='application/json', charset='utf-8')
+        name = '{0}_{1}_{2}'.format(
+            datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f'),
+            re.sub(r'[^A-Za-z0-9_.-]', '_', egrid or 'unknown'),
+            profile.clock_type
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        profile.stats.dump_stats(path + '.pstats')
+        with io.open(path + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write(collapsed)
+        with io.open(path + '.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        log.info('Profile of {0} written to {1}'.format(egrid, path))
+        response.headers[self.header] = name
+        return response
+
+
+def collapse(stats, threshold=0.0001):
+    """
+    Creates the collapsed stacks of the statistics, the input format of flame graphs (e.g. flamegraph.pl or
+    speedscope). The statistics contain the calls between the functions but not the stacks, so the time of
+    a function is split over its callers in proportion of the calls. Recursive calls are left out.
+
+    Args:
+        stats (pstats.Stats): The statistics.
+        threshold (float): The part of the total time below which the stacks are left out.
+
+    Returns:
+        str: One line per stack, the functions separated by semicolons followed by the time in
+        microseconds.
+    """
+    children = defaultdict(list)
+    roots = []
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, caller_stats in callers.items():
+            children[caller].append((func, caller_stats[3]))
+    total = sum(stats.stats[root][3] for root in roots)
+    minimum = total * threshold
+    lines = defaultdict(float)
+
+    def walk(func, path, duration):
+        own_time, cumulative = stats.stats[func][2:4]
+        fraction = duration / cumulative if cumulative else 0.0
+        path = path + (func,)
+        lines[path] += own_time * fraction
+        for child, child_cumulative in children[func]:
+            child_duration = child_cumulative * fraction
+            if child not in path and child_duration >= minimum:
+                walk(child, path, child_duration)
+
+    for root in roots:
+        walk(root, (), stats.stats[root][3])
+    return ''.join(
+        '{0} {1}\n'.format(';'.join(pstats.func_std_string(func).replace(';', ',') for func in path),
+                           int(round(duration * 1000000)))
+        for path, duration in sorted(lines.items())
+        if round(duration * 1000000) > 0
+    )
+
+
+def init_profiler(profiling_config):
+    """
+    Creates the profiler of the process if the profiling is enabled.
+
+    Args:
+        profiling_config (dict): The configured profiling settings.
+
+    Returns:
+        Profiler or None: The profiler or None if the profiling is not enabled.
+    """
+    with _profiler_lock:
+        profiler = None
+        if profiling_config.get('enabled', False):
+            profiler = Profiler(
+                profiling_config.get('secret'),
+                header=profiling_config.get('header', 'X-Oereb-Profile'),
+                parameter=profiling_config.get('parameter', 'PROFILE'),
+                clock_type=profiling_config.get('clock_type', 'wall'),
+                directory=profiling_config.get('directory'),
+                limit=profiling_config.get('limit', 30)
+            )
+        _profiler['profiler'] = profiler
+        return profiler
+
+
+def get_profiler():
+    """
+    Returns:
+        Profiler or None: The profiler of the process or None if the profiling is not enabled.
+    """
+    return _profiler.get('profiler')
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the generation of the QR codes linking to the PDF extract and a process wide cache of
+the generated codes. The cache is shared by the extracts embedding the QR code and the QR code webservice,
+so the code of an extract URL is only rendered once as long as it stays in the cache.
+"""
+import io
+import logging
+import threading
+from collections import OrderedDict
+
+import qrcode
+
+log = logging.getLogger(__name__)
+
+
+def create_qr_code(text):
+    """
+    Returns a binary image - the QR code.
+
+    Args:
+        text (str): The text which will be wrapped into the QR code.
+
+    Returns:
+        bytes: Binary PNG image content.
+    """
+    qr = qrcode.QRCode()
+    qr.add_data(text)
+    qr.make()
+    qr_img = qr.make_image()
+    buffered = io.BytesIO()
+    qr_img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+class QrCodeCache(object):
+
+    def __init__(self, maxsize=256):
+        """
+        A bounded least recently used cache of the QR codes identified by the text they contain, usually
+        the URL of the extract.
+
+        Args:
+            maxsize (int): The maximum number of cached QR codes.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries_ = OrderedDict()
+        self._lock_ = threading.Lock()
+
+    def get(self, text):
+        """
+        Returns the QR code of the passed text. It is generated only if it is not cached yet.
+
+        Args:
+            text (str): The text which will be wrapped into the QR code.
+
+        Returns:
+            bytes: Binary PNG image content.
+        """
+        with self._lock_:
+            qr_code = self._entries_.get(text)
+            if qr_code is not None:
+                self._entries_.move_to_end(text)
+                self.hits += 1
+                return qr_code
+            self.misses += 1
+        # Generate outside of the lock, concurrent requests of the same URL just produce the same image
+        qr_code = create_qr_code(text)
+        with self._lock_:
+            self._entries_[text] = qr_code
+            self._entries_.move_to_end(text)
+            while len(self._entries_) > self.maxsize:
+                evicted, _ = self._entries_.popitem(last=False)
+                log.debug('Evicted QR code of {0} from cache'.format(evicted))
+        return qr_code
+
+    def clear(self):
+        """
+        Removes all cached QR codes and resets the counters.
+        """
+        with self._lock_:
+            self._entries_.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Returns:
+            dict: The hits, misses, current size and maximum size of the cache.
+        """
+        with self._lock_:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries_),
+                'maxsize': self.maxsize
+            }
+
+
+qr_code_cache = QrCodeCache()
+"""
+The QR code cache shared by the extracts and the QR code webservice of the process.
+"""
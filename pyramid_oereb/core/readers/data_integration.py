@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import hashlib
+
 from pyramid.path import DottedNameResolver
 
 
@@ -41,3 +43,30 @@ class DataIntegrationReader(object):
                 contains all records delivered by the source.
         """
         return self._source_.read()
+
+
+def get_theme_versions(records):
+    """
+    Derives the data version of every theme from its data integration records.
+
+    Args:
+        records (list of pyramid_oereb.core.records.data_integration.DataIntegrationRecord): The data
+            integration records.
+
+    Returns:
+        dict: The data version (str) by theme code. It changes as soon as one of the records of the theme
+        gets a new date or checksum.
+    """
+    states = dict()
+    for record in records:
+        code = record.theme_identifier
+        if code is None:
+            code = record.theme.code
+        states.setdefault(code, []).append('{0}|{1}'.format(
+            record.date.isoformat() if record.date else '',
+            record.checksum or ''
+        ))
+    return dict([
+        (code, hashlib.sha1(';'.join(sorted(state)).encode('utf-8')).hexdigest())
+        for code, state in states.items()
+    ])
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from operator import attrgetter
 from pyramid.path import DottedNameResolver
 
@@ -8,8 +10,10 @@ from timeit import default_timer as timer
 
 from pyramid_oereb.core.config import Config
 from pyramid_oereb.core.records.extract import ExtractRecord
-from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.records.image import LazyImageRecord
 from pyramid_oereb.core.records.plr import PlrRecord, EmptyPlrRecord
+from pyramid_oereb.core.slow_queries import query_labels
+from pyramid_oereb.core.timing import get_timing, span
 
 log = logging.getLogger(__name__)
 
@@ -21,17 +25,25 @@ class ExtractReader(object):
     and extract-related components are bound together.
     """
 
-    def __init__(self, plr_sources, plr_cadastre_authority):
+    def __init__(self, plr_sources, plr_cadastre_authority, max_workers=None):
         """
         Args:
             plr_sources (list of pyramid_oereb.lib.sources.plr.PlrBaseSource): The list of PLR source
                 instances which the achieved extract should be about.
             plr_cadastre_authority (pyramid_oereb.lib.records.office.OfficeRecord): The authority responsible
                 for the PLR cadastre.
+            max_workers (int or None): The number of threads used to read the PLR sources concurrently.
+                If it is not set or lower than 2, the PLR sources are read one after another.
         """
         self._plr_sources_ = plr_sources
         self._plr_cadastre_authority_ = plr_cadastre_authority
         self.law_status = Config.get_law_status_codes()
+        self._executor_ = None
+        if max_workers is not None and int(max_workers) > 1:
+            self._executor_ = ThreadPoolExecutor(
+                max_workers=int(max_workers),
+                thread_name_prefix='pyramid_oereb_plr'
+            )
 
     @property
     def plr_cadastre_authority(self):
@@ -42,6 +54,51 @@ class ExtractReader(object):
         """
         return self._plr_cadastre_authority_
 
+    def read_plr_sources(self, params, real_estate, bbox):
+        """
+        Reads all PLR sources which are not skipped by the topics parameter. If an executor is configured,
+        the sources are read concurrently. Each worker thread uses its own database session as the sessions
+        of the database adapter are scoped by thread. The sources are read in a copy of the context of the
+        caller, so context variables like the profile of the request are available. The results are always
+        returned in the order of the configured PLR sources, so the outcome is the same as for the serial
+        reading.
+
+        Args:
+            params (pyramid_oereb.views.webservice.Parameter): The parameters of the extract request.
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real
+                estate for which the report should be generated
+            bbox (shapely.geometry.base.BaseGeometry): The bbox to search the records.
+
+        Returns:
+            list of list: The records read by each PLR source, in the order of the PLR sources.
+        """
+        plr_sources = [
+            plr_source for plr_source in self._plr_sources_
+            if not params.skip_topic(plr_source.info.get('code'))
+        ]
+        timing = get_timing()
+        if self._executor_ is None or len(plr_sources) < 2:
+            return [
+                self._read_plr_source(plr_source, params, real_estate, bbox, timing)
+                for plr_source in plr_sources
+            ]
+
+        futures = [
+            self._executor_.submit(
+                copy_context().run, self._read_plr_source, plr_source, params, real_estate, bbox, timing
+            )
+            for plr_source in plr_sources
+        ]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _read_plr_source(plr_source, params, real_estate, bbox, timing):
+        with query_labels(theme_code=plr_source.info.get('code')):
+            if timing is None:
+                return plr_source.read(params, real_estate, bbox)
+            with timing.span('plr_source', plr_source.info.get('code')):
+                return plr_source.read(params, real_estate, bbox)
+
     def read(self, params, real_estate, municipality):
         """
         This method finally creates the extract.
@@ -74,16 +131,16 @@ class ExtractReader(object):
 
         if municipality.published:
 
-            for plr_source in self._plr_sources_:
-                if not params.skip_topic(plr_source.info.get('code')):
-                    records = plr_source.read(params, real_estate, bbox)
-                    for record in records:
-                        if isinstance(record, PlrRecord):
-                            # Copy geometries to avoid shared state across requests if globalized
-                            record.geometries = [
-                                self._copy_geometry(g) for g in record.geometries
-                            ]
-                        real_estate.public_law_restrictions.append(record)
+            with span('plr_sources'):
+                plr_sources_records = self.read_plr_sources(params, real_estate, bbox)
+            for records in plr_sources_records:
+                for record in records:
+                    if isinstance(record, PlrRecord):
+                        # Copy geometries to avoid shared state across requests if globalized
+                        record.geometries = [
+                            self._copy_geometry(g) for g in record.geometries
+                        ]
+                    real_estate.public_law_restrictions.append(record)
 
             for plr in real_estate.public_law_restrictions:
 
@@ -110,9 +167,10 @@ class ExtractReader(object):
         # sort plr according to theme, sub-theme and law-status
         start_time = timer()
         log.debug("sort plrs by theme and law status start")
-        real_estate.public_law_restrictions.sort(key=lambda element: (
-            self._sort_plr_theme(element), self._sort_plr_law_status(element)
-        ))
+        with span('sort'):
+            real_estate.public_law_restrictions.sort(key=lambda element: (
+                self._sort_plr_theme(element), self._sort_plr_law_status(element)
+            ))
         end_time = timer()
         log.debug(f"DONE with sort plrs by theme and law status, time spent: {end_time-start_time} seconds")
 
@@ -127,7 +185,8 @@ class ExtractReader(object):
         confederation_logo = Config.get_conferderation_logo()
         canton_logo = Config.get_canton_logo()
         municipality_logo = Config.get_municipality_logo(municipality.fosnr)
-        qr_code_image = ImageRecord(params.qr_code)
+        # The QR code is only generated if a renderer embeds it
+        qr_code_image = LazyImageRecord(lambda: params.qr_code)
 
         extract = ExtractRecord(
             real_estate,
@@ -203,11 +262,4 @@ class ExtractReader(object):
         Returns:
             pyramid_oereb.core.records.geometry.GeometryRecord: The fresh copy.
         """
-        return geometry_record.__class__(
-            geometry_record.law_status,
-            geometry_record.published_from,
-            geometry_record.published_until,
-            geometry_record.geom,
-            geo_metadata=geometry_record.geo_metadata,
-            public_law_restriction=geometry_record.public_law_restriction
-        )
+        return geometry_record.copy()
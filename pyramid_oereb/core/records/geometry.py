@@ -57,6 +57,7 @@ class GeometryRecord(object):
         self._nr_of_points = None
         self._test_passed = False
         self.calculated = False
+        self._unclipped_geom_ = None
 
     @property
     def published(self):
@@ -92,6 +93,14 @@ class GeometryRecord(object):
         else:
             return -1
 
+    @property
+    def geom_type(self):
+        """
+        Returns:
+            str: The geometry type.
+        """
+        return self.geom.geom_type
+
     @property
     def dim(self):
         """
@@ -130,6 +139,56 @@ class GeometryRecord(object):
         else:
             return result
 
+    @property
+    def clipped(self):
+        """
+        Returns:
+            bool: True if the geometry has been clipped to the bbox of the extract by the source.
+        """
+        return self._unclipped_geom_ is not None
+
+    @property
+    def unclipped_geom(self):
+        """
+        The geometry as it is stored in the source. If the geometry has been clipped, it is loaded on the
+        first access. It contains all parts of the stored geometry this record has been unwrapped from.
+
+        Returns:
+            shapely.geometry.base.BaseGeometry: The unclipped geometry.
+        """
+        if self._unclipped_geom_ is None:
+            return self.geom
+        if callable(self._unclipped_geom_):
+            self._unclipped_geom_ = self._unclipped_geom_()
+        return self._unclipped_geom_
+
+    def set_unclipped_geom(self, unclipped_geom):
+        """
+        Marks the geometry of this record as clipped.
+
+        Args:
+            unclipped_geom (shapely.geometry.base.BaseGeometry or callable): The unclipped geometry or a
+                function without arguments loading it.
+        """
+        self._unclipped_geom_ = unclipped_geom
+
+    def copy(self):
+        """
+        Returns:
+            pyramid_oereb.lib.records.geometry.GeometryRecord: A fresh copy of this record without the
+            results of the calculation.
+        """
+        geometry_record = self.__class__(
+            self.law_status,
+            self.published_from,
+            self.published_until,
+            self.geom,
+            geo_metadata=self.geo_metadata,
+            public_law_restriction=self.public_law_restriction
+        )
+        geometry_record.set_unclipped_geom(self._unclipped_geom_)
+        return geometry_record
+
     def reset_calculation(self):
         self._units = None
         self._area_share = None
@@ -156,9 +215,6 @@ class GeometryRecord(object):
         Returns:
             bool: True if intersection fits the limits.
         """
-        line_types = geometry_types.get('line').get('types')
-        polygon_types = geometry_types.get('polygon').get('types')
-        point_types = geometry_types.get('point').get('types')
         results = {
             'area_share': None,
             'length_share': None,
@@ -181,7 +237,7 @@ class GeometryRecord(object):
                             collection.append(g.intersection(real_estate.limit))
                     intersection = unary_union(collection)
                 except TypeError:
-                    tolerance = tolerances.get('ALL', tolerances.get(self.geom.geom_type))
+                    tolerance = self.get_tolerance(tolerances)
                     if tolerance:
                         intersection = self.geom.intersection(real_estate.limit.buffer(tolerance))
                     else:
@@ -189,49 +245,123 @@ class GeometryRecord(object):
 
             if not intersection.is_empty:
                 result = self._extract_collection(intersection)
-                if self.geom.geom_type not in point_types + line_types + polygon_types:
-                    supported_types = ', '.join(point_types + line_types + polygon_types)
-                    raise AttributeError(
-                        u'The passed geometry is not supported: {type}. It should be one of: {types}'.format(
-                            type=self.geom.geom_type, types=supported_types
-                        )
-                    )
-                elif self.geom.geom_type in point_types:
-                    if result.geom_type == point_types[1]:
-                        # If it is a multipoint make a list and count the number of elements in the list
-                        results['nr_of_points'] = len(list(result.geoms))
-                        results['test_passed'] = True
-                    elif result.geom_type == point_types[0]:
-                        # If it is a single point the number of points is one
-                        results['nr_of_points'] = 1
-                        results['test_passed'] = True
-                elif self.geom.geom_type in line_types and result.geom_type in line_types:
-                    results['units'] = length_unit
-                    length_share = result.length
-                    if length_share >= min_length:
-                        results['length_share'] = length_share
-                        results['test_passed'] = True
-                elif self.geom.geom_type in polygon_types and result.geom_type in polygon_types:
-                    results['units'] = area_unit
-                    area_share = result.area
-                    compensated_area = area_share / real_estate.areas_ratio
-                    if compensated_area >= min_area:
-                        results['area_share'] = compensated_area
-                        results['test_passed'] = True
-                else:
-                    # This intersection result should not be used for the OEREB extract:
-                    # for example, if two polygons are touching each other, the intersection geometry will be
-                    # the point or linestring representing the touching part.
-                    log.debug(
-                        u'Intersection result changed geometry type. '
-                        u'Original geometry was {0} and result is {1}'.format(
-                            self.geom.geom_type,
-                            result.geom_type
-                        )
-                    )
+                results = self.evaluate(
+                    result.geom_type, self.measure(result), real_estate, min_length, min_area, length_unit,
+                    area_unit, geometry_types
+                )
         self.apply_results(results)
         return results['test_passed']
 
+    def get_tolerance(self, tolerances):
+        """
+        Returns the tolerance configured for the geometry type of this record.
+
+        Args:
+            tolerances (dict or None): The tolerances by geometry type or for 'ALL' types.
+
+        Returns:
+            float or None: The tolerance or None if the limit of the real estate is used as it is.
+        """
+        if tolerances is None:
+            return None
+        return tolerances.get('ALL', tolerances.get(self.geom.geom_type)) or None
+
+    @staticmethod
+    def measure(result):
+        """
+        Returns the number of points, the length or the area of an intersection result depending on its
+        topological dimension.
+
+        Args:
+            result (shapely.geometry.base.BaseGeometry): The intersection result.
+
+        Returns:
+            float or int or None: The measure or None for geometry collections.
+        """
+        if isinstance(result, MultiPoint):
+            return len(list(result.geoms))
+        dim = GeometryRecord.geom_dim(result)
+        if dim == 0:
+            return 1
+        if dim == 1:
+            return result.length
+        if dim == 2:
+            return result.area
+        return None
+
+    def evaluate(self, result_type, measure, real_estate, min_length, min_area, length_unit, area_unit,
+                 geometry_types):
+        """
+        Evaluates the non empty intersection of this geometry and the real estate against the limits.
+
+        Args:
+            result_type (str): The geometry type of the intersection after the geometries of the same
+                topological dimension have been extracted from collections.
+            measure (float or int or None): The number of points, length or area of the intersection, see
+                :meth:`measure`.
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+            min_length (float): The threshold to consider or not a line element.
+            min_area (float): The threshold to consider or not a surface element.
+            length_unit (unicode): The thresholds unit for area calculation.
+            area_unit (unicode): The thresholds unit for area calculation.
+            geometry_types (dict): The allowed geometry types for the to match the simple feature
+                types point, line, polygon
+
+        Returns:
+            dict: The results to be applied with :meth:`apply_results`.
+        """
+        line_types = geometry_types.get('line').get('types')
+        polygon_types = geometry_types.get('polygon').get('types')
+        point_types = geometry_types.get('point').get('types')
+        results = {
+            'area_share': None,
+            'length_share': None,
+            'nr_of_points': None,
+            'units': None,
+            'test_passed': False
+        }
+        if self.geom_type not in point_types + line_types + polygon_types:
+            supported_types = ', '.join(point_types + line_types + polygon_types)
+            raise AttributeError(
+                u'The passed geometry is not supported: {type}. It should be one of: {types}'.format(
+                    type=self.geom_type, types=supported_types
+                )
+            )
+        elif self.geom_type in point_types:
+            if result_type == point_types[1]:
+                # If it is a multipoint the number of points is the number of its elements
+                results['nr_of_points'] = measure
+                results['test_passed'] = True
+            elif result_type == point_types[0]:
+                # If it is a single point the number of points is one
+                results['nr_of_points'] = 1
+                results['test_passed'] = True
+        elif self.geom_type in line_types and result_type in line_types:
+            results['units'] = length_unit
+            length_share = measure
+            if length_share >= min_length:
+                results['length_share'] = length_share
+                results['test_passed'] = True
+        elif self.geom_type in polygon_types and result_type in polygon_types:
+            results['units'] = area_unit
+            area_share = measure
+            compensated_area = area_share / real_estate.areas_ratio
+            if compensated_area >= min_area:
+                results['area_share'] = compensated_area
+                results['test_passed'] = True
+        else:
+            # This intersection result should not be used for the OEREB extract:
+            # for example, if two polygons are touching each other, the intersection geometry will be
+            # the point or linestring representing the touching part.
+            log.debug(
+                u'Intersection result changed geometry type. '
+                u'Original geometry was {0} and result is {1}'.format(
+                    self.geom_type,
+                    result_type
+                )
+            )
+        return results
+
     def apply_results(self, results):
         self._area_share = results.get('area_share')
         self._length_share = results.get('length_share')
@@ -269,3 +399,113 @@ class GeometryRecord(object):
         if not self.calculated:
             log.warning(u'There was an access on property "nr_of_points" before calculation was done.')
         return self._nr_of_points
+
+
+class MeasuredGeometryRecord(GeometryRecord):
+    """
+    Geometry record whose intersection with the real estate has already been measured, e.g. by the
+    database. It does not contain the geometry itself.
+
+    Attributes:
+        law_status (pyramid_oereb.lib.records.law_status.LawStatusRecord): The law status of this record.
+        published_from (datetime.date): Date from/since when the PLR record is published.
+        published_until (datetime.date): Date until the PLR record is published.
+        geom (None): Always None, the geometry is not read.
+        geo_metadata (uri): The metadata.
+        public_law_restriction (pyramid_oereb.lib.records.plr.PlrRecord): The public law restriction
+        calculated (boole): True if there was an access on property before calculation was done.
+    """
+    def __init__(
+            self, law_status, published_from, published_until, geom_type, result_type, measure,
+            geo_metadata=None, public_law_restriction=None):
+        """
+        Args:
+            law_status (pyramid_oereb.lib.records.law_status.LawStatusRecord): The law status of this record.
+            published_from (datetime.date): Date from/since when the PLR record is published.
+            published_until (datetime.date): Date until the PLR record is published.
+            geom_type (str): The type of the geometry, one of Point, LineString or Polygon.
+            result_type (str or None): The geometry type of the intersection with the geometries of the same
+                topological dimension extracted from collections. None if they are empty.
+            measure (float or int or None): The number of points, the length or the area of the
+                intersection, see :meth:`pyramid_oereb.core.records.geometry.GeometryRecord.measure`.
+            geo_metadata (uri): The metadata.
+            public_law_restriction (pyramid_oereb.lib.records.plr.PlrRecord): The public law
+                restriction
+        """
+        self.law_status = law_status
+        self.published_from = published_from
+        self.published_until = published_until
+        self.geo_metadata = geo_metadata
+        self.geom = None
+        self._geom_type_ = geom_type
+        self.result_type = result_type
+        self.intersection_measure = measure
+        self.public_law_restriction = public_law_restriction
+        self._unclipped_geom_ = None
+        self.reset_calculation()
+
+    @property
+    def geom_type(self):
+        """
+        Returns:
+            str: The geometry type.
+        """
+        return self._geom_type_
+
+    @property
+    def dim(self):
+        """
+        Returns:
+            int: The topological dimension.
+        """
+        return {'Point': 0, 'LineString': 1, 'Polygon': 2}.get(self._geom_type_, -1)
+
+    def copy(self):
+        """
+        Returns:
+            pyramid_oereb.lib.records.geometry.MeasuredGeometryRecord: A fresh copy of this record without
+            the results of the calculation.
+        """
+        return self.__class__(
+            self.law_status,
+            self.published_from,
+            self.published_until,
+            self._geom_type_,
+            self.result_type,
+            self.intersection_measure,
+            geo_metadata=self.geo_metadata,
+            public_law_restriction=self.public_law_restriction
+        )
+
+    def calculate(self, real_estate, min_length, min_area, length_unit, area_unit, geometry_types,
+                  tolerances=None):
+        """
+        Evaluates the measured intersection against the limits. The tolerances have to be applied when
+        measuring.
+
+        Args:
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+            min_length (float): The threshold to consider or not a line element.
+            min_area (float): The threshold to consider or not a surface element.
+            length_unit (unicode): The thresholds unit for area calculation.
+            area_unit (unicode): The thresholds unit for area calculation.
+            geometry_types (dict): The allowed geometry types for the to match the simple feature
+                types point, line, polygon
+
+        Returns:
+            bool: True if intersection fits the limits.
+        """
+        results = {
+            'area_share': None,
+            'length_share': None,
+            'nr_of_points': None,
+            'units': None,
+            'test_passed': False
+        }
+        if self.published and self.result_type is not None:
+            results = self.evaluate(
+                self.result_type, self.intersection_measure, real_estate, min_length, min_area, length_unit,
+                area_unit, geometry_types
+            )
+        self.apply_results(results)
+        return results['test_passed']
@@ -144,3 +144,83 @@ class ImageRecord(object):
             str: The file's mime type.
         """
         return ImageRecord.get_extension(bytearray(self.content))
+
+
+class ImmutableImageRecord(ImageRecord):
+
+    def __init__(self, content):
+        """
+        An image record which can not be changed after its creation. It is meant to be shared between
+        several records and requests, e.g. by the
+        :ref:`api-pyramid_oereb-core-sources-symbol_cache-symbolcache`. The file type is detected once on
+        creation.
+
+        Args:
+            content (binary): The binary information of this image as binary string.
+        """
+        content = bytes(content)
+        try:
+            file_type = ImageRecord._validate_filetype(bytearray(content))
+            error = None
+        except TypeError as e:
+            # Raise the error on access like the mutable record does
+            file_type = None
+            error = e
+        object.__setattr__(self, 'content', content)
+        object.__setattr__(self, '_file_type_', file_type)
+        object.__setattr__(self, '_file_type_error_', error)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('{0} is immutable'.format(self.__class__.__name__))
+
+    def __delattr__(self, key):
+        raise AttributeError('{0} is immutable'.format(self.__class__.__name__))
+
+    def _get_file_type(self):
+        if self._file_type_error_ is not None:
+            raise self._file_type_error_
+        return self._file_type_
+
+    @property
+    def mimetype(self):
+        """
+        Returns:
+            str: The file's mime type.
+        """
+        return self._get_file_type()[1]
+
+    @property
+    def extension(self):
+        """
+        Returns:
+            str: The file's extension.
+        """
+        return self._get_file_type()[0]
+
+
+class LazyImageRecord(ImageRecord):
+
+    def __init__(self, create_content):
+        """
+        An image record whose content is only created on first access, e.g. the QR code of an extract
+        which is not embedded by every format.
+
+        Args:
+            create_content (callable): The function returning the binary information of this image.
+        """
+        self._create_content_ = create_content
+        self._content_ = None
+
+    @property
+    def content(self):
+        """
+        Returns:
+            binary: The binary information of this image, created on first access.
+        """
+        if self._content_ is None:
+            self._content_ = self._create_content_()
+        return self._content_
+
+    @content.setter
+    def content(self, content):
+        self._content_ = content
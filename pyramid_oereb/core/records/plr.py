@@ -243,6 +243,18 @@ class PlrRecord(EmptyPlrRecord):
             ):
                 tested_geometries.append(geometry)
                 inside = True
+        self.apply_calculation(real_estate, tested_geometries)
+        return inside
+
+    def apply_calculation(self, real_estate, tested_geometries):
+        """
+        Keeps the geometries which passed the calculation and sums up their shares.
+
+        Args:
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+            tested_geometries (list of pyramid_oereb.lib.records.geometry.GeometryRecord): The calculated
+                geometries which passed the test.
+        """
         self.geometries = tested_geometries
 
         # Points
@@ -265,7 +277,6 @@ class PlrRecord(EmptyPlrRecord):
                 ((float(self._area_share) / float(real_estate.land_registry_area)) * 100),
                 1
             )
-        return inside
 
     def __str__(self):
         legend_text = dict()
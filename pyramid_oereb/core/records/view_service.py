@@ -223,21 +223,21 @@ class ViewServiceRecord(object):
 
         return self.reference_wms
 
-    def download_wms_content(self, language):
+    def get_download_url(self, language):
         """
-        Downloads the image found behind the URL stored in the instance attribute "reference_wms"
-        for the requested language
+        Returns the URL stored in the instance attribute "reference_wms" for the requested language which is
+        used to download the image.
 
         Args:
             language (string): the language for which the image should be downloaded
 
+        Returns:
+            tuple of str: The language the URL was found for (the default language if the requested one is
+            not available) and the URL.
+
         Raises:
-            LookupError: Raised if the response is not code 200 or content-type
-                doesn't contains type "image".
             AttributeError: Raised if the URL itself isn't valid at all.
         """
-        main_msg = "Image for WMS couldn't be retrieved."
-
         if language not in self.reference_wms:
             msg = f"No WMS reference found for the requested language ({language}), using default language"
             log.info(msg)
@@ -245,29 +245,66 @@ class ViewServiceRecord(object):
 
         wms = self.reference_wms.get(language)
 
-        if uri_validator(wms):
-            log.debug(f"Downloading image, url: {wms}")
-            try:
-                response = requests.get(wms, proxies=self.proxies, verify=self.verify_certificate)
-            except Exception as ex:
-                dedicated_msg = f"An image could not be downloaded. URL was: {wms}, error was {ex}"
-                log.error(dedicated_msg)
-                raise LookupError(dedicated_msg)
-
-            content_type = response.headers.get('content-type', '')
-            if response.status_code == 200 and content_type.find('image') > -1:
-                self.image[language] = ImageRecord(response.content)
-            else:
-                dedicated_msg = f"The image could not be downloaded. URL was: {wms}, " \
-                    f"Response was {response.content.decode('utf-8')}"
-                log.error(main_msg)
-                log.error(dedicated_msg)
-                raise LookupError(dedicated_msg)
-        else:
+        if not uri_validator(wms):
             dedicated_msg = f"URL seems to be not valid. URL was: {wms}"
-            log.error(main_msg)
+            log.error("Image for WMS couldn't be retrieved.")
             log.error(dedicated_msg)
             raise AttributeError(dedicated_msg)
+        return language, wms
+
+    def set_wms_content(self, language, wms, response):
+        """
+        Stores the image of a response to a request of the WMS URL for the passed language.
+
+        Args:
+            language (string): the language the image was downloaded for
+            wms (str): The URL the image was downloaded from.
+            response (requests.Response): The response of the WMS.
+
+        Raises:
+            LookupError: Raised if the response is not code 200 or content-type
+                doesn't contains type "image".
+        """
+        content_type = response.headers.get('content-type', '')
+        if response.status_code == 200 and content_type.find('image') > -1:
+            self.image[language] = ImageRecord(response.content)
+        else:
+            dedicated_msg = f"The image could not be downloaded. URL was: {wms}, " \
+                f"Response was {response.content.decode('utf-8')}"
+            log.error("Image for WMS couldn't be retrieved.")
+            log.error(dedicated_msg)
+            raise LookupError(dedicated_msg)
+
+    def download_wms_content(self, language, session=None, timeout=None):
+        """
+        Downloads the image found behind the URL stored in the instance attribute "reference_wms"
+        for the requested language
+
+        Args:
+            language (string): the language for which the image should be downloaded
+            session (requests.Session or None): The session used for the request. If None, a new connection
+                is opened.
+            timeout (float or tuple of float or None): The timeout of the request in seconds.
+
+        Raises:
+            LookupError: Raised if the response is not code 200 or content-type
+                doesn't contains type "image".
+            AttributeError: Raised if the URL itself isn't valid at all.
+        """
+        language, wms = self.get_download_url(language)
+        log.debug(f"Downloading image, url: {wms}")
+        try:
+            response = (session or requests).get(
+                wms,
+                proxies=self.proxies,
+                verify=self.verify_certificate,
+                timeout=timeout
+            )
+        except Exception as ex:
+            dedicated_msg = f"An image could not be downloaded. URL was: {wms}, error was {ex}"
+            log.error(dedicated_msg)
+            raise LookupError(dedicated_msg)
+        self.set_wms_content(language, wms, response)
 
     def calculate_ns(self):
         self.min, self.max = self.get_bbox_from_url(self.reference_wms[list(self.reference_wms.keys())[0]])
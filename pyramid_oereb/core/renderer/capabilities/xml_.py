@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
-from mako.lookup import TemplateLookup
 from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.templates import template_registry
 from mako import exceptions
 
 
@@ -40,12 +40,7 @@ class Renderer(Base):
         if isinstance(response, Response) and response.content_type == response.default_content_type:
             response.content_type = 'application/xml'
 
-        templates = TemplateLookup(
-            directories=self.template_dirs,
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('capabilities.xml')
+        template = template_registry.get_template(self.template_dirs, 'capabilities.xml')
         try:
             content = template.render(**{
                 'data': value,
@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
 
-from json import dumps
-
 from pyramid.request import Request
 from pyramid.response import Response
 from pyramid.testing import DummyRequest
@@ -14,6 +12,7 @@ from pyramid_oereb.core.records.theme import ThemeRecord
 from pyramid_oereb.core.sources.plr import PlrRecord
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.serializer import get_json_serializer
 from pyramid_oereb.core.views.webservice import Parameter
 
 log = logging.getLogger(__name__)
@@ -28,6 +27,7 @@ class Renderer(Base):
             info (pyramid.interfaces.IRendererInfo): Info object.
         """
         super(Renderer, self).__init__(info)
+        self._serializer_ = get_json_serializer(Config.get_json_serializer())
 
     def __call__(self, value, system):
         """
@@ -39,7 +39,7 @@ class Renderer(Base):
             system (dict): The available system properties.
 
         Returns:
-            str: The JSON encoded extract.
+            bytes: The JSON encoded extract.
         """
         log.debug("__call__() start")
         self._request = self.get_request(system)
@@ -57,8 +57,9 @@ class Renderer(Base):
             }
         }
         log.debug("__call__() done.")
-        log.debug(result)
-        return dumps(result)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(result)
+        return self._serializer_.dumps(result)
 
     def _render(self, extract, param):
         """
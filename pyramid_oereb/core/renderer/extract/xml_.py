@@ -1,20 +1,113 @@
 # -*- coding: utf-8 -*-
+import copy
 import logging
+import queue
+import threading
+from contextvars import copy_context
 
 from pyramid.httpexceptions import HTTPInternalServerError
-from mako.lookup import TemplateLookup
 from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.templates import template_registry
 from mako import exceptions
+from mako.runtime import Context
 
+from pyramid_oereb.core.config import Config
 from pyramid_oereb.core.views.webservice import Parameter
 
 log = logging.getLogger(__name__)
 
 
+class _StreamCancelled(Exception):
+    pass
+
+
+class StreamBuffer(object):
+
+    def __init__(self, chunks, chunk_size, encoding='utf-8', errors='strict'):
+        """
+        A buffer for the Mako context which passes the rendered output encoded in chunks of about the passed
+        size to a queue.
+
+        Args:
+            chunks (queue.Queue): The queue the chunks are put into.
+            chunk_size (int): The number of characters collected before a chunk is passed.
+            encoding (str): The output encoding.
+            errors (str): The error handling of the encoding.
+        """
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.errors = errors
+        self.cancelled = threading.Event()
+        self._parts_ = []
+        self._size_ = 0
+
+    def write(self, text):
+        self._parts_.append(text)
+        self._size_ += len(text)
+        if self._size_ >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts_:
+            self.put(''.join(self._parts_).encode(self.encoding, self.errors))
+            self._parts_ = []
+            self._size_ = 0
+
+    def put(self, item):
+        while True:
+            if self.cancelled.is_set():
+                raise _StreamCancelled()
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+class StreamIterator(object):
+
+    def __init__(self, chunks, buffer):
+        """
+        The iterable returned as app_iter of a streamed response. Closing it, as the WSGI server does when
+        the client disconnects, stops the rendering thread.
+
+        Args:
+            chunks (generator of bytes): The chunks of the rendered output.
+            buffer (StreamBuffer): The buffer of the rendering.
+        """
+        self.buffer = buffer
+        self._chunks_ = chunks
+        self._pending_ = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pending_:
+            return self._pending_.pop()
+        return next(self._chunks_)
+
+    def start(self):
+        """
+        Waits for the first chunk, so errors raised before it can still be handled by the caller.
+
+        Returns:
+            StreamIterator: The iterator itself.
+        """
+        self._pending_.append(next(self._chunks_))
+        return self
+
+    def close(self):
+        self._pending_ = []
+        self.buffer.cancelled.set()
+        self._chunks_.close()
+
+
 class Renderer(Base):
 
     def __init__(self, info):
@@ -58,6 +151,11 @@ class Renderer(Base):
 
         extract = value[0]
         try:
+            if Config.get_extract_xml_streaming():
+                # Work on a copy, the rendering continues after this call returned
+                chunks = copy.copy(self)._render_stream(extract, self._params_)
+                # Errors before the first chunk are still handled here
+                return chunks.start()
             content = self._render(extract, self._params_)
             return content
         except ValueError as e:
@@ -67,14 +165,8 @@ class Renderer(Base):
             response.content_type = 'text/html'
             return exceptions.html_error_template().render()
 
-    def _render(self, extract, params):
-        templates = TemplateLookup(
-            directories=[self.template_dir],
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('extract.xml')
-        content = template.render(**{
+    def _get_template_params(self, extract, params):
+        return {
             'extract': extract,
             'params': params,
             'sort_by_localized_text': self.sort_by_localized_text,
@@ -86,5 +178,64 @@ class Renderer(Base):
             'get_logo_ref': self.get_logo_ref,
             'get_qr_code_ref': self.get_qr_code_ref,
             'date_format': '%Y-%m-%dT%H:%M:%S'
-        })
+        }
+
+    def _render(self, extract, params):
+        template = template_registry.get_template([self.template_dir], 'extract.xml')
+        content = template.render(**self._get_template_params(extract, params))
         return content
+
+    def _render_stream(self, extract, params, chunk_size=65536, max_chunks=16):
+        """
+        Renders the extract in a separate thread and yields the output in chunks as soon as they are
+        available. The concatenated chunks are identical to the output of the non-streaming rendering.
+
+        Args:
+            extract (pyramid_oereb.core.records.extract.ExtractRecord): The extract to render.
+            params (pyramid_oereb.core.views.webservice.Parameter): The parameters of the request.
+            chunk_size (int): The approximate size of a chunk in characters.
+            max_chunks (int): The maximum number of rendered chunks waiting to be sent.
+
+        Returns:
+            StreamIterator: The chunks of the XML extract.
+        """
+        template = template_registry.get_template([self.template_dir], 'extract.xml')
+        chunks = queue.Queue(maxsize=max_chunks)
+        buffer = StreamBuffer(chunks, chunk_size, template.output_encoding, template.encoding_errors)
+        end = object()
+
+        def produce():
+            try:
+                context = Context(buffer, **self._get_template_params(extract, params))
+                context._outputting_as_unicode = False
+                template.render_context(context)
+                buffer.flush()
+                buffer.put(end)
+            except _StreamCancelled:
+                log.debug('Rendering of the XML extract was cancelled')
+            except Exception as e:
+                log.error('The extract can not be rendered. Error is {0}'.format(e))
+                try:
+                    buffer.put(e)
+                except _StreamCancelled:
+                    pass
+
+        # The context keeps the configuration data pinned to the request
+        thread = threading.Thread(
+            target=copy_context().run, args=(produce,), name='pyramid_oereb_xml_stream', daemon=True
+        )
+        thread.start()
+
+        def consume():
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is end:
+                        return
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield chunk
+            finally:
+                buffer.cancelled.set()
+
+        return StreamIterator(consume(), buffer)
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
-from mako.lookup import TemplateLookup
 from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.templates import template_registry
 from pyramid_oereb.core.views.webservice import Parameter
 from mako import exceptions
 
@@ -49,12 +49,7 @@ class Renderer(Base):
                 self._params_.__class__
             ))
 
-        templates = TemplateLookup(
-            directories=self.template_dirs,
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('getegrid.xml')
+        template = template_registry.get_template(self.template_dirs, 'getegrid.xml')
         try:
             content = template.render(**{
                 'data': value[0],
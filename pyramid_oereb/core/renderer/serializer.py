@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the JSON serializers used by the JSON extract renderer. Faster third party libraries
+are used if they are installed, otherwise the serialization falls back to the json module of the standard
+library.
+
+All serializers write the same compact JSON document: non-ASCII characters are not escaped, keys which are not
+strings are converted like the json module does and NaN or infinite floats, which are not valid JSON, are
+written as null.
+"""
+import json
+import logging
+import math
+
+from pyramid.path import DottedNameResolver
+
+log = logging.getLogger(__name__)
+
+
+def normalize_floats(value):
+    """
+    Replaces the NaN and infinite floats in the passed value by None.
+
+    Args:
+        value (dict or list or object): The value to normalize.
+
+    Returns:
+        dict or list or object: The normalized copy of the value.
+    """
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: normalize_floats(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_floats(item) for item in value]
+    return value
+
+
+class JsonSerializer(object):
+    """
+    The serializer based on the json module of the standard library.
+
+    Attributes:
+        name (str): The name of the serializer as used in the configuration.
+    """
+
+    name = 'json'
+
+    @staticmethod
+    def available():
+        """
+        Returns:
+            bool: True if the library of the serializer is installed.
+        """
+        return True
+
+    def dumps(self, value):
+        """
+        Serializes the passed value.
+
+        Args:
+            value (dict or list): The value to serialize.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON document.
+        """
+        try:
+            return self._dumps(value)
+        except (ValueError, OverflowError):
+            # the value contains NaN or infinite floats, only then the whole value is copied
+            return self._dumps(normalize_floats(value))
+
+    def _dumps(self, value):
+        return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonSerializer(JsonSerializer):
+    """
+    The serializer based on the orjson library.
+    """
+
+    name = 'orjson'
+
+    @staticmethod
+    def available():
+        try:
+            import orjson  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self):
+        import orjson
+        self._dumps_ = orjson.dumps
+        self._option_ = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value):
+        # orjson already writes NaN and infinite floats as null
+        return self._dumps_(value, option=self._option_)
+
+
+class UjsonSerializer(JsonSerializer):
+    """
+    The serializer based on the ujson library.
+    """
+
+    name = 'ujson'
+
+    @staticmethod
+    def available():
+        try:
+            import ujson  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self):
+        import ujson
+        self._dumps_ = ujson.dumps
+
+    def _dumps(self, value):
+        return self._dumps_(
+            value, ensure_ascii=False, escape_forward_slashes=False, allow_nan=False
+        ).encode('utf-8')
+
+
+SERIALIZERS = [OrjsonSerializer, UjsonSerializer, JsonSerializer]
+"""
+The built-in serializers in the order they are preferred.
+"""
+
+
+def get_json_serializer(name=None):
+    """
+    Returns the JSON serializer for the passed name.
+
+    Args:
+        name (str or None): The name of a built-in serializer (orjson, ujson or json), the dotted name of a
+            custom serializer class or None (or auto) to use the fastest installed serializer.
+
+    Returns:
+        pyramid_oereb.core.renderer.serializer.JsonSerializer: The serializer.
+    """
+    if name is None or name == 'auto':
+        for serializer_class in SERIALIZERS:
+            if serializer_class.available():
+                return serializer_class()
+    for serializer_class in SERIALIZERS:
+        if serializer_class.name == name:
+            if serializer_class.available():
+                return serializer_class()
+            log.warning('JSON serializer {0} is not installed, using the default one'.format(name))
+            return get_json_serializer()
+    serializer_class = DottedNameResolver().maybe_resolve(name)
+    return serializer_class()
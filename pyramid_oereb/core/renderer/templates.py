@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides a process wide registry of the compiled Mako templates used by the XML renderers and
+the SLD hook method. The templates are compiled only once per process. With a module directory the
+compiled templates are also written to disk, so further processes (e.g. gunicorn workers) start warm.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from mako.lookup import TemplateLookup
+from pyramid.path import AssetResolver
+
+log = logging.getLogger(__name__)
+
+
+EXTRACT_TEMPLATES = 'core/renderer/extract/templates/xml'
+"""
+The asset path of the templates of the XML extract.
+"""
+
+DEFAULT_TEMPLATES = [
+    ([EXTRACT_TEMPLATES], 'extract.xml'),
+    (['core/renderer/getegrid/templates/xml', EXTRACT_TEMPLATES], 'getegrid.xml'),
+    (['core/renderer/versions/templates/xml'], 'versions.xml'),
+    (['core/renderer/capabilities/templates/xml', EXTRACT_TEMPLATES], 'capabilities.xml'),
+    (['core/views/templates'], 'sld.xml')
+]
+"""
+The templates shipped with pyramid_oereb as asset paths of the lookup directories and the template name.
+"""
+
+
+def resolve_template_dirs(asset_paths):
+    """
+    Resolves asset paths of the pyramid_oereb package to absolute directories.
+
+    Args:
+        asset_paths (list of str): The asset paths relative to the pyramid_oereb package.
+
+    Returns:
+        list of str: The absolute directories.
+    """
+    resolver = AssetResolver('pyramid_oereb')
+    return [resolver.resolve(asset_path).abspath() for asset_path in asset_paths]
+
+
+class TemplateRegistry(object):
+
+    def __init__(self, module_directory=None, filesystem_checks=True):
+        """
+        The registry holding one template lookup per combination of template directories. The lookups keep
+        the compiled templates in memory.
+
+        Args:
+            module_directory (str or None): The directory the compiled templates are written to. If None,
+                the templates are compiled in memory only.
+            filesystem_checks (bool): Switch whether the templates should be checked for modifications on
+                each access.
+        """
+        self._lookups_ = dict()
+        self._lock_ = threading.Lock()
+        self.configure(module_directory, filesystem_checks)
+
+    def configure(self, module_directory=None, filesystem_checks=True):
+        """
+        Sets the options of the registry and drops all lookups created so far.
+
+        Args:
+            module_directory (str or None): The directory the compiled templates are written to. If None,
+                the templates are compiled in memory only.
+            filesystem_checks (bool): Switch whether the templates should be checked for modifications on
+                each access.
+        """
+        with self._lock_:
+            self.module_directory = module_directory
+            self.filesystem_checks = filesystem_checks
+            self._lookups_.clear()
+
+    def get_lookup(self, directories):
+        """
+        Returns the shared lookup for the passed template directories.
+
+        Args:
+            directories (list of str): The absolute template directories in the order of their priority.
+
+        Returns:
+            mako.lookup.TemplateLookup: The lookup.
+        """
+        key = tuple(directories)
+        lookup = self._lookups_.get(key)
+        if lookup is None:
+            with self._lock_:
+                lookup = self._lookups_.get(key)
+                if lookup is None:
+                    module_directory = None
+                    if self.module_directory:
+                        # Templates with the same name in different directories must not share their modules
+                        module_directory = os.path.join(
+                            self.module_directory,
+                            hashlib.sha1(os.pathsep.join(key).encode('utf-8')).hexdigest()[:16]
+                        )
+                    lookup = TemplateLookup(
+                        directories=list(key),
+                        module_directory=module_directory,
+                        filesystem_checks=self.filesystem_checks,
+                        output_encoding='utf-8',
+                        input_encoding='utf-8'
+                    )
+                    self._lookups_[key] = lookup
+        return lookup
+
+    def get_template(self, directories, name):
+        """
+        Returns the compiled template.
+
+        Args:
+            directories (list of str): The absolute template directories in the order of their priority.
+            name (str): The name of the template.
+
+        Returns:
+            mako.template.Template: The compiled template.
+        """
+        return self.get_lookup(directories).get_template(name)
+
+    def preload(self, templates=None):
+        """
+        Compiles the passed templates and all templates of the first of their directories in advance.
+
+        Args:
+            templates (list of tuple or None): The asset paths of the lookup directories and the name of the
+                templates. Defaults to the templates shipped with pyramid_oereb.
+        """
+        for asset_paths, name in templates or DEFAULT_TEMPLATES:
+            directories = resolve_template_dirs(asset_paths)
+            names = [name]
+            for root, _, files in os.walk(directories[0]):
+                for file_name in sorted(files):
+                    uri = os.path.relpath(os.path.join(root, file_name), directories[0])
+                    names.append(uri.replace(os.sep, '/'))
+            for template_name in names:
+                try:
+                    self.get_template(directories, template_name)
+                except Exception as e:
+                    log.warning('Template {0} could not be preloaded: {1}'.format(template_name, e))
+        log.debug('Preloaded templates of {0} lookups'.format(len(self._lookups_)))
+
+
+template_registry = TemplateRegistry()
+"""
+The registry instance shared by all renderers of the process.
+"""
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
-from mako.lookup import TemplateLookup
 from pyramid.path import AssetResolver
 
 from pyramid.response import Response
 
 from pyramid_oereb.core.renderer import Base
+from pyramid_oereb.core.renderer.templates import template_registry
 from mako import exceptions
 
 
@@ -53,12 +53,7 @@ class Renderer(Base):
         Returns:
             str: The XML encoded versions data.
         """
-        templates = TemplateLookup(
-            directories=[self.template_dir],
-            output_encoding='utf-8',
-            input_encoding='utf-8'
-        )
-        template = templates.get_template('versions.xml')
+        template = template_registry.get_template([self.template_dir], 'versions.xml')
         content = template.render(**{
             'data': value
         })
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from pyramid_oereb import route_prefix
-from pyramid_oereb.core.views.webservice import PlrWebservice, Symbol, Logo, Sld, QRcode
+from pyramid_oereb.core.metrics import get_metrics_collector
+from pyramid_oereb.core.slow_queries import get_slow_query_recorder
+from pyramid_oereb.core.views.webservice import PlrWebservice, Symbol, Logo, Sld, QRcode, Metrics, \
+    SlowQueries
 from pyramid_oereb.contrib.stats.decorators import log_response
 
 
@@ -116,5 +119,19 @@ def includeme(config):  # pragma: no cover
         decorator=log_response
     )
 
+    # Metrics of the application
+    metrics_collector = get_metrics_collector()
+    if metrics_collector is not None:
+        config.add_route('{0}/metrics'.format(route_prefix), metrics_collector.path)
+        config.add_view(Metrics, attr='get_metrics', route_name='{0}/metrics'.format(route_prefix),
+                        request_method='GET')
+
+    # Recent slow queries
+    slow_query_recorder = get_slow_query_recorder()
+    if slow_query_recorder is not None and slow_query_recorder.secret:
+        config.add_route('{0}/slow_queries'.format(route_prefix), slow_query_recorder.path)
+        config.add_view(SlowQueries, attr='get_slow_queries',
+                        route_name='{0}/slow_queries'.format(route_prefix), request_method='GET')
+
     # Commit config
     config.commit()
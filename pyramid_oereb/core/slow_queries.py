@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the recording of slow database queries. The engines of the database adapter are
+instrumented by :func:`instrument_engine`, which only measures the queries if the recording is enabled in
+the configuration.
+
+A query taking longer than the threshold is logged with the labels of the current context, e.g. the theme
+code of the PLR source and the EGRID of the extract (see :func:`query_labels`), and kept in a list of the
+recent slow queries. Optionally the plan of a slow SELECT statement is captured on PostgreSQL by running it
+again with ``EXPLAIN (ANALYZE, BUFFERS)`` in a background thread.
+"""
+import datetime
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+log = logging.getLogger(__name__)
+
+_query_labels = ContextVar('pyramid_oereb_query_labels', default=None)
+_explaining = ContextVar('pyramid_oereb_explaining', default=False)
+_recorder = {}
+_recorder_lock = threading.Lock()
+_null_labels = nullcontext()
+
+
+class SlowQueryRecorder(object):
+
+    def __init__(self, threshold=500, explain=False, max_entries=100, max_pending=10,
+                 parameter_max_length=200, path='/slow_queries', secret=None):
+        """
+        The recorder of the slow queries of the process.
+
+        Args:
+            threshold (float): The duration in milliseconds above which a query is recorded.
+            explain (bool): True to capture the plans of the slow SELECT statements on PostgreSQL.
+            max_entries (int): The number of recent slow queries kept.
+            max_pending (int): The maximum number of plans waiting to be captured. The plans of further
+                slow queries are skipped.
+            parameter_max_length (int): The maximum length of the representation of a bound parameter.
+            path (str): The path of the route of the recent slow queries.
+            secret (str or None): The secret the route needs in the header X-Oereb-Secret. Without
+                secret the route is not added.
+        """
+        self.threshold = threshold
+        self.explain = explain
+        self.max_pending = max_pending
+        self.parameter_max_length = parameter_max_length
+        self.path = path
+        self.secret = secret
+        self._entries_ = deque(maxlen=max_entries)
+        self._pending_ = 0
+        self._executor_ = None
+        self._lock_ = threading.Lock()
+
+    def format_parameters(self, parameters):
+        """
+        Args:
+            parameters (dict or list or tuple or None): The bound parameters of a query.
+
+        Returns:
+            dict or list or None: The representations of the parameters, shortened to the maximum length.
+        """
+        def shorten(value):
+            value = repr(value)
+            if len(value) > self.parameter_max_length:
+                return value[:self.parameter_max_length] + '...'
+            return value
+
+        if isinstance(parameters, dict):
+            return {key: shorten(value) for key, value in parameters.items()}
+        if isinstance(parameters, (list, tuple)):
+            return [shorten(value) for value in parameters]
+        return None
+
+    def observe(self, engine, statement, parameters, executemany, duration):
+        """
+        Records the query if it is slower than the threshold.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine which executed the query.
+            statement (str): The statement sent to the database.
+            parameters (dict or list or tuple or None): The bound parameters.
+            executemany (bool): True if the statement has been executed for a list of parameters.
+            duration (float): The duration in seconds.
+
+        Returns:
+            dict or None: The recorded query or None if it is not slow.
+        """
+        duration = duration * 1000
+        if duration < self.threshold:
+            return None
+        labels = _query_labels.get() or {}
+        entry = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'duration': round(duration, 3),
+            'theme_code': labels.get('theme_code'),
+            'egrid': labels.get('egrid'),
+            'connection': make_url(engine.url).render_as_string(hide_password=True),
+            'statement': statement,
+            'parameters': None if executemany else self.format_parameters(parameters),
+            'plan': None
+        }
+        log.warning('Slow query ({0:.1f} ms, theme {1}, EGRID {2}): {3} {4}'.format(
+            duration, entry['theme_code'], entry['egrid'], statement, entry['parameters']
+        ))
+        if self.explain and not executemany and engine.dialect.name == 'postgresql' and \
+                statement.split(None, 1)[0].upper() in ('SELECT', 'WITH'):
+            self.submit_explain(engine, statement, parameters, entry)
+        with self._lock_:
+            self._entries_.append(entry)
+        return entry
+
+    def submit_explain(self, engine, statement, parameters, entry):
+        """
+        Captures the plan of a slow query in the background unless too many plans are pending.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine which executed the query.
+            statement (str): The statement sent to the database.
+            parameters (dict or tuple or None): The bound parameters.
+            entry (dict): The recorded query, its plan is set when it has been captured.
+        """
+        with self._lock_:
+            if self._pending_ >= self.max_pending:
+                log.debug('Plan of slow query skipped, {0} plans pending.'.format(self._pending_))
+                return
+            self._pending_ += 1
+            if self._executor_ is None:
+                self._executor_ = ThreadPoolExecutor(1, thread_name_prefix='pyramid_oereb_explain')
+        entry['plan'] = 'pending'
+        self._executor_.submit(self.explain_query, engine, statement, parameters, entry)
+
+    def explain_query(self, engine, statement, parameters, entry):
+        """
+        Runs the query with ``EXPLAIN (ANALYZE, BUFFERS)`` in a transaction which is rolled back and stores
+        the plan in the recorded query.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine which executed the query.
+            statement (str): The statement sent to the database.
+            parameters (dict or tuple or None): The bound parameters.
+            entry (dict): The recorded query.
+        """
+        token = _explaining.set(True)
+        try:
+            with engine.connect() as connection:
+                try:
+                    rows = connection.exec_driver_sql(
+                        'EXPLAIN (ANALYZE, BUFFERS) {0}'.format(statement),
+                        parameters if parameters else ()
+                    ).fetchall()
+                finally:
+                    connection.rollback()
+            with self._lock_:
+                entry['plan'] = '\n'.join(row[0] for row in rows)
+            log.warning('Plan of slow query ({0:.1f} ms, theme {1}, EGRID {2}):\n{3}'.format(
+                entry['duration'], entry['theme_code'], entry['egrid'], entry['plan']
+            ))
+        except Exception as e:
+            with self._lock_:
+                entry['plan'] = None
+            log.error('Plan of slow query could not be captured: {0}'.format(e))
+        finally:
+            _explaining.reset(token)
+            with self._lock_:
+                self._pending_ -= 1
+
+    def get_entries(self):
+        """
+        Returns:
+            list of dict: The recent slow queries, the latest first.
+        """
+        with self._lock_:
+            return [dict(entry) for entry in reversed(self._entries_)]
+
+
+@contextmanager
+def _query_labels_context(labels):
+    current = _query_labels.get()
+    token = _query_labels.set(dict(current or {}, **labels))
+    try:
+        yield
+    finally:
+        _query_labels.reset(token)
+
+
+def query_labels(**labels):
+    """
+    Adds labels to the slow queries recorded within the enclosed block if the recording is enabled.
+
+    Args:
+        **labels: The labels, e.g. theme_code or egrid.
+
+    Returns:
+        contextlib.AbstractContextManager: The context setting the labels.
+    """
+    if _recorder.get('recorder') is None:
+        return _null_labels
+    return _query_labels_context(labels)
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    if _recorder.get('recorder') is None or _explaining.get():
+        return
+    connection.info.setdefault('pyramid_oereb_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    recorder = _recorder.get('recorder')
+    starts = connection.info.get('pyramid_oereb_query_start')
+    if recorder is None or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    recorder.observe(connection.engine, statement, parameters, executemany, duration)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    starts = connection.info.get('pyramid_oereb_query_start') if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    """
+    Measures the queries of the engine if the recording is enabled.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine.
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def init_slow_query_recorder(slow_queries_config):
+    """
+    Creates the recorder of the process if the recording is enabled.
+
+    Args:
+        slow_queries_config (dict): The configured slow query settings.
+
+    Returns:
+        SlowQueryRecorder or None: The recorder or None if the recording is not enabled.
+    """
+    with _recorder_lock:
+        recorder = None
+        if slow_queries_config.get('enabled', False):
+            recorder = SlowQueryRecorder(
+                threshold=slow_queries_config.get('threshold', 500),
+                explain=slow_queries_config.get('explain', False),
+                max_entries=slow_queries_config.get('max_entries', 100),
+                max_pending=slow_queries_config.get('max_pending', 10),
+                parameter_max_length=slow_queries_config.get('parameter_max_length', 200),
+                path=slow_queries_config.get('path', '/slow_queries'),
+                secret=slow_queries_config.get('secret')
+            )
+        _recorder['recorder'] = recorder
+        return recorder
+
+
+def get_slow_query_recorder():
+    """
+    Returns:
+        SlowQueryRecorder or None: The recorder of the process or None if the recording is not enabled.
+    """
+    return _recorder.get('recorder')
@@ -6,7 +6,8 @@ import time
 import logging
 from pyramid.config import ConfigurationError
 from pyramid.path import DottedNameResolver
-from sqlalchemy import text
+
+from pyramid_oereb.core.adapter import check_connection
 
 log = logging.getLogger(__name__)
 
@@ -78,9 +79,4 @@ class BaseDatabaseSource(Base):
         return self._adapter_.get_session(self._key_)
 
     def health_check(self):
-        session = self._adapter_.get_session(self._key_)
-        try:
-            session.execute(text('SELECT 1'))
-            return True
-        except Exception:
-            return False
+        return check_connection(self._adapter_.get_session(self._key_))
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides a process wide registry for metadata of the public law restriction sources. The
+metadata are used to decide without querying the geometry table whether a theme contains data at all and
+whether its data can be related to a real estate.
+"""
+import datetime
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL = 600
+"""int: The time to live in seconds of the metadata cached by a source in the combined query mode if no
+other time to live is configured."""
+
+
+class PlrSourceMetadata(object):
+
+    def __init__(self, count, extent=None, last_modified=None):
+        """
+        The metadata of the data of a public law restriction source.
+
+        Args:
+            count (int): The number of geometries of the source.
+            extent (tuple of float or None): The extent (min_x, min_y, max_x, max_y) of all geometries of the
+                source. None if the source contains no geometries.
+            last_modified (datetime.datetime or None): The point in time the data was seen changed for the
+                last time. On the first read this is the time of the read.
+        """
+        self.count = count
+        self.extent = extent
+        self.last_modified = last_modified
+        self.refreshed = None
+
+    @property
+    def has_data(self):
+        """
+        Returns:
+            bool: True if the source contains any geometries.
+        """
+        return self.count > 0
+
+    def intersects(self, bounds, tolerance=0.0):
+        """
+        Checks if the extent of the data intersects the passed bounds.
+
+        Args:
+            bounds (tuple of float): The bounds (min_x, min_y, max_x, max_y) to check.
+            tolerance (float): A distance the bounds are extended with before the check.
+
+        Returns:
+            bool: True if the data extent intersects the bounds. If the extent is not known, True is
+            returned to not skip any data.
+        """
+        if self.extent is None:
+            return self.has_data
+        min_x, min_y, max_x, max_y = bounds
+        return not (
+            self.extent[0] > max_x + tolerance or
+            self.extent[2] < min_x - tolerance or
+            self.extent[1] > max_y + tolerance or
+            self.extent[3] < min_y - tolerance
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, PlrSourceMetadata) and \
+            self.count == other.count and self.extent == other.extent
+
+
+class PlrSourceMetadataRegistry(object):
+
+    def __init__(self):
+        """
+        The registry holding the metadata of all public law restriction sources identified by a key (usually
+        the theme code). The entries are read by a loader passed on access and are refreshed when their time
+        to live is expired or after they were invalidated explicitly.
+        """
+        self._entries_ = dict()
+        self._lock_ = threading.Lock()
+
+    def get(self, key, loader, ttl=None):
+        """
+        Returns the metadata for the passed key. They are read using the loader if there is no entry yet or
+        if the existing entry is older than the time to live.
+
+        Args:
+            key (str): The key of the source.
+            loader (callable): A callable without arguments which returns a fresh
+                :ref:`api-pyramid_oereb-core-sources-plr_metadata-plrsourcemetadata`.
+            ttl (int or float or None): The time to live of the entry in seconds. If None, the entry is kept
+                until it is invalidated.
+
+        Returns:
+            pyramid_oereb.core.sources.plr_metadata.PlrSourceMetadata: The metadata of the source.
+        """
+        entry = self._entries_.get(key)
+        if entry is not None and not self._expired(entry, ttl):
+            return entry
+        with self._lock_:
+            entry = self._entries_.get(key)
+            if entry is None or self._expired(entry, ttl):
+                entry = self._refresh(key, entry, loader)
+        return entry
+
+    def invalidate(self, key=None):
+        """
+        Removes the entry of the passed key or all entries, so they are read again on the next access.
+
+        Args:
+            key (str or None): The key of the source. If None, all entries are removed.
+        """
+        with self._lock_:
+            if key is None:
+                self._entries_.clear()
+            else:
+                self._entries_.pop(key, None)
+
+    def keys(self):
+        """
+        Returns:
+            list of str: The keys of all registered sources.
+        """
+        return list(self._entries_.keys())
+
+    @staticmethod
+    def _expired(entry, ttl):
+        return ttl is not None and time.monotonic() - entry.refreshed > ttl
+
+    def _refresh(self, key, previous, loader):
+        metadata = loader()
+        metadata.refreshed = time.monotonic()
+        if previous is not None and previous == metadata:
+            metadata.last_modified = previous.last_modified
+        else:
+            metadata.last_modified = datetime.datetime.now()
+        log.debug('Refreshed metadata of {0}: {1} geometries, extent {2}'.format(
+            key, metadata.count, metadata.extent
+        ))
+        self._entries_[key] = metadata
+        return metadata
+
+
+plr_source_metadata = PlrSourceMetadataRegistry()
+"""
+The registry instance shared by all public law restriction sources of the process.
+"""
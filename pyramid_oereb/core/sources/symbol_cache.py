@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides a process wide cache of the decoded legend entry symbols. The symbols of the public law
+restriction sources are stored base64 encoded or binary in the database and would otherwise be decoded for
+every legend entry of every extract.
+"""
+import binascii
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from pyramid_oereb.core import b64
+from pyramid_oereb.core.records.image import ImmutableImageRecord
+
+log = logging.getLogger(__name__)
+
+
+def decode_symbol(symbol):
+    """
+    Decodes a symbol as it is stored in the database.
+
+    Args:
+        symbol (str or bytes): The base64 encoded symbol or its binary content.
+
+    Returns:
+        bytes: The binary content of the symbol.
+
+    Raises:
+        TypeError: Raised if the symbol is neither str nor bytes.
+    """
+    if isinstance(symbol, str):
+        return b64.decode(symbol)
+    elif isinstance(symbol, (bytes, bytearray, memoryview)):
+        return b64.decode(binascii.b2a_base64(symbol).decode('ascii'))
+    raise TypeError('Symbol was not str nor bytes type but {0}'.format(type(symbol)))
+
+
+class SymbolCache(object):
+
+    def __init__(self, maxsize=1024):
+        """
+        A bounded least recently used cache of the symbols of the legend entries. The entries are identified
+        by the theme code and the identifier of the legend entry and are validated with a hash of the symbol
+        as it is stored in the database, so a changed symbol replaces the cached one.
+
+        Args:
+            maxsize (int): The maximum number of cached symbols.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries_ = OrderedDict()
+        self._lock_ = threading.Lock()
+
+    @staticmethod
+    def _key(theme_code, identifier):
+        return theme_code, str(identifier)
+
+    @staticmethod
+    def _digest(symbol):
+        if isinstance(symbol, str):
+            symbol = symbol.encode('ascii')
+        return hashlib.sha1(symbol).digest()
+
+    def get(self, theme_code, identifier, symbol):
+        """
+        Returns the image record of the passed symbol. It is decoded only if it is not cached yet or if it
+        has changed since it was cached.
+
+        Args:
+            theme_code (str): The code of the theme the legend entry belongs to.
+            identifier (int or str): The identifier of the legend entry.
+            symbol (str or bytes): The symbol as it is stored in the database.
+
+        Returns:
+            pyramid_oereb.core.records.image.ImmutableImageRecord: The shared image record of the symbol.
+        """
+        key = self._key(theme_code, identifier)
+        digest = self._digest(symbol)
+        with self._lock_:
+            entry = self._entries_.get(key)
+            if entry is not None and entry[0] == digest:
+                self._entries_.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        record = ImmutableImageRecord(decode_symbol(symbol))
+        self._put(key, digest, record)
+        return record
+
+    def find(self, theme_code, identifier):
+        """
+        Returns the cached image record of a legend entry without validating it against the database.
+
+        Args:
+            theme_code (str): The code of the theme the legend entry belongs to.
+            identifier (int or str): The identifier of the legend entry.
+
+        Returns:
+            pyramid_oereb.core.records.image.ImmutableImageRecord or None: The cached image record or None
+            if the symbol is not cached.
+        """
+        key = self._key(theme_code, identifier)
+        with self._lock_:
+            entry = self._entries_.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries_.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def clear(self):
+        """
+        Removes all cached symbols and resets the counters.
+        """
+        with self._lock_:
+            self._entries_.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Returns:
+            dict: The hits, misses, current size and maximum size of the cache.
+        """
+        with self._lock_:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries_),
+                'maxsize': self.maxsize
+            }
+
+    def _put(self, key, digest, record):
+        with self._lock_:
+            self._entries_[key] = (digest, record)
+            self._entries_.move_to_end(key)
+            while len(self._entries_) > self.maxsize:
+                evicted, _ = self._entries_.popitem(last=False)
+                log.debug('Evicted symbol {0} from cache'.format(evicted))
+
+
+symbol_cache = SymbolCache()
+"""
+The symbol cache shared by all public law restriction sources and symbol hook methods of the process.
+"""
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the measuring of the durations of the stages of a request. The spans are collected by
+the :class:`Timing` of the current request, which is started by the webservice if the timing is enabled in
+the configuration. Without a started timing :func:`span` returns a shared context doing nothing, so the
+instrumented code runs with a negligible overhead.
+
+The spans can be sent to the client as ``Server-Timing`` header and are added to the statistics of the
+request (:class:`pyramid_oereb.contrib.stats.decorators.OerebStats`). Both are produced before the body of
+a streamed response is sent, so the spans still running at that time (the rendering and the total) are
+marked as partial there. The metrics are observed once the body has been sent completely.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+log = logging.getLogger(__name__)
+
+_current_timing = ContextVar('pyramid_oereb_timing', default=None)
+_null_span = nullcontext()
+
+
+class Timing(object):
+
+    def __init__(self):
+        """
+        The durations of the stages of one request. Spans may be added from several threads.
+        """
+        self.spans = []
+        self._lock_ = threading.Lock()
+
+    @contextmanager
+    def span(self, name, label=None):
+        """
+        Measures the duration of the enclosed block.
+
+        Args:
+            name (str): The name of the stage, e.g. plr_source.
+            label (str or None): The label distinguishing spans of the same stage, e.g. the theme code.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000, label)
+
+    def add(self, name, duration, label=None):
+        """
+        Adds a measured span.
+
+        Args:
+            name (str): The name of the stage.
+            duration (float): The duration in milliseconds.
+            label (str or None): The label distinguishing spans of the same stage.
+        """
+        with self._lock_:
+            self.spans.append({
+                'name': name,
+                'label': label,
+                'duration': round(duration, 3)
+            })
+
+    def mark_partial(self, *names):
+        """
+        Marks the spans of the passed stages as partial, e.g. the rendering of a streamed extract which
+        continues while the body is sent.
+
+        Args:
+            *names (str): The names of the stages.
+        """
+        with self._lock_:
+            for span in self.spans:
+                if span['name'] in names:
+                    span['partial'] = True
+
+    def completed(self, duration):
+        """
+        Returns the spans with the partial ones completed.
+
+        Args:
+            duration (float): The duration in milliseconds the partial spans continued after they have been
+                marked, e.g. the time the streamed body took to be sent.
+
+        Returns:
+            list of dict: The spans like :meth:`as_list` without partial spans.
+        """
+        spans = []
+        for span in self.as_list():
+            if span.pop('partial', False):
+                span['duration'] = round(span['duration'] + duration, 3)
+            spans.append(span)
+        return spans
+
+    def as_list(self):
+        """
+        Returns:
+            list of dict: The spans with their name, label and duration in milliseconds in the order they
+            have been finished.
+        """
+        with self._lock_:
+            return [dict(span) for span in self.spans]
+
+    def server_timing(self):
+        """
+        Returns:
+            str: The value of the Server-Timing header.
+        """
+        metrics = []
+        for span in self.as_list():
+            metric = span['name']
+            desc = [str(span['label'])] if span['label'] else []
+            if span.get('partial'):
+                desc.append('partial')
+            if desc:
+                metric += ';desc="{0}"'.format(' '.join(desc).replace('"', "'"))
+            metrics.append('{0};dur={1}'.format(metric, span['duration']))
+        return ', '.join(metrics)
+
+
+class TimedIterator(object):
+
+    def __init__(self, app_iter, callback):
+        """
+        Wraps the app_iter of a streamed response and measures the time until it is exhausted or closed.
+
+        Args:
+            app_iter (iterable of bytes): The app_iter of the response.
+            callback (callable): The function called once with the measured duration in milliseconds.
+        """
+        self._app_iter_ = app_iter
+        self._iterator_ = iter(app_iter)
+        self._callback_ = callback
+        self._start_ = time.perf_counter()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator_)
+        except BaseException:
+            self._finish()
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self._app_iter_, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._finish()
+
+    def _finish(self):
+        callback, self._callback_ = self._callback_, None
+        if callback is not None:
+            callback((time.perf_counter() - self._start_) * 1000)
+
+
+def get_timing():
+    """
+    Returns:
+        Timing or None: The timing of the current request or None if the timing is not enabled.
+    """
+    return _current_timing.get()
+
+
+def start_timing():
+    """
+    Starts the timing of the current request.
+
+    Returns:
+        tuple: The started :class:`Timing` and the token to pass to :func:`stop_timing`.
+    """
+    timing = Timing()
+    return timing, _current_timing.set(timing)
+
+
+def stop_timing(token):
+    """
+    Stops the timing of the current request.
+
+    Args:
+        token (contextvars.Token): The token returned by :func:`start_timing`.
+    """
+    _current_timing.reset(token)
+
+
+def span(name, label=None, timing=None):
+    """
+    Measures the duration of the enclosed block if the timing of the current request is enabled.
+
+    Args:
+        name (str): The name of the stage.
+        label (str or None): The label distinguishing spans of the same stage, e.g. the theme code.
+        timing (Timing or None): The timing to add the span to. Needed in other threads than the one of
+            the request. Defaults to the timing of the current request.
+
+    Returns:
+        contextlib.AbstractContextManager: The context measuring the block.
+    """
+    if timing is None:
+        timing = _current_timing.get()
+        if timing is None:
+            return _null_span
+    return timing.span(name, label)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the tolerance check of all geometries of an extract in one batch. Instead of
+intersecting the geometries one by one with the limit of the real estate, the intersections, areas, lengths
+and numbers of points are calculated with the vectorized functions of shapely. The results are the same as
+the ones of :meth:`pyramid_oereb.core.records.plr.PlrRecord.calculate`.
+"""
+import logging
+
+import numpy
+import shapely
+from shapely.geometry import GeometryCollection
+
+from pyramid_oereb.core.records.geometry import MeasuredGeometryRecord
+
+log = logging.getLogger(__name__)
+
+POINT_TYPE_IDS = (shapely.GeometryType.POINT, shapely.GeometryType.MULTIPOINT)
+LINE_TYPE_IDS = (shapely.GeometryType.LINESTRING, shapely.GeometryType.LINEARRING,
+                 shapely.GeometryType.MULTILINESTRING)
+POLYGON_TYPE_IDS = (shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON)
+
+
+class ToleranceCheck(object):
+
+    def __init__(self, real_estate):
+        """
+        The batch tolerance check of the public law restrictions of one real estate. The limit of the real
+        estate is prepared once and its buffers are calculated once per tolerance.
+
+        Args:
+            real_estate (pyramid_oereb.lib.records.real_estate.RealEstateRecord): The real estate record.
+        """
+        self.real_estate = real_estate
+        shapely.prepare(real_estate.limit)
+        self._limits_ = {None: real_estate.limit}
+
+    def get_limit(self, tolerance=None):
+        """
+        Returns the limit of the real estate buffered by the passed tolerance.
+
+        Args:
+            tolerance (float or None): The tolerance.
+
+        Returns:
+            shapely.geometry.base.BaseGeometry: The prepared limit.
+        """
+        limit = self._limits_.get(tolerance)
+        if limit is None:
+            limit = self.real_estate.limit.buffer(tolerance)
+            shapely.prepare(limit)
+            self._limits_[tolerance] = limit
+        return limit
+
+    def calculate(self, public_law_restrictions, geometry_types):
+        """
+        Calculates the geometries of the passed public law restrictions like
+        :meth:`pyramid_oereb.core.records.plr.PlrRecord.calculate` does for each one.
+
+        Args:
+            public_law_restrictions (list of pyramid_oereb.lib.records.plr.PlrRecord): The public law
+                restrictions to be checked.
+            geometry_types (dict): The allowed geometry types for the to match the simple
+                feature types point, line, polygon
+
+        Returns:
+            list of bool: True for each public law restriction intersecting the real estate within the
+            limits.
+        """
+        geometries = []
+        measured = {}
+        for public_law_restriction in public_law_restrictions:
+            for geometry in public_law_restriction.geometries:
+                if not geometry.published:
+                    continue
+                if isinstance(geometry, MeasuredGeometryRecord):
+                    # Already measured by the source
+                    measured[id(geometry)] = geometry.calculate(
+                        self.real_estate, public_law_restriction.min_length, public_law_restriction.min_area,
+                        public_law_restriction.length_unit, public_law_restriction.area_unit, geometry_types
+                    )
+                else:
+                    geometries.append((public_law_restriction, geometry))
+
+        results = self._calculate_geometries(geometries, geometry_types)
+        results.update(measured)
+
+        inside = []
+        for public_law_restriction in public_law_restrictions:
+            tested_geometries = [
+                geometry for geometry in public_law_restriction.geometries
+                if results.get(id(geometry), False)
+            ]
+            public_law_restriction.apply_calculation(self.real_estate, tested_geometries)
+            inside.append(len(tested_geometries) > 0)
+        return inside
+
+    def _calculate_geometries(self, geometries, geometry_types):
+        """
+        Calculates the passed geometry records and applies the results.
+
+        Args:
+            geometries (list of tuple): The public law restriction and geometry record pairs.
+            geometry_types (dict): The allowed geometry types.
+
+        Returns:
+            dict: The test result of each geometry record by its id.
+        """
+        if len(geometries) == 0:
+            return {}
+        geoms = numpy.array([geometry.geom for _, geometry in geometries], dtype=object)
+        limits = numpy.array([
+            self.get_limit(geometry.get_tolerance(public_law_restriction.tolerances))
+            for public_law_restriction, geometry in geometries
+        ], dtype=object)
+
+        # The prepared limits make the test of the disjoint geometries cheap, only the others are intersected
+        intersections = numpy.full(len(geometries), None, dtype=object)
+        intersecting = shapely.intersects(limits, geoms)
+        intersections[intersecting] = shapely.intersection(geoms[intersecting], limits[intersecting])
+        not_empty = intersecting.copy()
+        not_empty[intersecting] = ~shapely.is_empty(intersections[intersecting])
+
+        for i in numpy.flatnonzero(not_empty):
+            if isinstance(intersections[i], GeometryCollection):
+                intersections[i] = geometries[i][1]._extract_collection(intersections[i])
+        areas = shapely.area(intersections)
+        lengths = shapely.length(intersections)
+        nr_of_points = shapely.get_num_geometries(intersections)
+        type_ids = shapely.get_type_id(intersections)
+
+        results = {}
+        for i, (public_law_restriction, geometry) in enumerate(geometries):
+            result = {
+                'area_share': None,
+                'length_share': None,
+                'nr_of_points': None,
+                'units': None,
+                'test_passed': False
+            }
+            if not_empty[i]:
+                result_type = intersections[i].geom_type
+                if type_ids[i] in POINT_TYPE_IDS:
+                    measure = int(nr_of_points[i])
+                elif type_ids[i] in LINE_TYPE_IDS:
+                    measure = float(lengths[i])
+                elif type_ids[i] in POLYGON_TYPE_IDS:
+                    measure = float(areas[i])
+                else:
+                    measure = None
+                result = geometry.evaluate(
+                    result_type, measure, self.real_estate, public_law_restriction.min_length,
+                    public_law_restriction.min_area, public_law_restriction.length_unit,
+                    public_law_restriction.area_unit, geometry_types
+                )
+            geometry.apply_results(result)
+            results[id(geometry)] = result['test_passed']
+        return results
@@ -96,3 +96,32 @@ def url_to_base64(url):
         raise AttributeError(dedicated_msg)
 
     return base64.b64encode(response.read())
+
+
+def canonicalize_wms_url(url, precision=3):
+    """
+    Returns a canonical form of a WMS URL. Two URLs requesting the same map get the same canonical form
+    independent of the order and case of the parameter names and of the formatting of the bounding box.
+
+    Args:
+        url (str): The WMS URL.
+        precision (int): The number of decimal places the values of the BBOX parameter are rounded to.
+
+    Returns:
+        str: The canonical URL.
+    """
+    split_url, params = parse_url(url)
+    query = []
+    for key in sorted(params.keys()):
+        for value in sorted(params[key]):
+            if key == 'BBOX':
+                try:
+                    value = ','.join(
+                        '{0:.{1}f}'.format(float(e), precision) for e in value.split(',')
+                    )
+                except ValueError:
+                    pass
+            query.append((key, value))
+    return urlunsplit((
+        split_url.scheme.lower(), split_url.netloc.lower(), split_url.path or '/',
+        urlencode(query), ''))
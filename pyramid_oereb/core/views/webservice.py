@@ -1,13 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import hmac
 import logging
-# import yappi
-import qrcode
-import io
 # import re
 
-from pyramid.httpexceptions import HTTPBadRequest, HTTPSeeOther, HTTPInternalServerError, HTTPNoContent, \
-    HTTPNotFound
+from pyramid.httpexceptions import HTTPBadRequest, HTTPForbidden, HTTPSeeOther, HTTPInternalServerError, \
+    HTTPNoContent, HTTPNotFound
 from pyramid.path import DottedNameResolver
 from shapely.geometry import Point
 from pyramid.renderers import render_to_response
@@ -16,9 +14,15 @@ from pyramid_oereb import route_prefix
 from pyramid_oereb import Config
 from pyreproj import Reprojector
 
+from pyramid_oereb.core.extract_cache import get_extract_cache
+from pyramid_oereb.core.metrics import get_metrics_collector
 from pyramid_oereb.core.processor import create_processor
+from pyramid_oereb.core.profiling import get_profiler
+from pyramid_oereb.core.qr_code import create_qr_code, qr_code_cache
 from pyramid_oereb.core.readers.address import AddressReader
 from pyramid_oereb.core.renderer import Base as Renderer
+from pyramid_oereb.core.slow_queries import get_slow_query_recorder, query_labels
+from pyramid_oereb.core.timing import TimedIterator, span, start_timing, stop_timing
 from timeit import default_timer as timer
 
 from pyramid_oereb.contrib.stats.decorators import OerebStats
@@ -43,6 +47,7 @@ class PlrWebservice(object):
     def __init__(self, request):
         self._request = request
         self._params = {k.upper(): v for k, v in request.params.items()}
+        self._egrid = None
 
     def get_versions(self):
         """
@@ -258,7 +263,59 @@ class PlrWebservice(object):
 
     def get_extract_by_id(self):
         """
-        Returns the extract in the specified format and flavour.
+        Returns the extract in the specified format and flavour. If the timing is enabled, the durations of
+        the stages are added to the statistics of the response and optionally sent as Server-Timing header.
+        If the metrics are enabled, the durations of the stages are observed by the metrics collector.
+        For a streamed extract the rendering and the total are marked as partial in the statistics and the
+        header, and observed by the metrics collector once the body has been sent.
+        If the request triggers the profiling, the profile is written or returned instead of the extract.
+
+        Returns:
+            pyramid.response.Response: The `extract` response.
+        """
+        timing_config = Config.get_timing_config()
+        timing_enabled = timing_config.get('enabled', False)
+        metrics_collector = get_metrics_collector()
+        profiler = get_profiler()
+        clock_type = profiler.get_clock_type(self._request) if profiler is not None else None
+        if not timing_enabled and metrics_collector is None and clock_type is None:
+            return self.__get_extract_by_id__()
+        start_time = timer()
+        timing, token = start_timing()
+        profile = None
+        try:
+            if clock_type is None:
+                response = self.__get_extract_by_id__()
+            else:
+                with profiler.profile(clock_type) as profile:
+                    response = self.__get_extract_by_id__()
+        finally:
+            stop_timing(token)
+        timing.add('total', (timer() - start_time) * 1000)
+        if profile is not None:
+            response = profiler.output(profile, response, self._egrid, timing.as_list())
+        streamed = not isinstance(response.app_iter, (list, tuple))
+        if streamed:
+            timing.mark_partial('render', 'total')
+        if metrics_collector is not None:
+            if streamed:
+                response.app_iter = TimedIterator(
+                    response.app_iter,
+                    lambda duration: metrics_collector.observe_spans(timing.completed(duration))
+                )
+            else:
+                metrics_collector.observe_spans(timing.as_list())
+        if not timing_enabled:
+            return response
+        if getattr(response, 'extras', None) is not None:
+            response.extras['timing'] = timing.as_list()
+        if timing_config.get('server_timing_header', False):
+            response.headers['Server-Timing'] = timing.server_timing()
+        return response
+
+    def __get_extract_by_id__(self):
+        """
+        Creates the extract in the specified format and flavour.
 
         Returns:
             pyramid.response.Response: The `extract` response.
@@ -267,63 +324,77 @@ class PlrWebservice(object):
         log.debug("get_extract_by_id() start")
         try:
             params = self.__validate_extract_params__()
-            processor = create_processor()
-            # read the real estate from configured source by the passed parameters
-            real_estate_reader = processor.real_estate_reader
-            if params.egrid:
-                real_estate_records = real_estate_reader.read(params, egrid=params.egrid)
-            elif params.identdn and params.number:
-                real_estate_records = real_estate_reader.read(
-                    params,
-                    nb_ident=params.identdn,
-                    number=params.number
-                )
+            self._egrid = params.egrid
+            extract_cache = get_extract_cache()
+            cache_key = None
+            cached_extract = None
+            if extract_cache is not None:
+                cache_key = extract_cache.key(params, self._request.application_url)
+                if cache_key is not None:
+                    cached_extract = extract_cache.get(cache_key)
+            if cached_extract is not None:
+                log.debug("get_extract_by_id() delivering cached extract")
+                response = cached_extract.to_response()
             else:
-                raise HTTPBadRequest("Missing required argument")
-            # check if result is strictly one (we queried with primary keys)
-            if len(real_estate_records) == 1:
-
-                # Redirect for format URL
-                if params.format == 'url':
-                    log.debug("get_extract_by_id() calling url")
-                    return self.__redirect_to_dynamic_client__(real_estate_records[0])
-                # yappi.set_clock_type("cpu")
-                # yappi.start()
-                extract = processor.process(
-                    real_estate_records[0],
-                    params,
-                    self._request.route_url('{0}/sld'.format(route_prefix))
-                )
-                # yappi.get_func_stats().save('/workspace/processor_function_stats.prof', "pstat")
-                # yappi.get_thread_stats().save('/workspace/processor_thread_stats.prof', "pstat")
-
-                if params.format == 'json':
-                    log.debug("get_extract_by_id() calling json")
-                    response = render_to_response(
-                        'pyramid_oereb_extract_json',
-                        (extract, params),
-                        request=self._request
-                    )
-                elif params.format == 'xml':
-                    log.debug("get_extract_by_id() calling xml")
-                    response = render_to_response(
-                        'pyramid_oereb_extract_xml',
-                        (extract, params),
-                        request=self._request
-                    )
-                elif params.format == 'pdf':
-                    log.debug("get_extract_by_id() calling pdf")
-                    response = render_to_response(
-                        'pyramid_oereb_extract_print',
-                        (extract, params),
-                        request=self._request
-                    )
+                processor = create_processor()
+                # read the real estate from configured source by the passed parameters
+                real_estate_reader = processor.real_estate_reader
+                with span('real_estate'):
+                    if params.egrid:
+                        real_estate_records = real_estate_reader.read(params, egrid=params.egrid)
+                    elif params.identdn and params.number:
+                        real_estate_records = real_estate_reader.read(
+                            params,
+                            nb_ident=params.identdn,
+                            number=params.number
+                        )
+                    else:
+                        raise HTTPBadRequest("Missing required argument")
+                # check if result is strictly one (we queried with primary keys)
+                if len(real_estate_records) == 1:
+                    self._egrid = real_estate_records[0].egrid
+
+                    # Redirect for format URL
+                    if params.format == 'url':
+                        log.debug("get_extract_by_id() calling url")
+                        return self.__redirect_to_dynamic_client__(real_estate_records[0])
+                    with span('process'), query_labels(egrid=real_estate_records[0].egrid):
+                        extract = processor.process(
+                            real_estate_records[0],
+                            params,
+                            self._request.route_url('{0}/sld'.format(route_prefix))
+                        )
+
+                    with span('render', params.format):
+                        if params.format == 'json':
+                            log.debug("get_extract_by_id() calling json")
+                            response = render_to_response(
+                                'pyramid_oereb_extract_json',
+                                (extract, params),
+                                request=self._request
+                            )
+                        elif params.format == 'xml':
+                            log.debug("get_extract_by_id() calling xml")
+                            response = render_to_response(
+                                'pyramid_oereb_extract_xml',
+                                (extract, params),
+                                request=self._request
+                            )
+                        elif params.format == 'pdf':
+                            log.debug("get_extract_by_id() calling pdf")
+                            response = render_to_response(
+                                'pyramid_oereb_extract_print',
+                                (extract, params),
+                                request=self._request
+                            )
+                        else:
+                            raise HTTPBadRequest("The format '{}' is wrong".format(params.format))
+                    if cache_key is not None:
+                        extract_cache.put(cache_key, extract, response)
+                    end_time = timer()
+                    log.debug("DONE with extract, time spent: {} seconds".format(end_time - start_time))
                 else:
-                    raise HTTPBadRequest("The format '{}' is wrong".format(params.format))
-                end_time = timer()
-                log.debug("DONE with extract, time spent: {} seconds".format(end_time - start_time))
-            else:
-                raise HTTPNoContent("No real estate found")
+                    raise HTTPNoContent("No real estate found")
         except HTTPNoContent as err:
             response = HTTPNoContent('{}'.format(err))
         except HTTPBadRequest as err:
@@ -778,10 +849,11 @@ class Parameter(object):
     def qr_code(self):
         """
         Returns:
-            str: The QR code as binary encoded string.
+            bytes: The QR code as binary encoded string. It is taken from the process wide QR code cache
+            if it has been generated before.
         """
 
-        return QRcode.create_qr_code(self.extract_url)
+        return qr_code_cache.get(self.extract_url)
 
     @property
     def qr_code_ref(self):
@@ -969,7 +1041,7 @@ class QRcode(object):
             raise HTTPNoContent('No URL for QR Code generation was passed')
         extract_url = self.sanitize_url(extract_url)
 
-        qr_code = self.create_qr_code(extract_url)
+        qr_code = qr_code_cache.get(extract_url)
         response = self._request_.response
         response.status_int = 200
         response.body = qr_code
@@ -991,20 +1063,66 @@ class QRcode(object):
         Returns:
             str: Binary image content as binary string.
         """
-        # Create an object to the qrcode using the QRCode() function and store it in a
-        # variable.
-        qr = qrcode.QRCode()
-        # Add data to the above QRcode uisng the add_data() function by passing some
-        # random string as an argument.
-        qr.add_data(text)
-        # Get or build the QRcode using the make() function
-        qr.make()
-        # Convert the QRcode into an image using the make_image() function
-        # store it in another variable.
-        qr_img = qr.make_image()
-        # Save the above image with some random name using the save() function
-        # qr_img.save('myqrcode.png')
-        buffered = io.BytesIO()
-        qr_img.save(buffered, format="PNG")
-        qr_code = buffered.getvalue()
-        return qr_code
+        return create_qr_code(text)
+
+
+class Metrics(object):
+    """
+    Webservice to deliver the metrics of the application in the text format of Prometheus.
+    """
+
+    def __init__(self, request):
+        """
+        Args:
+            request (pyramid.request.Request or pyramid.testing.DummyRequest): The pyramid request instance.
+        """
+        self._request_ = request
+
+    def get_metrics(self):
+        """
+        Returns the metrics of all processes of the application.
+
+        Returns:
+            pyramid.response.Response: The metrics response.
+        """
+        metrics_collector = get_metrics_collector()
+        if metrics_collector is None:
+            raise HTTPNotFound('The metrics are not enabled.')
+        content, content_type = metrics_collector.render()
+        response = self._request_.response
+        response.status_int = 200
+        response.body = content
+        response.headers['Content-Type'] = content_type
+        return response
+
+
+class SlowQueries(object):
+    """
+    Webservice to deliver the recent slow database queries of the process.
+    """
+
+    def __init__(self, request):
+        """
+        Args:
+            request (pyramid.request.Request or pyramid.testing.DummyRequest): The pyramid request instance.
+        """
+        self._request_ = request
+
+    def get_slow_queries(self):
+        """
+        Returns the recent slow queries as JSON, the latest first. The request has to pass the configured
+        secret in the header X-Oereb-Secret.
+
+        Returns:
+            pyramid.response.Response: The slow queries response.
+        """
+        recorder = get_slow_query_recorder()
+        if recorder is None or not recorder.secret:
+            raise HTTPNotFound('The recording of slow queries is not enabled.')
+        secret = self._request_.headers.get('X-Oereb-Secret', '')
+        if not hmac.compare_digest(secret.encode('utf-8'), recorder.secret.encode('utf-8')):
+            raise HTTPForbidden('Wrong secret.')
+        response = self._request_.response
+        response.status_int = 200
+        response.json_body = recorder.get_entries()
+        return response
@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+This module provides the download of the WMS images of an extract. All images of an extract are downloaded
+concurrently using one shared HTTP session, so the connections to the WMS are kept alive between the
+requests. Optionally the images are cached in memory and on disk.
+"""
+import functools
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pyramid_oereb.core.metrics import observe_call
+from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.url import canonicalize_wms_url
+
+log = logging.getLogger(__name__)
+
+
+class WmsImageCache(object):
+
+    DISK_LOW_WATER = 0.9
+    """float: The part of the maximum size on disk the oldest images are removed down to if it is
+    exceeded, so the directory is not scanned again on each following write."""
+
+    DISK_SCAN_INTERVAL = 60
+    """int: The seconds after which the size on disk is computed again from the directory, which includes the
+    images written by the other processes sharing it."""
+
+    def __init__(self, ttl=None, memory_max_size=64 * 1024 * 1024, disk_path=None,
+                 disk_max_size=1024 * 1024 * 1024, precision=3):
+        """
+        A cache of the images returned by a WMS. The images are identified by the canonical form of their
+        GetMap URL (see :func:`pyramid_oereb.core.url.canonicalize_wms_url`). The least recently used images
+        are kept in memory, optionally backed by a directory on disk which survives restarts and can be
+        shared between the processes of one host.
+
+        Args:
+            ttl (int or float or None): The time to live of an image in seconds. None means forever.
+            memory_max_size (int): The maximum size of all images in memory in bytes.
+            disk_path (str or None): The directory the images are stored in. If None, only the memory is
+                used.
+            disk_max_size (int): The maximum size of all images on disk in bytes. If it is exceeded, the
+                oldest images are removed down to :attr:`DISK_LOW_WATER` of it.
+            precision (int): The number of decimal places the bounding box is rounded to for the key.
+        """
+        self._ttl_ = ttl
+        self._memory_max_size_ = memory_max_size
+        self._disk_path_ = disk_path
+        self._disk_max_size_ = disk_max_size
+        self._precision_ = precision
+        self._memory_ = OrderedDict()
+        self._memory_size_ = 0
+        self._disk_size_ = None
+        self._disk_scanned_ = None
+        self._lock_ = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def key(self, url):
+        """
+        Args:
+            url (str): The GetMap URL.
+
+        Returns:
+            str: The key of the image in the cache.
+        """
+        return canonicalize_wms_url(url, self._precision_)
+
+    def _expired(self, created):
+        return self._ttl_ is not None and time.time() - created > self._ttl_
+
+    def _disk_file(self, key):
+        return os.path.join(self._disk_path_, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.img')
+
+    def get(self, url):
+        """
+        Returns the cached image of the passed URL.
+
+        Args:
+            url (str): The GetMap URL.
+
+        Returns:
+            bytes or None: The image or None if it is not cached or expired.
+        """
+        key = self.key(url)
+        with self._lock_:
+            entry = self._memory_.get(key)
+            if entry is not None:
+                if self._expired(entry[0]):
+                    self._remove_memory(key)
+                else:
+                    self._memory_.move_to_end(key)
+                    self.memory_hits += 1
+                    self.bytes_saved += len(entry[1])
+                    return entry[1]
+        content, created = self._get_disk(key)
+        with self._lock_:
+            if content is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.bytes_saved += len(content)
+        self._put_memory(key, content, created)
+        return content
+
+    def put(self, url, content):
+        """
+        Stores the image of the passed URL.
+
+        Args:
+            url (str): The GetMap URL.
+            content (bytes): The image.
+        """
+        key = self.key(url)
+        created = time.time()
+        self._put_memory(key, content, created)
+        self._put_disk(key, content)
+
+    def clear(self):
+        """
+        Removes all images from memory and disk and resets the statistics.
+        """
+        with self._lock_:
+            self._memory_.clear()
+            self._memory_size_ = 0
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+            self.bytes_saved = 0
+            if self._disk_path_ is not None:
+                for path, _, _ in self._disk_files():
+                    self._remove_file(path)
+                self._disk_size_ = 0
+
+    def info(self):
+        """
+        Returns:
+            dict: The statistics of the cache: hits (in memory and on disk), misses, hit rate, bytes saved
+            and the current size in memory and on disk.
+        """
+        with self._lock_:
+            hits = self.memory_hits + self.disk_hits
+            requests_count = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': float(hits) / requests_count if requests_count else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'memory_size': self._memory_size_,
+                'disk_size': self._disk_size_ or 0
+            }
+
+    def _remove_memory(self, key):
+        _, content = self._memory_.pop(key)
+        self._memory_size_ -= len(content)
+
+    def _put_memory(self, key, content, created):
+        if len(content) > self._memory_max_size_:
+            return
+        with self._lock_:
+            if key in self._memory_:
+                self._remove_memory(key)
+            self._memory_[key] = (created, content)
+            self._memory_size_ += len(content)
+            while self._memory_size_ > self._memory_max_size_:
+                self._remove_memory(next(iter(self._memory_)))
+
+    def _get_disk(self, key):
+        if self._disk_path_ is None:
+            return None, None
+        path = self._disk_file(key)
+        try:
+            created = os.path.getmtime(path)
+            if self._expired(created):
+                with self._lock_:
+                    self._remove_file(path)
+                return None, None
+            with open(path, 'rb') as f:
+                return f.read(), created
+        except (IOError, OSError):
+            return None, None
+
+    def _disk_files(self):
+        files = []
+        if not os.path.isdir(self._disk_path_):
+            return files
+        for entry in os.scandir(self._disk_path_):
+            if entry.is_file() and entry.name.endswith('.img'):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_mtime, stat.st_size))
+        return files
+
+    def _remove_file(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            if self._disk_size_ is not None:
+                self._disk_size_ -= size
+        except (IOError, OSError):
+            pass
+
+    def _put_disk(self, key, content):
+        if self._disk_path_ is None or len(content) > self._disk_max_size_:
+            return
+        path = self._disk_file(key)
+        try:
+            os.makedirs(self._disk_path_, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._disk_path_, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as ex:
+            log.warning(f"The image could not be written to the cache directory: {ex}")
+            return
+        now = time.monotonic()
+        with self._lock_:
+            if self._disk_size_ is not None:
+                self._disk_size_ += len(content)
+            # Only one thread scans the directory, the others keep the estimated size
+            scan = self._disk_size_ is None or self._disk_size_ > self._disk_max_size_ or \
+                now - self._disk_scanned_ > self.DISK_SCAN_INTERVAL
+            if scan:
+                self._disk_scanned_ = now
+        if scan:
+            self._scan_disk(path)
+
+    def _scan_disk(self, keep):
+        """
+        Computes the size of the images in the shared directory and removes the oldest ones down to
+        :attr:`DISK_LOW_WATER` of the maximum size if it is exceeded.
+
+        Args:
+            keep (str): The path of the image just written, which is not removed.
+        """
+        files = self._disk_files()
+        size = sum(file_size for _, _, file_size in files)
+        if size > self._disk_max_size_:
+            low_water = self._disk_max_size_ * self.DISK_LOW_WATER
+            for file_path, _, file_size in sorted(files, key=lambda f: f[1]):
+                if size <= low_water:
+                    break
+                if file_path == keep:
+                    continue
+                try:
+                    os.remove(file_path)
+                    size -= file_size
+                except (IOError, OSError):
+                    # removed by another process in the meantime
+                    pass
+        with self._lock_:
+            self._disk_size_ = size
+
+
+class WmsDownloader(object):
+
+    def __init__(self, max_workers=8, max_per_host=4, timeout=None, retries=0, backoff_factor=0.5,
+                 cache=None):
+        """
+        The downloader of the images of the view services. The session and the thread pool are created on
+        the first download and are reused for all further downloads of the process.
+
+        Args:
+            max_workers (int): The maximum number of images downloaded at the same time. With 1 or less the
+                images are downloaded one after another.
+            max_per_host (int or None): The maximum number of images downloaded at the same time from the
+                same host. None means no limit apart from max_workers.
+            timeout (float or list of float or None): The timeout of a request in seconds. A list of two
+                values defines the connect and read timeout separately. None means no timeout.
+            retries (int): The number of retries of a request which failed because of a connection error or
+                a server error (HTTP status 500, 502, 503 or 504).
+            backoff_factor (float): The factor of the exponential delay between the retries in seconds.
+            cache (pyramid_oereb.core.wms.WmsImageCache or None): The cache of the downloaded images.
+        """
+        self._max_workers_ = max_workers
+        self._max_per_host_ = max_per_host
+        self._timeout_ = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        self._retries_ = retries
+        self._backoff_factor_ = backoff_factor
+        self.cache = cache
+        self._session_ = None
+        self._executor_ = None
+        self._host_semaphores_ = dict()
+        self._lock_ = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        Returns:
+            requests.Session: The session shared by all downloads.
+        """
+        if self._session_ is None:
+            with self._lock_:
+                if self._session_ is None:
+                    self._session_ = self._create_session()
+        return self._session_
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=max(self._max_workers_, 1),
+            max_retries=Retry(
+                total=self._retries_,
+                backoff_factor=self._backoff_factor_,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False
+            )
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _get_executor(self):
+        if self._executor_ is None:
+            with self._lock_:
+                if self._executor_ is None:
+                    self._executor_ = ThreadPoolExecutor(
+                        self._max_workers_,
+                        thread_name_prefix='pyramid_oereb_wms'
+                    )
+        return self._executor_
+
+    def _get_host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._lock_:
+            if host not in self._host_semaphores_:
+                self._host_semaphores_[host] = threading.BoundedSemaphore(self._max_per_host_)
+            return self._host_semaphores_[host]
+
+    def fetch(self, url, proxies=None, verify=True):
+        """
+        Requests the passed URL respecting the concurrency limit of its host.
+
+        Args:
+            url (str): The URL to request.
+            proxies (dict or None): The proxies used for the request.
+            verify (bool): Switch whether the certificate of the host should be verified.
+
+        Returns:
+            requests.Response: The response.
+
+        Raises:
+            LookupError: Raised if the request failed.
+        """
+        log.debug(f"Downloading image, url: {url}")
+        try:
+            if self._max_per_host_:
+                with self._get_host_semaphore(url), observe_call('wms') as call:
+                    return call.check(
+                        self.session.get(url, proxies=proxies, verify=verify, timeout=self._timeout_)
+                    )
+            with observe_call('wms') as call:
+                return call.check(
+                    self.session.get(url, proxies=proxies, verify=verify, timeout=self._timeout_)
+                )
+        except Exception as ex:
+            dedicated_msg = f"An image could not be downloaded. URL was: {url}, error was {ex}"
+            log.error(dedicated_msg)
+            raise LookupError(dedicated_msg)
+
+    def download(self, view_services, language):
+        """
+        Downloads the images of the passed view services and stores them in the records. Every distinct URL
+        is requested only once. Images found in the cache are not requested at all.
+
+        Args:
+            view_services (list of pyramid_oereb.core.records.view_service.ViewServiceRecord): The view
+                services to download the images for.
+            language (string): The language for which the images should be downloaded.
+
+        Raises:
+            LookupError: Raised if one of the images could not be downloaded. The other images are
+                downloaded and cached anyway.
+            AttributeError: Raised if one of the URLs isn't valid at all.
+        """
+        jobs = OrderedDict()
+        for view_service in view_services:
+            view_service_language, url = view_service.get_download_url(language)
+            if url not in jobs:
+                jobs[url] = []
+            jobs[url].append((view_service, view_service_language))
+
+        if self.cache is not None:
+            for url in list(jobs.keys()):
+                content = self.cache.get(url)
+                if content is not None:
+                    for view_service, view_service_language in jobs.pop(url):
+                        view_service.image[view_service_language] = ImageRecord(content)
+
+        def fetch(url):
+            view_service = jobs[url][0][0]
+            return self.fetch(url, view_service.proxies, view_service.verify_certificate)
+
+        if self._max_workers_ is not None and self._max_workers_ > 1 and len(jobs) > 1:
+            executor = self._get_executor()
+            results = [(url, executor.submit(copy_context().run, fetch, url).result) for url in jobs]
+        else:
+            results = [(url, functools.partial(fetch, url)) for url in jobs]
+
+        # Each successful response is stored and cached even if another image of the extract failed
+        error = None
+        for url, result in results:
+            try:
+                response = result()
+                for view_service, view_service_language in jobs[url]:
+                    view_service.set_wms_content(view_service_language, url, response)
+            except LookupError as ex:
+                error = error or ex
+                continue
+            if self.cache is not None:
+                self.cache.put(url, response.content)
+        if error is not None:
+            raise error
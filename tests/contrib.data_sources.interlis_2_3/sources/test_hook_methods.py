@@ -10,6 +10,14 @@ from pyramid.httpexceptions import HTTPNotFound, HTTPServerError
 from pyramid_oereb.contrib.data_sources.interlis_2_3.hook_methods import get_symbol
 from pyramid_oereb.contrib.data_sources.standard.models import get_view_service, get_legend_entry
 from pyramid_oereb.core import b64
+from pyramid_oereb.core.sources.symbol_cache import symbol_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_symbol_cache():
+    symbol_cache.clear()
+    yield
+    symbol_cache.clear()
 
 
 @pytest.fixture
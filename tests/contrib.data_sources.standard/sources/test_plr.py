@@ -27,6 +27,7 @@ from pyramid_oereb.core.records.theme import ThemeRecord
 from pyramid_oereb.core.records.view_service import LegendEntryRecord, ViewServiceRecord
 from pyramid_oereb.core.records.real_estate import RealEstateRecord
 from pyramid_oereb.core.records.plr import EmptyPlrRecord
+from pyramid_oereb.core.sources.plr_metadata import DEFAULT_TTL, PlrSourceMetadata, plr_source_metadata
 
 
 @pytest.fixture
@@ -1329,6 +1330,89 @@ def test_collect_legend_entries_by_bbox(idx, items_list, plr_source_params):
             [(1, ), (3, ), (4, ), (7, ), (9, )]
 
 
+@pytest.fixture
+def plr_metadata():
+    plr_source_metadata.invalidate()
+    with patch.object(
+            DatabaseSource,
+            'read_metadata',
+            return_value=PlrSourceMetadata(3, (0., 0., 10., 10.))
+    ) as mock:
+        yield mock
+    plr_source_metadata.invalidate()
+
+
+def test_collect_legend_entries_by_bbox_combined(plr_source_params, plr_metadata):
+    plr_source_params['source']['params']['combined_query'] = True
+    source = DatabaseSource(**plr_source_params)
+    statements = []
+
+    def mock_all(query):
+        statements.append(str(query.statement.compile()))
+        return [('legend_1', 'inKraft'), ('legend_2', 'inKraft'), ('legend_1', 'AenderungMitVorwirkung')]
+
+    with patch('sqlalchemy.orm.Query.all', mock_all):
+        result = source.collect_legend_entries_by_bbox_combined(
+            orm.Session(),
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+        )
+
+    assert result == [
+        [['legend_1', 'legend_2'], 'inKraft'],
+        [['legend_1'], 'AenderungMitVorwirkung']
+    ]
+    # one single statement which contains the spatial filter and the legend entries
+    assert len(statements) == 1
+    assert 'FROM land_use_plans.legend_entry JOIN (SELECT DISTINCT' in statements[0].replace('\n', ' ')
+    assert 'ST_Intersects' in statements[0]
+
+
+@pytest.mark.parametrize('combined_query,expected_counts', [
+    (False, 2),
+    (True, 0)
+])
+def test_theme_has_data(plr_source_params, plr_metadata, combined_query, expected_counts):
+    plr_source_params['source']['params']['combined_query'] = combined_query
+    source = DatabaseSource(**plr_source_params)
+    session = MagicMock()
+    session.query.return_value.count.return_value = 3
+    assert source.theme_has_data(session)
+    assert source.theme_has_data(session)
+    assert session.query.return_value.count.call_count == expected_counts
+    # the metadata are read once on startup
+    assert plr_metadata.call_count == (1 if combined_query else 0)
+
+
+@pytest.mark.parametrize('params,expected_ttl', [
+    ({'combined_query': True}, DEFAULT_TTL),
+    ({'combined_query': True, 'metadata_ttl': 60}, 60),
+    ({'cache_metadata': True}, None)
+])
+def test_metadata_ttl(plr_source_params, plr_metadata, params, expected_ttl):
+    plr_source_params['source']['params'].update(params)
+    source = DatabaseSource(**plr_source_params)
+    plr_source_metadata.get(source._plr_info.get('code'), None).refreshed -= DEFAULT_TTL + 1
+    source.get_metadata(MagicMock())
+    assert plr_metadata.call_count == (1 if expected_ttl is None else 2)
+
+
+@pytest.mark.parametrize('cache_metadata,tolerances,limit,expected_result', [
+    (False, None, Polygon([(20, 20), (21, 20), (21, 21)]), True),
+    (True, None, Polygon([(20, 20), (21, 20), (21, 21)]), False),
+    (True, None, Polygon([(5, 5), (21, 20), (21, 21)]), True),
+    (True, {'ALL': 0.5}, Polygon([(10.2, 10.2), (11, 10.2), (11, 11)]), True),
+    (True, {'Point': 0.1}, Polygon([(10.2, 10.2), (11, 10.2), (11, 11)]), False)
+])
+def test_theme_extent_intersects(plr_source_params, plr_metadata, cache_metadata, tolerances, limit,
+                                 expected_result):
+    plr_source_params['source']['params']['cache_metadata'] = cache_metadata
+    plr_source_params['tolerances'] = tolerances
+    source = DatabaseSource(**plr_source_params)
+    real_estate = MagicMock(spec=RealEstateRecord)
+    real_estate.limit = limit
+    assert source.theme_extent_intersects(MagicMock(), real_estate) == expected_result
+
+
 @pytest.fixture
 def mock_config():
     with patch('pyramid_oereb.core.config.Config') as mock:
@@ -8,6 +8,14 @@ from pyramid.httpexceptions import HTTPNotFound, HTTPServerError
 from pyramid_oereb.contrib.data_sources.standard.hook_methods import get_symbol
 from pyramid_oereb.contrib.data_sources.standard.models import get_view_service, get_legend_entry
 from pyramid_oereb.core import b64
+from pyramid_oereb.core.sources.symbol_cache import symbol_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_symbol_cache():
+    symbol_cache.clear()
+    yield
+    symbol_cache.clear()
 
 
 @pytest.fixture
@@ -232,3 +240,21 @@ def test_get_symbol_b64_content(theme_config, one_result_b64_session, png_binary
         body, content_type = get_symbol({'identifier': "1"}, theme_config)
         assert content_type == 'image/png'
         assert body == b64.decode(binascii.b2a_base64(png_binary).decode('ascii'))
+
+
+def test_get_symbol_cached(theme_config, one_result_b64_session, no_result_session, png_binary):
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session',
+               return_value=one_result_b64_session()):
+        get_symbol({'identifier': "1"}, theme_config)
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session',
+               return_value=no_result_session()) as get_session:
+        body, content_type = get_symbol({'identifier': "1"}, theme_config)
+        assert content_type == 'image/png'
+        assert body == png_binary
+        get_session.assert_not_called()
+    # the cache is cleared when the data is reloaded
+    symbol_cache.clear()
+    with patch('pyramid_oereb.core.adapter.DatabaseAdapter.get_session',
+               return_value=no_result_session()):
+        with pytest.raises(HTTPNotFound):
+            get_symbol({'identifier': "1"}, theme_config)
@@ -1,8 +1,9 @@
 import pytest
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import String, DateTime, Column
+from geoalchemy2.types import Geometry
+from sqlalchemy import String, DateTime, Column, ForeignKey, Integer
 from pyramid_oereb.contrib.data_sources.standard import create_schema_sql, tables, create_tables_sql, \
-    create_sql
+    create_sql, add_indexes, create_indexes_sql
 
 
 @pytest.fixture
@@ -29,6 +30,30 @@ def datetime_table_base():
     yield base, Test, schema_name
 
 
+@pytest.fixture
+def geometry_table_base():
+    base = declarative_base()
+    schema_name = 'test'
+
+    class Parent(base):
+        __table_args__ = {'schema': schema_name}
+        __tablename__ = 'parent'
+        id = Column(Integer, primary_key=True)
+
+    class RealEstate(base):
+        __table_args__ = {'schema': schema_name}
+        __tablename__ = 'real_estate'
+        id = Column(Integer, primary_key=True)
+        egrid = Column(String)
+        identdn = Column(String)
+        number = Column(String)
+        law_status = Column(String)
+        parent_id = Column(Integer, ForeignKey(Parent.id), index=True)
+        limit = Column(Geometry('MULTIPOLYGON', srid=2056))
+    add_indexes(base)
+    yield base, RealEstate, schema_name
+
+
 def test_create_schema_sql():
     sql = create_schema_sql('test')
     assert sql == 'CREATE SCHEMA IF NOT EXISTS test;'
@@ -57,3 +82,37 @@ def test_create_sql(simple_table_base):
     sql = create_sql(simple_table_base[2], tables(simple_table_base[0]))
     expected_sql = 'CREATE SCHEMA IF NOT EXISTS test;CREATE TABLE test.test_table (test_column VARCHAR NOT NULL, PRIMARY KEY (test_column));'  # noqa: E501
     assert sql.replace('\n', '').replace('\t', '') == expected_sql
+
+
+def test_add_indexes(geometry_table_base):
+    table = geometry_table_base[1].__table__
+    indexes = {index.name: index for index in table.indexes}
+    assert sorted(indexes) == [
+        'idx_real_estate_limit', 'ix_real_estate_law_status', 'ix_test_real_estate_parent_id',
+        'ux_real_estate_egrid', 'ux_real_estate_identdn_number'
+    ]
+    assert indexes['idx_real_estate_limit'].dialect_options['postgresql']['using'] == 'gist'
+    assert indexes['ux_real_estate_identdn_number'].unique
+    assert [c.name for c in indexes['ux_real_estate_identdn_number'].columns] == ['identdn', 'number']
+    assert tables(geometry_table_base[0])[0].indexes == set()
+
+
+def test_add_indexes_twice(geometry_table_base):
+    add_indexes(geometry_table_base[0])
+    assert len(geometry_table_base[1].__table__.indexes) == 5
+
+
+def test_create_indexes_sql(geometry_table_base):
+    sql = create_indexes_sql([geometry_table_base[1].__table__], if_not_exists=True)
+    assert sql.splitlines() == [
+        'CREATE INDEX IF NOT EXISTS idx_real_estate_limit ON test.real_estate USING gist ("limit");',
+        'CREATE INDEX IF NOT EXISTS ix_real_estate_law_status ON test.real_estate (law_status);',
+        'CREATE INDEX IF NOT EXISTS ix_test_real_estate_parent_id ON test.real_estate (parent_id);',
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_real_estate_egrid ON test.real_estate (egrid);',
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_real_estate_identdn_number ON test.real_estate (identdn, number);'  # noqa: E501
+    ]
+
+
+def test_create_tables_sql_indexes(geometry_table_base):
+    sql = create_tables_sql(tables(geometry_table_base[0]))
+    assert sql.index('CREATE TABLE test.real_estate') < sql.index('CREATE INDEX idx_real_estate_limit')
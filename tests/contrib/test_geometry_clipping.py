@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import pytest
+from unittest.mock import patch
+from geoalchemy2 import Geometry
+from shapely.geometry import box
+from sqlalchemy import Column, Date, Integer, String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session, declarative_base
+
+from pyramid_oereb.contrib.data_sources.geometry_clipping import get_clip_bounds, query_clipped_geometries
+
+
+@pytest.fixture
+def geometry_model():
+    base = declarative_base()
+
+    class Geometry_(base):
+        __table_args__ = {'schema': 'test'}
+        __tablename__ = 'geometry'
+        id = Column(Integer, primary_key=True)
+        law_status = Column(String)
+        published_from = Column(Date)
+        published_until = Column(Date)
+        geo_metadata = Column(String)
+        geom = Column(Geometry('GEOMETRY', srid=2056))
+        public_law_restriction_id = Column(Integer)
+    yield Geometry_
+
+
+def test_get_clip_bounds():
+    bbox = box(0, 0, 10, 20)
+    assert get_clip_bounds(bbox) == (0, 0, 10, 20)
+    assert get_clip_bounds(bbox, {'Point': 1.0, 'Polygon': 0.5}) == (-1, -1, 11, 21)
+
+
+def test_query_clipped_geometries(geometry_model):
+    with patch.object(Query, 'all', lambda self: self.statement):
+        statement = query_clipped_geometries(Session(), geometry_model, geometry_model.id,
+                                             {'geom': geometry_model.geom}, [1, 2], box(0, 0, 10, 20), 2056)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert 'CASE WHEN ST_CoveredBy(test.geometry.geom, ST_MakeEnvelope(' in sql
+    assert 'ST_CollectionExtract(ST_Intersection(test.geometry.geom' in sql
+    assert 'ST_Intersects(test.geometry.geom' in sql
+    assert 'test.geometry.public_law_restriction_id IN' in sql
+    assert isinstance(statement.selected_columns['geom'].type, Geometry)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+
+import pytest
+from unittest.mock import patch
+from geoalchemy2 import Geometry
+from shapely.geometry import Polygon
+from sqlalchemy import Column, Date, Integer, String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session, declarative_base
+
+from pyramid_oereb.contrib.data_sources.geometry_measures import get_limit, get_measure, get_result_type, \
+    query_geometry_measures
+from pyramid_oereb.core.records.real_estate import RealEstateRecord
+
+Row = namedtuple('Row', ['result_type', 'intersection_empty', 'result_empty', 'measure'])
+
+
+@pytest.fixture
+def geometry_model():
+    base = declarative_base()
+
+    class Geometry_(base):
+        __table_args__ = {'schema': 'test'}
+        __tablename__ = 'geometry'
+        id = Column(Integer, primary_key=True)
+        law_status = Column(String)
+        published_from = Column(Date)
+        published_until = Column(Date)
+        geo_metadata = Column(String)
+        geom = Column(Geometry('GEOMETRY', srid=2056))
+        public_law_restriction_id = Column(Integer)
+    yield Geometry_
+
+
+@pytest.fixture
+def real_estate():
+    limit = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    yield RealEstateRecord('Liegenschaft', 'BL', 'Aesch BL', 2761, 100, limit)
+
+
+def compile_query(model, real_estate, tolerances):
+    with patch.object(Query, 'all', lambda self: str(self.statement.compile(dialect=postgresql.dialect()))):
+        return query_geometry_measures(Session(), model, model.id, model.geom, [1, 2], real_estate, 2056,
+                                       tolerances)
+
+
+def test_query_geometry_measures(geometry_model, real_estate):
+    sql = compile_query(geometry_model, real_estate, None)
+    assert 'WITH intersections AS MATERIALIZED' in sql
+    assert '(ST_Dump(test.geometry.geom)).geom AS part' in sql
+    assert 'ST_CollectionExtract' in sql
+    assert 'CASE WHEN (ST_Dimension(anon_1.part)' not in sql
+
+
+def test_query_geometry_measures_tolerances(geometry_model, real_estate):
+    sql = compile_query(geometry_model, real_estate, {'Point': 1.0})
+    assert 'CASE WHEN (ST_Dimension(anon_1.part)' in sql
+
+
+def test_get_limit(real_estate):
+    assert get_limit(real_estate, 'Point') is real_estate.limit
+    assert get_limit(real_estate, 'Point', {'Polygon': 1.0}) is real_estate.limit
+    assert get_limit(real_estate, 'Point', {'ALL': 1.0}).area > real_estate.limit.area
+
+
+@pytest.mark.parametrize('row,result_type,measure', [
+    (Row('ST_Polygon', False, False, 12.5), 'Polygon', 12.5),
+    (Row('ST_MultiPoint', False, False, 3.0), 'MultiPoint', 3),
+    (Row('ST_MultiPolygon', False, True, 0.0), 'GeometryCollection', 0.0),
+    (Row('ST_GeometryCollection', True, True, 0.0), None, 0.0)
+])
+def test_result(row, result_type, measure):
+    assert get_result_type(row) == result_type
+    assert get_measure(row) == measure
+    assert type(get_measure(row)) is type(measure)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import MagicMock, patch
+
+import pytest
+from geoalchemy2.types import Geometry
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import declarative_base
+
+from pyramid_oereb.contrib.data_sources.maintenance import find_missing_indexes, get_geometry_index, \
+    get_maintenance_sql
+from pyramid_oereb.contrib.data_sources.standard import add_indexes, tables
+
+
+@pytest.fixture
+def base():
+    base = declarative_base()
+
+    class Geometry_(base):
+        __table_args__ = {'schema': 'test'}
+        __tablename__ = 'geometry'
+        id = Column(Integer, primary_key=True)
+        law_status = Column(String)
+        geom = Column(Geometry('POLYGON', srid=2056))
+
+    class Office(base):
+        __table_args__ = {'schema': 'test'}
+        __tablename__ = 'office'
+        id = Column(Integer, primary_key=True)
+
+    add_indexes(base)
+    yield base
+
+
+def get_inspector(indexes):
+    inspector = MagicMock()
+    inspector.has_table.return_value = True
+    inspector.get_pk_constraint.return_value = {'constrained_columns': ['id']}
+    inspector.get_indexes.return_value = indexes
+    return inspector
+
+
+def test_get_geometry_index(base):
+    geometry, office = tables(base)
+    assert get_geometry_index(geometry).name == 'idx_geometry_geom'
+    assert get_geometry_index(office) is None
+
+
+def test_get_maintenance_sql(base):
+    assert get_maintenance_sql(tables(base)) == [
+        'CLUSTER test.geometry USING idx_geometry_geom;',
+        'ANALYZE test.geometry;',
+        'ANALYZE test.office;'
+    ]
+    assert get_maintenance_sql(tables(base), cluster=False) == [
+        'ANALYZE test.geometry;', 'ANALYZE test.office;'
+    ]
+
+
+@pytest.mark.parametrize('indexes,expected', [
+    ([], ['idx_geometry_geom', 'ix_geometry_law_status']),
+    ([
+        {'column_names': ['geom'], 'dialect_options': {'postgresql_using': 'gist'}},
+        {'column_names': ['law_status', 'id']}
+    ], []),
+    ([
+        {'column_names': ['geom'], 'dialect_options': {'postgresql_using': 'btree'}},
+        {'column_names': ['id', 'law_status']}
+    ], ['idx_geometry_geom', 'ix_geometry_law_status'])
+])
+def test_find_missing_indexes(base, indexes, expected):
+    with patch('pyramid_oereb.contrib.data_sources.maintenance.inspect', return_value=get_inspector(indexes)):
+        missing = find_missing_indexes(MagicMock(), tables(base))
+    assert [index.name for index in missing] == expected
+
+
+def test_find_missing_indexes_no_table(base):
+    inspector = get_inspector([])
+    inspector.has_table.return_value = False
+    with patch('pyramid_oereb.contrib.data_sources.maintenance.inspect', return_value=inspector):
+        assert find_missing_indexes(MagicMock(), tables(base)) == []
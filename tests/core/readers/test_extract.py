@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
+import threading
 import pytest
+from unittest.mock import patch
 from pyramid.path import DottedNameResolver
 from shapely.geometry import MultiPolygon, Polygon
 
@@ -8,6 +10,7 @@ from pyramid_oereb.core.records.plr import PlrRecord
 from pyramid_oereb.core.records.real_estate import RealEstateRecord
 from pyramid_oereb.core.records.view_service import ViewServiceRecord
 from pyramid_oereb.core.records.municipality import MunicipalityRecord
+from pyramid_oereb.core.sources.plr import PlrBaseSource
 from tests.mockrequest import MockParameter
 
 
@@ -70,3 +73,69 @@ def test_read(main_schema, land_use_plans, contaminated_sites, plr_sources, plr_
     assert isinstance(plrs[0], PlrRecord)
     assert plrs[3].theme.code == 'ch.BelasteteStandorte'
     assert plrs[3].law_status.code == 'inForce'
+
+
+class BarrierPlrSource(PlrBaseSource):
+
+    def __init__(self, barrier, **kwargs):
+        super(BarrierPlrSource, self).__init__(**kwargs)
+        self.barrier = barrier
+
+    def read(self, params, real_estate, bbox):
+        # only passes if all sources are read at the same time
+        self.barrier.wait(timeout=5)
+        return [self.info.get('code')]
+
+
+@pytest.mark.parametrize('max_workers', [None, 1])
+def test_read_plr_sources_serial(max_workers, real_estate):
+    from pyramid_oereb.core.readers.extract import ExtractReader
+
+    with patch('pyramid_oereb.core.readers.extract.Config'):
+        sources = [PlrBaseSource(code='ch.A'), PlrBaseSource(code='ch.B')]
+        reader = ExtractReader(sources, None, max_workers=max_workers)
+        assert reader._executor_ is None
+        assert reader.read_plr_sources(MockParameter(), real_estate, None) == [[], []]
+
+
+def test_read_plr_sources_concurrent(real_estate):
+    from pyramid_oereb.core.readers.extract import ExtractReader
+
+    codes = ['ch.A', 'ch.B', 'ch.C']
+    barrier = threading.Barrier(len(codes))
+    with patch('pyramid_oereb.core.readers.extract.Config'):
+        sources = [BarrierPlrSource(barrier, code=code) for code in codes]
+        reader = ExtractReader(sources, None, max_workers=len(codes))
+        result = reader.read_plr_sources(MockParameter(), real_estate, None)
+    assert result == [[code] for code in codes]
+
+
+def test_read_plr_sources_skip_topic(real_estate):
+    from pyramid_oereb.core.readers.extract import ExtractReader
+
+    params = MockParameter()
+    params.set_topics(['ch.B'])
+    barrier = threading.Barrier(1)
+    with patch('pyramid_oereb.core.readers.extract.Config'):
+        sources = [BarrierPlrSource(barrier, code=code) for code in ['ch.A', 'ch.B']]
+        reader = ExtractReader(sources, None, max_workers=2)
+        assert reader.read_plr_sources(params, real_estate, None) == [['ch.B']]
+
+
+def test_read_plr_sources_timing(real_estate):
+    from pyramid_oereb.core.readers.extract import ExtractReader
+    from pyramid_oereb.core.timing import start_timing, stop_timing
+
+    codes = ['ch.A', 'ch.B']
+    barrier = threading.Barrier(len(codes))
+    with patch('pyramid_oereb.core.readers.extract.Config'):
+        sources = [BarrierPlrSource(barrier, code=code) for code in codes]
+        reader = ExtractReader(sources, None, max_workers=len(codes))
+        timing, token = start_timing()
+        try:
+            reader.read_plr_sources(MockParameter(), real_estate, None)
+        finally:
+            stop_timing(token)
+    assert sorted((span['name'], span['label']) for span in timing.as_list()) == [
+        ('plr_source', 'ch.A'), ('plr_source', 'ch.B')
+    ]
@@ -12,7 +12,7 @@ import shapely.wkt
 
 import pytest
 
-from pyramid_oereb.core.records.geometry import GeometryRecord
+from pyramid_oereb.core.records.geometry import GeometryRecord, MeasuredGeometryRecord
 from pyramid_oereb.core.records.law_status import LawStatusRecord
 from pyramid_oereb.core.records.real_estate import RealEstateRecord
 
@@ -367,3 +367,47 @@ def test_published(published_from, published_until, published):
         'test'
     )
     assert geometry_record.published == published
+
+
+@pytest.mark.parametrize('geom_type,result_type,measure,test,area_share,nr_of_points', [
+    ('Polygon', 'MultiPolygon', 50.0, True, 50.0, None),
+    ('Polygon', 'Polygon', 0.5, False, None, None),
+    ('Polygon', 'LineString', 0.0, False, None, None),
+    ('Polygon', None, None, False, None, None),
+    ('Point', 'MultiPoint', 3, True, None, 3)
+])
+def test_measured_calculate(geometry_types, geom_type, result_type, measure, test, area_share,
+                            nr_of_points):
+    law_status_record = LawStatusRecord("AenderungMitVorwirkung", {u'de': u'BlaBla'})
+    geometry_record = MeasuredGeometryRecord(
+        law_status_record, datetime.date(1985, 8, 29), None, geom_type, result_type, measure, 'test'
+    )
+    real_estate = RealEstateRecord('Liegenschaft', 'BL', 'Aesch BL', 2761, 100,
+                                   Polygon([(0, 0), (10, 0), (10, 10), (0, 10)]))
+    assert geometry_record.geom is None
+    assert geometry_record.calculate(real_estate, 1, 1, 'm', 'm2', geometry_types) == test
+    assert geometry_record.area_share == area_share
+    assert geometry_record.nr_of_points == nr_of_points
+    copied = geometry_record.copy()
+    assert not copied.calculated
+    assert copied.geom_type == geom_type
+    assert copied.intersection_measure == measure
+
+
+def test_unclipped_geom():
+    law_status_record = LawStatusRecord("AenderungMitVorwirkung", {u'de': u'BlaBla'})
+    clipped = Polygon([(0, 0), (5, 0), (5, 5), (0, 5)])
+    unclipped = Polygon([(0, 0), (50, 0), (50, 50), (0, 50)])
+    geometry_record = GeometryRecord(law_status_record, datetime.date(1985, 8, 29), None, clipped)
+    assert not geometry_record.clipped
+    assert geometry_record.unclipped_geom is clipped
+    loads = []
+    geometry_record.set_unclipped_geom(lambda: loads.append(1) or unclipped)
+    assert geometry_record.clipped
+    copied = geometry_record.copy()
+    assert geometry_record.unclipped_geom is unclipped
+    assert geometry_record.unclipped_geom is unclipped
+    assert geometry_record.geom is clipped
+    assert len(loads) == 1
+    assert copied.clipped
+    assert copied.unclipped_geom is unclipped
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
 import pytest
+from unittest.mock import MagicMock
 
 from pyramid_oereb.core import b64
 from pyramid_oereb.core.adapter import FileAdapter
-from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.records.image import ImageRecord, ImmutableImageRecord, LazyImageRecord
 
 
 def test_init():
@@ -45,3 +46,33 @@ def test_validate_filetype_invalid():
     with pytest.raises(TypeError) as e:
         ImageRecord._validate_filetype('tests/resources/invalid.jpg')
     assert '{0}'.format(e.value).startswith('Invalid file type')
+
+
+def test_immutable_image_record():
+    content = FileAdapter().read('tests/resources/logo_canton.png')
+    image_record = ImmutableImageRecord(content)
+    assert isinstance(image_record, ImageRecord)
+    assert image_record.content == content
+    assert image_record.mimetype == 'image/png'
+    assert image_record.extension == 'png'
+    with pytest.raises(AttributeError):
+        image_record.content = b'1'
+
+
+def test_immutable_image_record_invalid():
+    image_record = ImmutableImageRecord('1'.encode('utf-8'))
+    assert image_record.encode() == b64.encode('1'.encode('utf-8'))
+    with pytest.raises(TypeError):
+        image_record.mimetype
+
+
+def test_lazy_image_record():
+    create_content = MagicMock(return_value='1'.encode('utf-8'))
+    image_record = LazyImageRecord(create_content)
+    assert isinstance(image_record, ImageRecord)
+    create_content.assert_not_called()
+    assert image_record.encode() == b64.encode('1'.encode('utf-8'))
+    assert image_record.content == '1'.encode('utf-8')
+    assert create_content.call_count == 1
+    image_record.content = '2'.encode('utf-8')
+    assert image_record.content == '2'.encode('utf-8')
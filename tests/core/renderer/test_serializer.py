@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from unittest.mock import patch
+
+from pyramid_oereb.core.renderer.serializer import JsonSerializer, OrjsonSerializer, UjsonSerializer, \
+    get_json_serializer
+
+
+VALUE = {
+    'CreationDate': '2022-02-14T00:00:00',
+    'Text': u'Grundstück / Bien-fonds',
+    'Number': 1234,
+    'Area': 12.5,
+    'Flags': [True, False, None],
+    'Coordinates': [[2600000.0, 1200000.0], [2600001.5, 1200001.5]]
+}
+
+
+@pytest.mark.parametrize('serializer_class', [JsonSerializer, OrjsonSerializer, UjsonSerializer])
+def test_dumps(serializer_class):
+    if not serializer_class.available():
+        pytest.skip('{0} is not installed'.format(serializer_class.name))
+    serialized = serializer_class().dumps(VALUE)
+    assert isinstance(serialized, bytes)
+    assert json.loads(serialized.decode('utf-8')) == VALUE
+
+
+def _reject_constant(name):
+    raise ValueError('{0} is not valid JSON'.format(name))
+
+
+@pytest.mark.parametrize('serializer_class', [JsonSerializer, OrjsonSerializer, UjsonSerializer])
+def test_dumps_equivalent(serializer_class):
+    if not serializer_class.available():
+        pytest.skip('{0} is not installed'.format(serializer_class.name))
+    with open('tests/contrib.print_proxy.mapfish_print/resources/test_extract.json') as f:
+        extract = {'GetExtractByIdResponse': {'extract': json.load(f)}}
+    extract['GetExtractByIdResponse']['extract']['RealEstate']['LandRegistryArea'] = float('nan')
+    extract['Areas'] = {1: float('inf'), 2: -float('inf')}
+    serialized = serializer_class().dumps(extract)
+    assert serialized == JsonSerializer().dumps(extract)
+    assert u'Grundstück'.encode('utf-8') in serialized
+    parsed = json.loads(serialized.decode('utf-8'), parse_constant=_reject_constant)
+    assert parsed['GetExtractByIdResponse']['extract']['RealEstate']['LandRegistryArea'] is None
+    assert parsed['Areas'] == {'1': None, '2': None}
+
+
+def test_get_json_serializer_auto():
+    serializer = get_json_serializer()
+    for serializer_class in [OrjsonSerializer, UjsonSerializer, JsonSerializer]:
+        if serializer_class.available():
+            assert isinstance(serializer, serializer_class)
+            break
+    assert type(get_json_serializer('auto')) is type(serializer)
+
+
+def test_get_json_serializer_by_name():
+    assert type(get_json_serializer('json')) is JsonSerializer
+    assert type(get_json_serializer('pyramid_oereb.core.renderer.serializer.JsonSerializer')) is \
+        JsonSerializer
+
+
+def test_get_json_serializer_not_installed():
+    with patch.object(OrjsonSerializer, 'available', return_value=False), \
+            patch.object(UjsonSerializer, 'available', return_value=False):
+        assert type(get_json_serializer('orjson')) is JsonSerializer
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import os
+
+from pyramid_oereb.core.renderer.templates import TemplateRegistry, resolve_template_dirs, \
+    DEFAULT_TEMPLATES
+
+
+def test_resolve_template_dirs():
+    directories = resolve_template_dirs(['core/views/templates'])
+    assert len(directories) == 1
+    assert os.path.isfile(os.path.join(directories[0], 'sld.xml'))
+
+
+def test_get_template_shared():
+    registry = TemplateRegistry()
+    directories = resolve_template_dirs(['core/renderer/versions/templates/xml'])
+    lookup = registry.get_lookup(directories)
+    assert registry.get_lookup(list(directories)) is lookup
+    template = registry.get_template(directories, 'versions.xml')
+    assert registry.get_template(directories, 'versions.xml') is template
+    registry.configure()
+    assert registry.get_lookup(directories) is not lookup
+
+
+def test_module_directory(tmp_path):
+    registry = TemplateRegistry(module_directory=str(tmp_path), filesystem_checks=False)
+    first = resolve_template_dirs(['core/renderer/capabilities/templates/xml',
+                                   'core/renderer/extract/templates/xml'])
+    second = resolve_template_dirs(['core/renderer/extract/templates/xml'])
+    registry.get_template(first, 'theme.xml')
+    registry.get_template(second, 'theme.xml')
+    modules = [f for _, _, files in os.walk(str(tmp_path)) for f in files if f.endswith('.py')]
+    # one module per lookup
+    assert modules == ['theme.xml.py', 'theme.xml.py']
+    assert registry.get_lookup(first).filesystem_checks is False
+
+
+def test_preload(tmp_path):
+    registry = TemplateRegistry(module_directory=str(tmp_path))
+    registry.preload()
+    modules = [f for _, _, files in os.walk(str(tmp_path)) for f in files if f.endswith('.py')]
+    for _, name in DEFAULT_TEMPLATES:
+        assert '{0}.py'.format(name) in modules
+    assert 'public_law_restriction.xml.py' in modules
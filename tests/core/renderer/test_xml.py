@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import threading
+
 import pytest
 from io import BytesIO
+from unittest.mock import patch
 from lxml import etree
 
 from pyramid.path import DottedNameResolver
@@ -116,3 +119,81 @@ def test_extract_against_schema(real_estate_test_data, logo_test_data, schema_xm
     assert buffer.seek(0, 2) == buf_len  # temporary check assert buffer length == 4775
     # doc = etree.parse(buffer)
     # xmlschema.assertValid(doc)
+
+
+@pytest.fixture
+def stream_templates(tmp_path):
+    (tmp_path / 'extract.xml').write_text(
+        u'## -*- coding: utf-8 -*-\n'
+        u'<root date="${date_format}">\n'
+        u'%for i in range(500):\n'
+        u'    <%include file="item.xml" args="i=i"/>\n'
+        u'%endfor\n'
+        u'</root>\n',
+        encoding='utf-8'
+    )
+    (tmp_path / 'item.xml').write_text(
+        u'<%page args="i"/>\n'
+        u'<item>${i} Grundstück ${extract[i]}</item>\n',
+        encoding='utf-8'
+    )
+    yield str(tmp_path)
+
+
+def test_extract_render_stream(stream_templates, DummyRenderInfo):
+    from pyramid_oereb.core.config import Config
+    with patch.object(Config, '_config', {'default_language': 'de'}):
+        renderer = Renderer(DummyRenderInfo())
+    renderer.template_dir = stream_templates
+    renderer._request = MockRequest()
+    extract = [u'ä' * (i % 7) for i in range(500)]
+    chunks = list(renderer._render_stream(extract, None, chunk_size=256))
+    assert len(chunks) > 1
+    assert all(isinstance(chunk, bytes) for chunk in chunks)
+    assert b''.join(chunks) == renderer._render(extract, None)
+
+
+def test_extract_render_stream_error(stream_templates, DummyRenderInfo):
+    from pyramid_oereb.core.config import Config
+    with patch.object(Config, '_config', {'default_language': 'de'}):
+        renderer = Renderer(DummyRenderInfo())
+    renderer.template_dir = stream_templates
+    renderer._request = MockRequest()
+    chunks = renderer._render_stream([u'a'] * 100, None, chunk_size=256)
+    assert isinstance(next(chunks), bytes)
+    with pytest.raises(IndexError):
+        list(chunks)
+
+
+def test_extract_render_stream_cancelled(stream_templates, DummyRenderInfo):
+    from pyramid_oereb.core.config import Config
+    with patch.object(Config, '_config', {'default_language': 'de'}):
+        renderer = Renderer(DummyRenderInfo())
+    renderer.template_dir = stream_templates
+    renderer._request = MockRequest()
+    chunks = renderer._render_stream([u'a'] * 500, None, chunk_size=16, max_chunks=1)
+    next(chunks)
+    # closing the generator stops the rendering thread
+    chunks.close()
+    for thread in threading.enumerate():
+        if thread.name == 'pyramid_oereb_xml_stream':
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+
+
+def test_extract_render_stream_close_after_start(stream_templates, DummyRenderInfo):
+    from pyramid_oereb.core.config import Config
+    with patch.object(Config, '_config', {'default_language': 'de'}):
+        renderer = Renderer(DummyRenderInfo())
+    renderer.template_dir = stream_templates
+    renderer._request = MockRequest()
+    chunks = renderer._render_stream([u'a'] * 500, None, chunk_size=16, max_chunks=1).start()
+    # the app_iter of the response can be closed by the WSGI server before it is iterated
+    chunks.close()
+    assert chunks.buffer.cancelled.is_set()
+    for thread in threading.enumerate():
+        if thread.name == 'pyramid_oereb_xml_stream':
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+    with pytest.raises(StopIteration):
+        next(chunks)
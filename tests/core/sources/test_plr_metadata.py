@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import pytest
+from unittest.mock import MagicMock, patch
+
+from pyramid_oereb.core.sources.plr_metadata import PlrSourceMetadata, PlrSourceMetadataRegistry
+
+
+@pytest.mark.parametrize('count,extent,bounds,tolerance,expected_result', [
+    (0, None, (0., 0., 1., 1.), 0., False),
+    (1, None, (0., 0., 1., 1.), 0., True),
+    (1, (0., 0., 10., 10.), (5., 5., 6., 6.), 0., True),
+    (1, (0., 0., 10., 10.), (10., 10., 11., 11.), 0., True),
+    (1, (0., 0., 10., 10.), (11., 11., 12., 12.), 0., False),
+    (1, (0., 0., 10., 10.), (11., 11., 12., 12.), 1., True),
+    (1, (0., 0., 10., 10.), (-2., 5., -1., 6.), 0.5, False)
+])
+def test_metadata_intersects(count, extent, bounds, tolerance, expected_result):
+    metadata = PlrSourceMetadata(count, extent)
+    assert metadata.has_data == (count > 0)
+    assert metadata.intersects(bounds, tolerance) == expected_result
+
+
+def test_registry_get():
+    registry = PlrSourceMetadataRegistry()
+    loader = MagicMock(return_value=PlrSourceMetadata(1, (0., 0., 1., 1.)))
+    first = registry.get('ch.Test', loader)
+    assert registry.get('ch.Test', loader) is first
+    assert loader.call_count == 1
+    assert first.last_modified is not None
+    assert registry.keys() == ['ch.Test']
+
+
+def test_registry_invalidate():
+    registry = PlrSourceMetadataRegistry()
+    loader = MagicMock(side_effect=lambda: PlrSourceMetadata(1, (0., 0., 1., 1.)))
+    registry.get('ch.Test1', loader)
+    registry.get('ch.Test2', loader)
+    registry.invalidate('ch.Test1')
+    assert registry.keys() == ['ch.Test2']
+    registry.get('ch.Test1', loader)
+    assert loader.call_count == 3
+    registry.invalidate()
+    assert registry.keys() == []
+
+
+def test_registry_ttl():
+    registry = PlrSourceMetadataRegistry()
+    loads = [PlrSourceMetadata(1, (0., 0., 1., 1.)), PlrSourceMetadata(1, (0., 0., 1., 1.)),
+             PlrSourceMetadata(2, (0., 0., 2., 2.))]
+    loader = MagicMock(side_effect=loads)
+    with patch('pyramid_oereb.core.sources.plr_metadata.time.monotonic', return_value=100.):
+        first = registry.get('ch.Test', loader, ttl=10)
+        assert registry.get('ch.Test', loader, ttl=10) is first
+    with patch('pyramid_oereb.core.sources.plr_metadata.time.monotonic', return_value=111.):
+        # expired, but the data did not change
+        second = registry.get('ch.Test', loader, ttl=10)
+        assert second is loads[1]
+        assert second.last_modified == first.last_modified
+    with patch('pyramid_oereb.core.sources.plr_metadata.time.monotonic', return_value=122.):
+        # changed data get a new modification time
+        third = registry.get('ch.Test', loader, ttl=10)
+        assert third is loads[2]
+        assert third.last_modified >= first.last_modified
+    assert loader.call_count == 3
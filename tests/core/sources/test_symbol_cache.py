@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import binascii
+
+import pytest
+
+from pyramid_oereb.core import b64
+from pyramid_oereb.core.adapter import FileAdapter
+from pyramid_oereb.core.records.image import ImmutableImageRecord
+from pyramid_oereb.core.sources.symbol_cache import SymbolCache, decode_symbol
+
+
+@pytest.fixture
+def png_binary():
+    yield FileAdapter().read('tests/resources/logo_canton.png')
+
+
+def test_decode_symbol(png_binary):
+    assert decode_symbol(b64.encode(png_binary)) == png_binary
+    assert decode_symbol(png_binary) == png_binary
+    assert decode_symbol(binascii.a2b_base64(b64.encode(png_binary))) == png_binary
+    with pytest.raises(TypeError):
+        decode_symbol(1)
+
+
+def test_get(png_binary):
+    cache = SymbolCache()
+    symbol = b64.encode(png_binary)
+    record = cache.get('ch.Test', 1, symbol)
+    assert isinstance(record, ImmutableImageRecord)
+    assert record.content == png_binary
+    assert record.mimetype == 'image/png'
+    assert cache.get('ch.Test', '1', symbol) is record
+    assert cache.get('ch.Other', 1, symbol) is not record
+    assert cache.info() == {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 1024}
+
+
+def test_get_changed_symbol(png_binary):
+    cache = SymbolCache()
+    first = cache.get('ch.Test', 1, b64.encode(png_binary))
+    assert cache.get('ch.Test', 1, b64.encode(png_binary)) is first
+    changed = cache.get('ch.Test', 1, b64.encode(b'<svg></svg>'))
+    assert changed is not first
+    assert changed.content == b'<svg></svg>'
+    assert cache.find('ch.Test', 1) is changed
+
+
+def test_find(png_binary):
+    cache = SymbolCache()
+    assert cache.find('ch.Test', 1) is None
+    record = cache.get('ch.Test', 1, png_binary)
+    assert cache.find('ch.Test', '1') is record
+    assert cache.info()['hits'] == 1
+    assert cache.info()['misses'] == 2
+
+
+def test_lru(png_binary):
+    cache = SymbolCache(maxsize=2)
+    first = cache.get('ch.Test', 1, png_binary)
+    cache.get('ch.Test', 2, png_binary)
+    assert cache.find('ch.Test', 1) is first
+    cache.get('ch.Test', 3, png_binary)
+    assert cache.find('ch.Test', 2) is None
+    assert cache.find('ch.Test', 1) is first
+    assert cache.info()['size'] == 2
+
+
+def test_clear(png_binary):
+    cache = SymbolCache()
+    cache.get('ch.Test', 1, png_binary)
+    cache.clear()
+    assert cache.find('ch.Test', 1) is None
+    assert cache.info() == {'hits': 0, 'misses': 1, 'size': 0, 'maxsize': 1024}
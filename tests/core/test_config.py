@@ -2,7 +2,7 @@
 import pytest
 from sqlalchemy.exc import ProgrammingError
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from pyramid.config import ConfigurationError
 
@@ -25,6 +25,9 @@ from pyramid_oereb.core.readers.map_layering import MapLayeringReader
 from pyramid_oereb.core.records.map_layering import MapLayeringRecord
 from pyramid_oereb.core.records.availability import AvailabilityRecord
 from pyramid_oereb.core.records.municipality import MunicipalityRecord
+from pyramid_oereb.core.records.law_status import LawStatusRecord
+from pyramid_oereb.core.records.theme import ThemeRecord
+from pyramid_oereb.core.records.theme_document import ThemeDocumentRecord
 
 
 # order=-1 to run them after all and don't screw the configuration in Config
@@ -238,6 +241,73 @@ def test_get_theme_config_by_code(test_theme_config, test_theme_code, expected_r
         assert Config.get_theme_config_by_code(test_theme_code) == expected_result
 
 
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({'extract': {'plr_sources_max_workers': 4}}, 4),
+    ({'extract': {}}, None),
+    ({}, None)
+])
+@pytest.mark.run(order=-1)
+def test_get_plr_sources_max_workers(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_plr_sources_max_workers() == expected_result
+
+
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({}, {}),
+    ({'wms_download': None}, {}),
+    ({'wms_download': {'max_workers': 4, 'timeout': [5, 30]}}, {'max_workers': 4, 'timeout': [5, 30]})
+])
+def test_get_wms_download_config(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_wms_download_config() == expected_result
+
+
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({}, {}),
+    ({'template_cache': {'module_directory': '/tmp/mako'}}, {'module_directory': '/tmp/mako'})
+])
+def test_get_template_cache_config(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_template_cache_config() == expected_result
+
+
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({}, {}),
+    ({'extract_cache': None}, {}),
+    ({'extract_cache': {'ttl': 3600}}, {'ttl': 3600})
+])
+def test_get_extract_cache_config(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_extract_cache_config() == expected_result
+
+
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({}, {}),
+    ({'data_reload': {'interval': 60}}, {'interval': 60})
+])
+def test_get_data_reload_config(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_data_reload_config() == expected_result
+
+
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({}, False),
+    ({'extract': {'xml_streaming': True}}, True)
+])
+def test_get_extract_xml_streaming(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_extract_xml_streaming() == expected_result
+
+
+@pytest.mark.parametrize('test_config,expected_result', [
+    ({}, None),
+    ({'extract': {'json_serializer': 'orjson'}}, 'orjson')
+])
+def test_get_json_serializer(test_config, expected_result):
+    with patch.object(Config, '_config', test_config):
+        assert Config.get_json_serializer() == expected_result
+
+
 @pytest.mark.run(order=-1)
 def test_get_theme_config_by_code_none():
     Config._config = None
@@ -1386,6 +1456,46 @@ def test_municipality_by_fosnr_not_in_list(municipality_records):
         Config.municipality_by_fosnr(0)
 
 
+@pytest.mark.run(order=1)
+def test_municipality_by_fosnr_index_rebuilt(municipality_records):
+    Config.municipalities = municipality_records[:1]
+    Config.build_indexes()
+    assert Config.municipality_by_fosnr(2771) is municipality_records[0]
+    with pytest.raises(ConfigurationError):
+        Config.municipality_by_fosnr(2772)
+    # the index follows a replaced list
+    Config.municipalities = municipality_records
+    assert Config.municipality_by_fosnr(2772) is municipality_records[1]
+
+
+@pytest.mark.run(order=1)
+def test_get_theme_by_code_sub_code_index():
+    themes = [
+        ThemeRecord('ch.Nutzungsplanung', {'de': 'Nutzungsplanung'}, 10),
+        ThemeRecord('ch.Nutzungsplanung', {'de': 'Grundnutzung'}, 11, 'ch.Grundnutzung'),
+        ThemeRecord('ch.Nutzungsplanung', {'de': 'Duplikat'}, 12)
+    ]
+    with patch.object(Config, 'themes', themes):
+        assert Config.get_theme_by_code_sub_code('ch.Nutzungsplanung') is themes[0]
+        assert Config.get_theme_by_code_sub_code('ch.Nutzungsplanung', 'ch.Grundnutzung') is themes[1]
+        with pytest.raises(ConfigurationError):
+            Config.get_theme_by_code_sub_code('ch.Grundnutzung')
+
+
+@pytest.mark.run(order=1)
+def test_get_law_status_by_data_code_shared(law_status_lookups):
+    law_status = [LawStatusRecord('inKraft', {'de': 'In Kraft'})]
+    test_config = {'plrs': [{'code': 'ch.Nutzungsplanung', 'law_status_lookup': law_status_lookups}]}
+    with patch.object(Config, '_config', test_config), patch.object(Config, 'law_status', law_status):
+        record = Config.get_law_status_by_data_code('ch.Nutzungsplanung', 'inKraft')
+        assert record.code == 'inForce'
+        assert record.title == {'de': 'In Kraft'}
+        assert Config.get_law_status_by_data_code('CH.nutzungsplanung', 'inKraft') is record
+        with patch.object(Config, 'law_status', [LawStatusRecord('inKraft', {'de': 'Rechtskräftig'})]):
+            assert Config.get_law_status_by_data_code('ch.Nutzungsplanung', 'inKraft').title == \
+                {'de': 'Rechtskräftig'}
+
+
 @pytest.mark.parametrize('test_value,expected_value', [
     ({"law_status_lookup": {}}, {}),
     ({"law_status_lookup": ""}, "")
@@ -1451,3 +1561,114 @@ def test_get_index_and_opacity_of_view_service_not_initialized():
 def reset_map_layering():
     yield
     Config.map_layering = None
+
+
+DATA_ATTRIBUTES = [
+    'law_status', 'document_types', 'offices', 'themes', 'theme_document', 'documents',
+    'general_information', 'real_estate_types', 'map_layering', 'logos', 'availabilities', 'glossaries',
+    'disclaimers', 'municipalities'
+]
+
+
+@pytest.fixture
+def patch_read_data():
+    def patch_read_data(**values):
+        return patch.multiple(Config, **dict([
+            ('_read_{0}'.format(name), MagicMock(return_value=values.get(name, [])))
+            for name in DATA_ATTRIBUTES
+        ]))
+    # keep the data of the other tests
+    with patch.multiple(Config, _config={}, **dict([(name, None) for name in DATA_ATTRIBUTES])):
+        yield patch_read_data
+
+
+@pytest.mark.run(order=1)
+def test_reload_data(patch_read_data):
+    old_theme = ThemeRecord('ch.Nutzungsplanung', {'de': 'Nutzungsplanung'}, 10, identifier=1)
+    new_theme = ThemeRecord('ch.Nutzungsplanung', {'de': 'Nutzungsplanung'}, 10, identifier=1)
+    document = MagicMock(identifier=2)
+    offices = [OfficeRecord({'de': 'Amt'})]
+    Config.themes = [old_theme]
+    with patch_read_data(themes=[new_theme], documents=[document], offices=offices,
+                         theme_document=[ThemeDocumentRecord(1, 2, 'Art. 1')]):
+        Config.reload_data()
+        Config._read_documents.assert_called_once_with(offices)
+    assert Config.themes == [new_theme]
+    assert Config.offices is offices
+    assert Config.get_theme_by_code_sub_code('ch.Nutzungsplanung') is new_theme
+    # the relation to the documents is assembled on the new records only
+    assert new_theme.document_records == [document.copy.return_value]
+    assert old_theme.document_records is None
+    # the indexes are built before the new data replaces the old one
+    assert 'themes' in Config._data.indexes
+
+
+@pytest.mark.run(order=1)
+def test_reload_data_caches(patch_read_data):
+    with patch_read_data(), \
+            patch('pyramid_oereb.core.config.plr_source_metadata') as plr_source_metadata, \
+            patch('pyramid_oereb.core.config.symbol_cache') as symbol_cache, \
+            patch('pyramid_oereb.core.extract_cache.clear_extract_cache') as clear_extract_cache:
+        Config.reload_data()
+    plr_source_metadata.invalidate.assert_called_once_with()
+    symbol_cache.clear.assert_called_once_with()
+    clear_extract_cache.assert_called_once_with()
+
+
+@pytest.mark.run(order=1)
+def test_reload_data_pinned(patch_read_data):
+    old_theme = ThemeRecord('ch.Nutzungsplanung', {'de': 'Nutzungsplanung'}, 10)
+    new_theme = ThemeRecord('ch.Nutzungsplanung', {'de': 'Nutzungsplanung'}, 10)
+    Config.themes = [old_theme]
+    Config.pin_data()
+    try:
+        with patch_read_data(themes=[new_theme]):
+            Config.reload_data()
+        # the request keeps the data and the indexes of the snapshot pinned at its start
+        assert Config.themes == [old_theme]
+        assert Config.get_theme_by_code_sub_code('ch.Nutzungsplanung') is old_theme
+    finally:
+        Config.unpin_data()
+    assert Config.get_theme_by_code_sub_code('ch.Nutzungsplanung') is new_theme
+
+
+@pytest.mark.run(order=1)
+def test_reload_data_error_caches(patch_read_data):
+    with patch_read_data(), patch.object(Config, '_read_themes', side_effect=IOError()), \
+            patch('pyramid_oereb.core.config.plr_source_metadata') as plr_source_metadata:
+        with pytest.raises(IOError):
+            Config.reload_data()
+    plr_source_metadata.invalidate.assert_not_called()
+
+
+@pytest.mark.run(order=1)
+def test_reload_data_error(patch_read_data):
+    themes = [ThemeRecord('ch.Nutzungsplanung', {'de': 'Nutzungsplanung'}, 10)]
+    Config.themes = themes
+    with patch_read_data(), patch.object(Config, '_read_municipalities', side_effect=IOError()):
+        with pytest.raises(IOError):
+            Config.reload_data()
+    assert Config.themes is themes
+
+
+@pytest.mark.run(order=1)
+def test_reload_data_programming_error(patch_read_data, municipality_records):
+    Config.municipalities = municipality_records
+    data = Config._data
+    with patch_read_data(), patch.object(Config, '_read_municipalities',
+                                         side_effect=ProgrammingError('SELECT', {}, Exception())):
+        with pytest.raises(ProgrammingError):
+            Config.reload_data()
+    assert Config._data is data
+    assert Config.municipality_by_fosnr(2771) is municipality_records[0]
+
+
+@pytest.mark.run(order=1)
+def test_data_snapshot(municipality_records):
+    data = Config._data
+    with patch.object(Config, 'municipalities', municipality_records):
+        assert Config._data is not data
+        assert Config._data.municipalities is municipality_records
+        assert Config._data.themes is data.themes
+        assert Config._data.indexes == {}
+    assert Config.municipalities is data.municipalities
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+from datetime import date
+
+import pytest
+from unittest.mock import MagicMock
+
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.data_reload import DataReloader, create_data_reloader
+from pyramid_oereb.core.records.data_integration import DataIntegrationRecord
+
+
+def create_reader(*dates):
+    reader = MagicMock()
+    reader.read.return_value = [
+        DataIntegrationRecord(d, theme_identifier='ch.Nutzungsplanung', office_identifier=1) for d in dates
+    ]
+    return reader
+
+
+def test_check_data_integration():
+    reload = MagicMock()
+    reader = create_reader(date(2024, 1, 1))
+    reloader = DataReloader(data_integration_reader=reader, reload=reload)
+    # the first check only records the state
+    assert reloader.check() is False
+    assert reloader.check() is False
+    reader.read.return_value = create_reader(date(2024, 2, 1)).read.return_value
+    assert reloader.check() is True
+    assert reloader.check() is False
+    assert reload.call_count == 1
+
+
+def test_check_trigger_file(tmp_path):
+    reload = MagicMock()
+    trigger_file = tmp_path / 'reload'
+    reloader = DataReloader(trigger_file=str(trigger_file), reload=reload)
+    assert reloader.check() is False
+    trigger_file.write_text('')
+    assert reloader.check() is True
+    os.utime(str(trigger_file), (1000, 1000))
+    assert reloader.check() is True
+    assert reloader.check() is False
+    assert reload.call_count == 2
+
+
+def test_check_reload_error():
+    reader = create_reader(date(2024, 1, 1))
+    reloader = DataReloader(data_integration_reader=reader, reload=MagicMock(side_effect=IOError()))
+    reloader.check()
+    reader.read.return_value = create_reader(date(2024, 2, 1)).read.return_value
+    with pytest.raises(IOError):
+        reloader.check()
+    # the reload is tried again in the next check
+    reloader._reload_ = MagicMock()
+    assert reloader.check() is True
+
+
+def test_ensure_running():
+    checked = threading.Event()
+    reloader = DataReloader(interval=60, reload=MagicMock())
+    reloader.get_state = MagicMock(side_effect=lambda: checked.set() or (None, None))
+    reloader.ensure_running()
+    thread = reloader._thread_
+    reloader.on_new_request(MagicMock())
+    assert reloader._thread_ is thread
+    assert checked.wait(5)
+    reloader.stop()
+    assert not thread.is_alive()
+
+
+def test_on_new_request_pins_data():
+    reloader = DataReloader(reload=MagicMock())
+    reloader.ensure_running = MagicMock()
+    event = MagicMock()
+    data = Config._data
+    reloader.on_new_request(event)
+    try:
+        assert Config.get_data() is data
+        # data reloaded while the request is processed is not used by it
+        Config._data = data.replace()
+        assert Config.get_data() is data
+        callback = event.request.add_finished_callback.call_args[0][0]
+        callback(event.request)
+        assert Config.get_data() is Config._data
+    finally:
+        Config.unpin_data()
+        Config._data = data
+
+
+def test_create_data_reloader():
+    reloader = create_data_reloader({
+        'interval': 10,
+        'data_integration': {
+            'source': {
+                'class': 'pyramid_oereb.core.sources.data_integration.DataIntegrationBaseSource',
+                'params': {}
+            }
+        },
+        'trigger_file': '/tmp/reload'
+    })
+    assert reloader.interval == 10
+    assert reloader._data_integration_reader_ is not None
+    assert create_data_reloader({})._data_integration_reader_ is None
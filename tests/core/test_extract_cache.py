@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+import socketserver
+import threading
+from datetime import date, datetime
+
+import pytest
+from unittest.mock import MagicMock, patch
+from pyramid.config import ConfigurationError
+from pyramid.response import Response
+
+from pyramid_oereb.core.extract_cache import CachedExtract, DiskBackend, ExtractCache, MemoryBackend, \
+    RedisBackend, clear_extract_cache, create_extract_cache
+from pyramid_oereb.core.records.data_integration import DataIntegrationRecord
+from pyramid_oereb.core.views.webservice import Parameter
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            self.server.commands.append(command)
+            if command == b'GET':
+                value = store.get(args[1])
+                if value is None:
+                    self.wfile.write(b'$-1\r\n')
+                else:
+                    self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+            elif command == b'SET':
+                store[args[1]] = args[2]
+                self.wfile.write(b'+OK\r\n')
+            elif command == b'SCAN':
+                keys = [key for key in store if key.startswith(args[3][:-1])]
+                reply = b''.join([b'$%d\r\n%s\r\n' % (len(key), key) for key in keys])
+                self.wfile.write(b'*2\r\n$1\r\n0\r\n*%d\r\n%s' % (len(keys), reply))
+            elif command == b'DEL':
+                for key in args[1:]:
+                    store.pop(key, None)
+                self.wfile.write(b':%d\r\n' % (len(args) - 1))
+            else:
+                self.wfile.write(b'-ERR unknown command\r\n')
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), RespHandler)
+    server.daemon_threads = True
+    server.store = dict()
+    server.commands = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def create_params(topics=None, format='json'):
+    params = Parameter(format, egrid='CH1234', language='de')
+    params.set_topics(topics)
+    return params
+
+
+def create_extract():
+    extract = MagicMock()
+    extract.extract_identifier = '3a6a6e3b-2c2c-4c4c-8b8b-5f5f5f5f5f5f'
+    extract.creation_date = datetime(2024, 5, 1, 12, 30, 15)
+    return extract
+
+
+def create_response(extract):
+    response = Response(body='{{"CreationDate": "{0}", "ExtractIdentifier": "{1}"}}'.format(
+        extract.creation_date.strftime('%Y-%m-%dT%H:%M:%S'),
+        extract.extract_identifier
+    ).encode('utf-8'))
+    response.content_type = 'application/json'
+    return response
+
+
+def test_memory_backend():
+    backend = MemoryBackend(max_size=10)
+    backend.set('a', b'12345')
+    assert backend.get('a') == b'12345'
+    backend.set('b', b'123456')
+    # the least recently used entry is evicted
+    assert backend.get('a') is None
+    assert backend.get('b') == b'123456'
+    backend.clear()
+    assert backend.get('b') is None
+
+
+def test_memory_backend_ttl():
+    backend = MemoryBackend()
+    with patch('pyramid_oereb.core.extract_cache.time.time', return_value=100.):
+        backend.set('a', b'1', ttl=10)
+    with patch('pyramid_oereb.core.extract_cache.time.time', return_value=105.):
+        assert backend.get('a') == b'1'
+    with patch('pyramid_oereb.core.extract_cache.time.time', return_value=111.):
+        assert backend.get('a') is None
+
+
+def test_disk_backend(tmp_path):
+    backend = DiskBackend(str(tmp_path / 'extracts'), max_size=20)
+    assert backend.get('a') is None
+    backend.set('a', b'12345')
+    # a new instance reads the entries written by another one
+    assert DiskBackend(str(tmp_path / 'extracts')).get('a') == b'12345'
+    backend.set('b', b'123456', ttl=-1)
+    assert backend.get('b') is None
+    backend.set('c', b'1234567890')
+    assert len(list((tmp_path / 'extracts').glob('*.extract'))) == 1
+    assert backend.get('c') == b'1234567890'
+    backend.clear()
+    assert backend.get('c') is None
+
+
+def test_redis_backend(resp_server):
+    backend = RedisBackend('redis://127.0.0.1:{0}/0'.format(resp_server.server_address[1]), prefix='test:')
+    assert backend.get('a') is None
+    backend.set('a', b'1\r\n2', ttl=60)
+    assert resp_server.store == {b'test:a': b'1\r\n2'}
+    assert backend.get('a') == b'1\r\n2'
+    backend.clear()
+    assert backend.get('a') is None
+    assert resp_server.commands == [b'GET', b'SET', b'GET', b'SCAN', b'DEL', b'GET']
+
+
+def test_redis_backend_unavailable(resp_server):
+    port = resp_server.server_address[1]
+    resp_server.shutdown()
+    resp_server.server_close()
+    backend = RedisBackend('redis://127.0.0.1:{0}'.format(port), timeout=0.5)
+    assert backend.get('a') is None
+    backend.set('a', b'1')
+
+
+def test_cached_extract():
+    extract = create_extract()
+    cached = CachedExtract.from_response(create_response(extract), extract)
+    assert extract.extract_identifier.encode('utf-8') not in cached.body
+    cached = CachedExtract.loads(cached.dumps())
+    assert cached.content_type == 'application/json'
+    assert cached.render('id', datetime(2025, 1, 2, 3, 4, 5)) == \
+        b'{"CreationDate": "2025-01-02T03:04:05", "ExtractIdentifier": "id"}'
+    first, second = cached.to_response(), cached.to_response()
+    assert first.body != second.body
+    assert first.headers['Content-Type'] == 'application/json'
+
+
+def test_extract_cache():
+    extract_cache = ExtractCache(MemoryBackend())
+    params = create_params()
+    key = extract_cache.key(params, 'http://example.com')
+    assert extract_cache.get(key) is None
+    extract = create_extract()
+    extract_cache.put(key, extract, create_response(extract))
+    cached = extract_cache.get(key)
+    assert b'"ExtractIdentifier": "' + extract.extract_identifier.encode('utf-8') not in cached.render()
+    assert extract_cache.info() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert extract_cache.key(params, 'http://example.org') != key
+    assert extract_cache.key(create_params(['ch.Nutzungsplanung']), 'http://example.com') != key
+
+
+def test_extract_cache_error_page():
+    extract_cache = ExtractCache(MemoryBackend())
+    key = extract_cache.key(create_params(format='xml'), 'http://example.com')
+    response = Response(body=b'<html>Error</html>')
+    response.content_type = 'text/html'
+    extract_cache.put(key, create_extract(), response)
+    assert extract_cache.get(key) is None
+
+
+def test_extract_cache_streamed():
+    extract_cache = ExtractCache(MemoryBackend())
+    key = extract_cache.key(create_params(format='xml'), 'http://example.com')
+    extract = create_extract()
+    body = create_response(extract).body
+    app_iter = MagicMock()
+    app_iter.__iter__.return_value = iter([body[:10], body[10:]])
+    response = Response(app_iter=app_iter, content_type='application/xml')
+    extract_cache.put(key, extract, response)
+    # the chunks are not read before they are sent
+    assert extract_cache.backend.get(key) is None
+    assert b''.join(response.app_iter) == body
+    assert extract_cache.get(key).render(extract.extract_identifier, extract.creation_date) == body
+    response.app_iter.close()
+    assert app_iter.close.call_count == 1
+
+
+def test_extract_cache_streamed_closed():
+    extract_cache = ExtractCache(MemoryBackend())
+    key = extract_cache.key(create_params(format='xml'), 'http://example.com')
+    response = Response(app_iter=iter([b'<a>', b'</a>']), content_type='application/xml')
+    extract_cache.put(key, create_extract(), response)
+    next(response.app_iter)
+    # an extract which was not sent completely is not stored
+    response.app_iter.close()
+    assert list(response.app_iter) == [b'</a>']
+    assert extract_cache.get(key) is None
+
+
+@pytest.mark.parametrize('ttl', [None, 0])
+def test_extract_cache_ttl_required(ttl):
+    with pytest.raises(ConfigurationError):
+        ExtractCache(MemoryBackend(), ttl=ttl)
+
+
+@pytest.mark.parametrize('format,signed,cacheable', [
+    ('json', False, True),
+    ('xml', False, True),
+    ('pdf', False, False),
+    ('url', False, False),
+    ('json', True, False)
+])
+def test_extract_cache_formats(format, signed, cacheable):
+    params = Parameter(format, signed=signed, egrid='CH1234', language='de')
+    assert (ExtractCache(MemoryBackend()).key(params, 'http://example.com') is not None) == cacheable
+
+
+def test_extract_cache_data_version():
+    records = [
+        DataIntegrationRecord(date(2024, 1, 1), theme_identifier='ch.Nutzungsplanung', office_identifier=1),
+        DataIntegrationRecord(date(2024, 1, 1), theme_identifier='ch.BelasteteStandorte', office_identifier=1)
+    ]
+    reader = MagicMock()
+    reader.read.return_value = records
+    extract_cache = ExtractCache(MemoryBackend(), data_integration_reader=reader, version_ttl=0)
+    all_topics = create_params()
+    land_use_plans = create_params(['ch.Nutzungsplanung'])
+    keys = extract_cache.key(all_topics, ''), extract_cache.key(land_use_plans, '')
+    records[1].date = date(2024, 2, 1)
+    # only the extracts containing the changed theme get a new key
+    assert extract_cache.key(all_topics, '') != keys[0]
+    assert extract_cache.key(land_use_plans, '') == keys[1]
+
+
+def test_extract_cache_version_ttl():
+    reader = MagicMock()
+    reader.read.return_value = []
+    extract_cache = ExtractCache(MemoryBackend(), data_integration_reader=reader, version_ttl=60)
+    extract_cache.key(create_params(), '')
+    extract_cache.key(create_params(), '')
+    assert reader.read.call_count == 1
+
+
+def test_extract_cache_data_version_error():
+    reader = MagicMock()
+    reader.read.side_effect = IOError('database not available')
+    extract_cache = ExtractCache(MemoryBackend(), data_integration_reader=reader)
+    assert extract_cache.key(create_params(), '') is None
+
+
+def test_create_extract_cache(tmp_path):
+    extract_cache = create_extract_cache({
+        'backend': {
+            'class': 'pyramid_oereb.core.extract_cache.DiskBackend',
+            'params': {
+                'path': str(tmp_path)
+            }
+        },
+        'ttl': 60
+    })
+    assert isinstance(extract_cache.backend, DiskBackend)
+    assert extract_cache._ttl_ == 60
+    assert isinstance(create_extract_cache({}).backend, MemoryBackend)
+    assert create_extract_cache({})._ttl_ == 86400
+
+
+def test_clear_extract_cache():
+    extract_cache = ExtractCache(MemoryBackend())
+    extract_cache.backend.set('a', b'1')
+    with patch.dict('pyramid_oereb.core.extract_cache._extract_cache', {'cache': extract_cache}):
+        clear_extract_cache()
+    assert extract_cache.backend.get('a') is None
+    with patch.dict('pyramid_oereb.core.extract_cache._extract_cache', {}, clear=True):
+        clear_extract_cache()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import base64
+import cProfile
+import json
+import marshal
+import pstats
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pyramid.config import ConfigurationError
+from pyramid.response import Response
+from pyramid.testing import DummyRequest
+
+from pyramid_oereb.contrib.stats.decorators import log_response
+from pyramid_oereb.core.config import Config
+from pyramid_oereb.core.profiling import collapse, get_profiler, init_profiler
+from pyramid_oereb.core.views.webservice import PlrWebservice
+from tests.mockrequest import MockRequest
+
+yappi = pytest.importorskip('yappi')
+
+
+@pytest.fixture
+def profiler():
+    profiler = init_profiler({'enabled': True, 'secret': 'top-secret'})
+    yield profiler
+    init_profiler({})
+
+
+@pytest.fixture
+def oereb_config(config_path):
+    with patch.object(Config, '_config', None):
+        Config.init(config_path, 'pyramid_oereb')
+        yield Config
+
+
+def profiled_worker():
+    return sum(range(10000))
+
+
+def unprofiled_worker(event):
+    while not event.is_set():
+        sum(range(1000))
+
+
+def profiled_request(executor):
+    futures = [executor.submit(copy_context().run, profiled_worker) for _ in range(2)]
+    return [future.result() for future in futures]
+
+
+def get_functions(profile):
+    return set(func[2] for func in profile.stats.stats)
+
+
+def test_disabled():
+    assert init_profiler({}) is None
+    assert get_profiler() is None
+
+
+@pytest.mark.parametrize('profiling_config', [
+    {'enabled': True},
+    {'enabled': True, 'secret': 'top-secret', 'clock_type': 'gpu'}
+])
+def test_invalid_config(profiling_config):
+    with pytest.raises(ConfigurationError):
+        init_profiler(profiling_config)
+
+
+@pytest.mark.parametrize('headers,params,expected', [
+    ({}, {}, None),
+    ({'X-Oereb-Profile': 'top-secret'}, {}, 'wall'),
+    ({'X-Oereb-Profile': 'top-secret:cpu'}, {}, 'cpu'),
+    ({'X-Oereb-Profile': 'top-secret:foo'}, {}, 'wall'),
+    ({'X-Oereb-Profile': 'wrong'}, {}, None),
+    ({}, {'PROFILE': 'top-secret:CPU'}, 'cpu'),
+    ({}, {'PROFILE': 'top'}, None)
+])
+def test_get_clock_type(profiler, headers, params, expected):
+    request = DummyRequest(headers=headers, params=params)
+    assert profiler.get_clock_type(request) == expected
+
+
+def test_profile_worker_threads(profiler):
+    event = threading.Event()
+    other = threading.Thread(target=unprofiled_worker, args=(event,))
+    other.start()
+    try:
+        with ThreadPoolExecutor(2) as executor, profiler.profile('cpu') as profile:
+            profiled_request(executor)
+    finally:
+        event.set()
+        other.join()
+    assert profile.clock_type == 'cpu'
+    assert profile.duration > 0
+    functions = get_functions(profile)
+    assert 'profiled_request' in functions
+    assert 'profiled_worker' in functions
+    assert 'unprofiled_worker' not in functions
+    assert not yappi.is_running()
+
+
+def test_profile_busy(profiler):
+    with profiler.profile('wall') as profile:
+        with profiler.profile('wall') as other:
+            assert other is None
+    assert profile is not None
+
+
+def test_output_inline(profiler):
+    with ThreadPoolExecutor(2) as executor, profiler.profile('wall') as profile:
+        profiled_request(executor)
+    spans = [{'name': 'total', 'label': None, 'duration': 1.0}]
+    response = profiler.output(profile, Response(status=200), 'CH113928077734', spans)
+    assert response.content_type == 'application/json'
+    result = json.loads(response.text)
+    assert result['egrid'] == 'CH113928077734'
+    assert result['clock_type'] == 'wall'
+    assert result['status'] == 200
+    assert result['timing'] == spans
+    assert len(result['functions']) <= 30
+    assert 'profiled_worker' in result['collapsed']
+    stats = marshal.loads(base64.b64decode(result['pstats']))
+    assert any(func[2] == 'profiled_worker' for func in stats)
+
+
+def test_output_directory(profiler, tmp_path):
+    profiler.directory = str(tmp_path)
+    with profiler.profile('wall') as profile:
+        profiled_worker()
+    response = profiler.output(profile, Response(status=200), 'CH113928077734', [])
+    name = response.headers['X-Oereb-Profile']
+    assert 'CH113928077734' in name
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        name + '.collapsed', name + '.json', name + '.pstats'
+    ]
+    stats = pstats.Stats(str(tmp_path / (name + '.pstats')))
+    assert any(func[2] == 'profiled_worker' for func in stats.stats)
+
+
+def test_collapse():
+    cprofile = cProfile.Profile()
+    cprofile.runcall(profiled_request, ThreadPoolExecutor(1))
+    stats = pstats.Stats(cprofile)
+    lines = collapse(stats, threshold=0.0).splitlines()
+    assert lines
+    for line in lines:
+        stack, duration = line.rsplit(' ', 1)
+        assert int(duration) > 0
+    assert any('profiled_request' in line.split(' ')[0] for line in lines)
+
+
+@pytest.mark.parametrize('params', [
+    {'EGRID': 'CH113928077734'},
+    {'IDENTDN': 'BLTEST', 'NUMBER': '1000'}
+])
+@patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
+def test_webservice(profiler, oereb_config, params):
+    request = MockRequest()
+    request.matchdict.update({'format': 'JSON'})
+    request.params.update(params)
+    request.headers['X-Oereb-Profile'] = 'top-secret'
+    with patch('pyramid_oereb.core.views.webservice.create_processor') as create_processor, \
+            patch('pyramid_oereb.core.views.webservice.render_to_response', return_value=Response()):
+        create_processor.return_value.real_estate_reader.read.return_value = [
+            MagicMock(egrid='CH113928077734')
+        ]
+        response = PlrWebservice(request).get_extract_by_id()
+    result = json.loads(response.text)
+    assert result['egrid'] == 'CH113928077734'
+    assert result['status'] == 200
+
+
+def test_log_response_masks_secret(profiler):
+    request = DummyRequest(headers={'X-Oereb-Profile': 'top-secret:cpu', 'Host': 'localhost'},
+                           params={'profile': 'top-secret', 'EGRID': 'CH113928077734'})
+    with patch('pyramid_oereb.contrib.stats.decorators.LOG') as log:
+        log_response(lambda context, request: Response())(None, request)
+    logged = json.loads(log.info.call_args[0][0])['request']
+    assert logged['headers'] == {'X-Oereb-Profile': '***', 'Host': 'localhost'}
+    assert logged['parameters'] == {'profile': '***', 'EGRID': 'CH113928077734'}
+    assert 'top-secret' not in log.info.call_args[0][0]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+import qrcode
+
+from pyramid_oereb.core.qr_code import QrCodeCache, create_qr_code
+
+
+@pytest.fixture
+def png_binary():
+    qr = qrcode.QRCode()
+    qr.add_data('http://qr-example.abc')
+    qr.make()
+    output = io.BytesIO()
+    qr.make_image().save(output, format='PNG')
+    yield output.getvalue()
+
+
+def test_create_qr_code(png_binary):
+    assert create_qr_code('http://qr-example.abc') == png_binary
+
+
+def test_qr_code_cache(png_binary):
+    cache = QrCodeCache(maxsize=1)
+    assert cache.get('http://qr-example.abc') == png_binary
+    assert cache.get('http://qr-example.abc') is cache.get('http://qr-example.abc')
+    cache.get('http://qr-example.def')
+    assert cache.info() == {'hits': 2, 'misses': 2, 'size': 1, 'maxsize': 1}
+    # the least recently used code is evicted
+    assert cache.get('http://qr-example.abc') == png_binary
+    assert cache.info()['misses'] == 3
+    cache.clear()
+    assert cache.info()['size'] == 0
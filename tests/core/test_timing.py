@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from pyramid_oereb.core.timing import TimedIterator, Timing, get_timing, span, start_timing, stop_timing
+
+
+def test_span_disabled():
+    assert get_timing() is None
+    with span('stage'):
+        pass
+    assert span('stage') is span('other')
+
+
+def test_span_enabled():
+    timing, token = start_timing()
+    try:
+        assert get_timing() is timing
+        with span('stage', 'ch.Nutzungsplanung'):
+            pass
+        with pytest.raises(ValueError):
+            with span('failed'):
+                raise ValueError()
+    finally:
+        stop_timing(token)
+    assert get_timing() is None
+    spans = timing.as_list()
+    assert [(s['name'], s['label']) for s in spans] == [('stage', 'ch.Nutzungsplanung'), ('failed', None)]
+    assert all(s['duration'] >= 0 for s in spans)
+
+
+def test_span_other_thread():
+    timing, token = start_timing()
+    try:
+        def read():
+            with span('plr_source', 'ch.A', timing=timing):
+                pass
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+    finally:
+        stop_timing(token)
+    assert [s['name'] for s in timing.as_list()] == ['plr_source']
+
+
+def test_server_timing():
+    timing = Timing()
+    timing.add('process', 12.34567)
+    timing.add('plr_source', 1.5, 'ch.A"')
+    assert timing.server_timing() == 'process;dur=12.346, plr_source;desc="ch.A\'";dur=1.5'
+
+
+def test_partial_spans():
+    timing = Timing()
+    timing.add('process', 10.)
+    timing.add('render', 2., 'xml')
+    timing.add('total', 15.)
+    timing.mark_partial('render', 'total')
+    assert timing.server_timing() == \
+        'process;dur=10.0, render;desc="xml partial";dur=2.0, total;desc="partial";dur=15.0'
+    assert [s.get('partial', False) for s in timing.as_list()] == [False, True, True]
+    # the partial spans are completed with the time the body took to be sent
+    assert timing.completed(5.) == [
+        {'name': 'process', 'label': None, 'duration': 10.},
+        {'name': 'render', 'label': 'xml', 'duration': 7.},
+        {'name': 'total', 'label': None, 'duration': 20.}
+    ]
+
+
+def test_timed_iterator():
+    callback = MagicMock()
+    app_iter = TimedIterator([b'a', b'b'], callback)
+    assert list(app_iter) == [b'a', b'b']
+    app_iter.close()
+    assert callback.call_count == 1
+    assert callback.call_args[0][0] >= 0
+
+
+def test_timed_iterator_closed():
+    callback = MagicMock()
+    inner = MagicMock()
+    inner.__iter__.return_value = iter([b'a', b'b'])
+    app_iter = TimedIterator(inner, callback)
+    next(app_iter)
+    app_iter.close()
+    assert inner.close.call_count == 1
+    assert callback.call_count == 1
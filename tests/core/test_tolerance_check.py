@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import copy
+import datetime
+
+import pytest
+from shapely.geometry import LineString, MultiPoint, Point, Polygon
+
+from pyramid_oereb.core.records.geometry import GeometryRecord, MeasuredGeometryRecord
+from pyramid_oereb.core.records.image import ImageRecord
+from pyramid_oereb.core.records.law_status import LawStatusRecord
+from pyramid_oereb.core.records.office import OfficeRecord
+from pyramid_oereb.core.records.plr import PlrRecord
+from pyramid_oereb.core.records.real_estate import RealEstateRecord
+from pyramid_oereb.core.records.theme import ThemeRecord
+from pyramid_oereb.core.records.view_service import ViewServiceRecord, LegendEntryRecord
+from pyramid_oereb.core.tolerance_check import ToleranceCheck
+
+
+law_status = LawStatusRecord('inKraft', {'de': 'Rechtskräftig'})
+
+geometry_types = {
+    'point': {'types': ['Point', 'MultiPoint']},
+    'line': {'types': ['LineString', 'LinearRing', 'MultiLineString']},
+    'polygon': {'types': ['Polygon', 'MultiPolygon']},
+    'collection': {'types': ['GeometryCollection']}
+}
+
+
+def create_plr(geometries, published_from=datetime.date(1985, 8, 29), **kwargs):
+    theme = ThemeRecord('code', dict(), 100)
+    return PlrRecord(
+        theme,
+        LegendEntryRecord(ImageRecord('1'.encode('utf-8')), {'en': 'Content'}, 'CodeA', None, theme,
+                          view_service_id=1),
+        law_status,
+        datetime.date(1985, 8, 29),
+        None,
+        OfficeRecord({'en': 'Office'}),
+        ImageRecord('1'.encode('utf-8')),
+        ViewServiceRecord({'de': 'http://my.wms.com'}, 1, 1.0, 'de', 2056, None, None),
+        [GeometryRecord(law_status, published_from, None, geom) for geom in geometries],
+        **kwargs
+    )
+
+
+def create_real_estate():
+    limit = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    return RealEstateRecord('Liegenschaft', 'BL', 'Aesch BL', 2761, 100, limit)
+
+
+def create_plrs():
+    return [
+        create_plr([
+            Polygon([(5, 5), (15, 5), (15, 15), (5, 15)]),
+            # touching the real estate only
+            Polygon([(10, 0), (20, 0), (20, 10), (10, 10)]),
+            # overlapping and touching the real estate resulting in a geometry collection
+            Polygon([(2, -2), (3, 1), (4, -2), (5, 0), (6, -2), (6, -3), (2, -3)]),
+            Polygon([(30, 30), (40, 30), (40, 40), (30, 40)])
+        ], min_area=1.0),
+        create_plr([
+            LineString([(-5, 5), (15, 5)]),
+            LineString([(9.5, 0), (9.5, 0.5)]),
+            # touching the real estate only
+            Polygon([(10, 2), (12, 2), (12, 4), (10, 4)])
+        ], min_length=1.0),
+        create_plr([
+            Point(1, 1),
+            Point(10.5, 1),
+            MultiPoint([(2, 2), (3, 3), (20, 20)])
+        ], tolerances={'Point': 1.0}),
+        create_plr([
+            Polygon([(10.2, 2), (12, 2), (12, 4), (10.2, 4)]),
+            LineString([(10.1, -5), (10.1, 15)]),
+            Polygon([(-5, -5), (0, -5), (-2.5, 0)])
+        ], tolerances={'ALL': 0.5}),
+        create_plr([Point(20, 20)]),
+        create_plr([Polygon([(0, 0), (5, 0), (5, 5)])], published_from=datetime.date.today() +
+                   datetime.timedelta(days=1))
+    ]
+
+
+def get_state(plrs):
+    return [
+        (
+            plr.area_share, plr.length_share, plr.nr_of_points, plr.part_in_percent,
+            [
+                (g.geom.wkt, g._area_share, g._length_share, g._nr_of_points, g._units, g._test_passed,
+                 g.calculated)
+                for g in plr.geometries
+            ]
+        )
+        for plr in plrs
+    ]
+
+
+def test_calculate_same_as_records():
+    real_estate = create_real_estate()
+    plrs = create_plrs()
+    expected_plrs = copy.deepcopy(plrs)
+    expected = [plr.calculate(real_estate, geometry_types) for plr in expected_plrs]
+    assert ToleranceCheck(real_estate).calculate(plrs, geometry_types) == expected
+    assert expected == [True, True, True, True, False, False]
+    assert get_state(plrs) == get_state(expected_plrs)
+
+
+def test_calculate_empty():
+    assert ToleranceCheck(create_real_estate()).calculate([], geometry_types) == []
+
+
+def test_get_limit():
+    real_estate = create_real_estate()
+    tolerance_check = ToleranceCheck(real_estate)
+    assert tolerance_check.get_limit() is real_estate.limit
+    buffered = tolerance_check.get_limit(0.5)
+    assert buffered.area == pytest.approx(real_estate.limit.buffer(0.5).area)
+    assert tolerance_check.get_limit(0.5) is buffered
+
+
+def test_calculate_measured():
+    real_estate = create_real_estate()
+    plr = create_plr([Polygon([(5, 5), (15, 5), (15, 15), (5, 15)])], min_area=1.0)
+    measured = MeasuredGeometryRecord(law_status, datetime.date(1985, 8, 29), None, 'Polygon', 'Polygon',
+                                      25.0)
+    plr.geometries.append(measured)
+    assert ToleranceCheck(real_estate).calculate([plr], geometry_types) == [True]
+    assert plr.geometries[1] is measured
+    assert measured.area_share == 25.0
+    assert plr.area_share == 50
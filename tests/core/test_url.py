@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import pytest
 
-from pyramid_oereb.core.url import uri_validator, parse_url
+from pyramid_oereb.core.url import uri_validator, parse_url, canonicalize_wms_url
 
 
 @pytest.mark.parametrize('uri', [
@@ -48,3 +48,17 @@ def test_parse_url_uppercase(url_sample, expected_url_param_dict):
     url, params = parse_url(url_sample)
     for k, v in expected_url_param_dict.items():
         assert params[k.upper()] == v
+
+
+def test_canonicalize_wms_url():
+    first = canonicalize_wms_url(
+        'HTTPS://WMS.Example.com/wms?layers=a&BBOX=2600000,1200000.0,2600100.00001,1200100&SRS=EPSG:2056'
+    )
+    second = canonicalize_wms_url(
+        'https://wms.example.com/wms?srs=EPSG:2056&bbox=2600000.0,1200000,2600100,1200100.0&LAYERS=a'
+    )
+    assert first == second
+    assert first == 'https://wms.example.com/wms?' \
+        'BBOX=2600000.000%2C1200000.000%2C2600100.000%2C1200100.000&LAYERS=a&SRS=EPSG%3A2056'
+    assert canonicalize_wms_url('https://wms.example.com/wms?LAYERS=b') != \
+        canonicalize_wms_url('https://wms.example.com/wms?LAYERS=a')
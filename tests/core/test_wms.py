@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from pyramid_oereb.core.adapter import FileAdapter
+from pyramid_oereb.core.records.view_service import ViewServiceRecord
+from pyramid_oereb.core.wms import WmsDownloader, WmsImageCache
+
+
+@pytest.fixture
+def png_binary():
+    yield FileAdapter().read('tests/resources/logo_canton.png')
+
+
+def create_view_service(url):
+    return ViewServiceRecord({'de': url}, 1, 1.0, 'de', 2056, None, None, True)
+
+
+def create_response(content, status_code=200, content_type='image/png'):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {'content-type': content_type}
+    response.content = content
+    return response
+
+
+class TrackingSession(object):
+
+    def __init__(self, response, delay=0.0):
+        self.response = response
+        self.delay = delay
+        self.urls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.urls.append(url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return self.response
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_download_deduplicates_urls(png_binary, max_workers):
+    session = TrackingSession(create_response(png_binary))
+    downloader = WmsDownloader(max_workers=max_workers)
+    view_services = [
+        create_view_service('http://wms.example.com/?LAYERS=a'),
+        create_view_service('http://wms.example.com/?LAYERS=b'),
+        create_view_service('http://wms.example.com/?LAYERS=a')
+    ]
+    with patch.object(downloader, '_create_session', return_value=session):
+        downloader.download(view_services, 'de')
+    assert sorted(session.urls) == ['http://wms.example.com/?LAYERS=a', 'http://wms.example.com/?LAYERS=b']
+    for view_service in view_services:
+        assert view_service.image['de'].content == png_binary
+
+
+def test_download_concurrent(png_binary):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fetch(url, proxies=None, verify=True):
+        barrier.wait()
+        return create_response(png_binary)
+
+    downloader = WmsDownloader(max_workers=3)
+    view_services = [create_view_service('http://wms.example.com/?LAYERS={0}'.format(i)) for i in range(3)]
+    with patch.object(downloader, 'fetch', side_effect=fetch):
+        downloader.download(view_services, 'de')
+    for view_service in view_services:
+        assert view_service.image['de'].content == png_binary
+
+
+def test_download_max_per_host(png_binary):
+    session = TrackingSession(create_response(png_binary), delay=0.05)
+    downloader = WmsDownloader(max_workers=4, max_per_host=1)
+    view_services = [create_view_service('http://wms.example.com/?LAYERS={0}'.format(i)) for i in range(4)]
+    with patch.object(downloader, '_create_session', return_value=session):
+        downloader.download(view_services, 'de')
+    assert len(session.urls) == 4
+    assert session.max_active == 1
+
+
+def test_download_no_image():
+    session = TrackingSession(create_response(b'error', content_type='text/plain'))
+    downloader = WmsDownloader()
+    with patch.object(downloader, '_create_session', return_value=session):
+        with pytest.raises(LookupError):
+            downloader.download([create_view_service('http://wms.example.com/')], 'de')
+
+
+def test_download_invalid_url():
+    downloader = WmsDownloader()
+    with pytest.raises(AttributeError):
+        downloader.download([create_view_service('no url')], 'de')
+
+
+def test_fetch_error():
+    session = MagicMock()
+    session.get.side_effect = IOError('connection refused')
+    downloader = WmsDownloader(timeout=[1, 5])
+    with patch.object(downloader, '_create_session', return_value=session):
+        with pytest.raises(LookupError):
+            downloader.fetch('http://wms.example.com/')
+    assert session.get.call_args[1]['timeout'] == (1, 5)
+
+
+def test_session_retries():
+    downloader = WmsDownloader(retries=3, backoff_factor=0.1)
+    adapter = downloader.session.get_adapter('https://wms.example.com/')
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert downloader.session is downloader.session
+
+
+def test_image_cache_memory():
+    cache = WmsImageCache(memory_max_size=10)
+    assert cache.get('http://wms.example.com/?BBOX=1,2,3,4') is None
+    cache.put('http://wms.example.com/?BBOX=1,2,3,4', b'12345')
+    assert cache.get('http://WMS.example.com/?bbox=1.0,2.0,3.0,4.0') == b'12345'
+    cache.put('http://wms.example.com/?BBOX=5,6,7,8', b'123456')
+    # the least recently used image is evicted
+    assert cache.get('http://wms.example.com/?BBOX=1,2,3,4') is None
+    assert cache.get('http://wms.example.com/?BBOX=5,6,7,8') == b'123456'
+    info = cache.info()
+    assert info['memory_hits'] == 2
+    assert info['misses'] == 2
+    assert info['hit_rate'] == 0.5
+    assert info['bytes_saved'] == 11
+    assert info['memory_size'] == 6
+
+
+def test_image_cache_ttl():
+    cache = WmsImageCache(ttl=10)
+    with patch('pyramid_oereb.core.wms.time.time', return_value=100.):
+        cache.put('http://wms.example.com/', b'1')
+    with patch('pyramid_oereb.core.wms.time.time', return_value=105.):
+        assert cache.get('http://wms.example.com/') == b'1'
+    with patch('pyramid_oereb.core.wms.time.time', return_value=111.):
+        assert cache.get('http://wms.example.com/') is None
+    assert cache.info()['memory_size'] == 0
+
+
+def test_image_cache_disk(tmp_path):
+    cache = WmsImageCache(disk_path=str(tmp_path), disk_max_size=10)
+    cache.put('http://wms.example.com/?LAYERS=a', b'123456')
+    # a new instance reads the images written by another one
+    other = WmsImageCache(disk_path=str(tmp_path), disk_max_size=10)
+    assert other.get('http://wms.example.com/?LAYERS=a') == b'123456'
+    assert other.info()['disk_hits'] == 1
+    assert other.get('http://wms.example.com/?LAYERS=a') == b'123456'
+    assert other.info()['memory_hits'] == 1
+    other.put('http://wms.example.com/?LAYERS=b', b'123456')
+    assert len(list(tmp_path.glob('*.img'))) == 1
+    assert other.info()['disk_size'] == 6
+    other.clear()
+    assert len(list(tmp_path.glob('*.img'))) == 0
+
+
+def test_image_cache_disk_low_water(tmp_path):
+    cache = WmsImageCache(disk_path=str(tmp_path), disk_max_size=100)
+    for i in range(10):
+        cache.put('http://wms.example.com/?LAYERS={0}'.format(i), b'1234567890')
+    assert cache.info()['disk_size'] == 100
+    # the oldest images are removed down to the low-water mark at once
+    with patch.object(cache, '_disk_files', wraps=cache._disk_files) as disk_files:
+        cache.put('http://wms.example.com/?LAYERS=10', b'1234567890')
+        cache.put('http://wms.example.com/?LAYERS=11', b'12345')
+    assert disk_files.call_count == 1
+    assert cache.info()['disk_size'] == 95
+    assert len(list(tmp_path.glob('*.img'))) == 10
+
+
+def test_image_cache_disk_shared(tmp_path):
+    cache = WmsImageCache(disk_path=str(tmp_path), disk_max_size=10)
+    other = WmsImageCache(disk_path=str(tmp_path), disk_max_size=10)
+    cache.put('http://wms.example.com/?LAYERS=a', b'123456')
+    other.put('http://wms.example.com/?LAYERS=b', b'12')
+    assert other.info()['disk_size'] == 8
+    # the size written by the other instance is seen on the next scan of the directory
+    with patch.object(WmsImageCache, 'DISK_SCAN_INTERVAL', -1):
+        cache.put('http://wms.example.com/?LAYERS=c', b'1234')
+    assert cache.info()['disk_size'] <= 9
+    assert len(list(tmp_path.glob('*.img'))) == 2
+
+
+def test_download_cached(png_binary):
+    session = TrackingSession(create_response(png_binary))
+    downloader = WmsDownloader(cache=WmsImageCache())
+    with patch.object(downloader, '_create_session', return_value=session):
+        downloader.download([create_view_service('http://wms.example.com/?BBOX=1,2,3,4')], 'de')
+        view_service = create_view_service('http://wms.example.com/?BBOX=1.0,2.0,3.0,4.0')
+        downloader.download([view_service], 'de')
+    assert len(session.urls) == 1
+    assert view_service.image['de'].content == png_binary
+    assert downloader.cache.info()['bytes_saved'] == len(png_binary)
+
+
+def test_download_not_cached_on_error():
+    session = TrackingSession(create_response(b'error', content_type='text/plain'))
+    downloader = WmsDownloader(cache=WmsImageCache())
+    with patch.object(downloader, '_create_session', return_value=session):
+        with pytest.raises(LookupError):
+            downloader.download([create_view_service('http://wms.example.com/')], 'de')
+    assert downloader.cache.get('http://wms.example.com/') is None
+
+
+def test_download_cached_partial_error(png_binary):
+
+    def fetch(url, proxies=None, verify=True):
+        if 'LAYERS=b' in url:
+            raise LookupError('not found')
+        return create_response(png_binary)
+
+    downloader = WmsDownloader(max_workers=2, cache=WmsImageCache())
+    view_services = [
+        create_view_service('http://wms.example.com/?LAYERS=a'),
+        create_view_service('http://wms.example.com/?LAYERS=b')
+    ]
+    with patch.object(downloader, 'fetch', side_effect=fetch):
+        with pytest.raises(LookupError):
+            downloader.download(view_services, 'de')
+    assert downloader.cache.get('http://wms.example.com/?LAYERS=a') == png_binary
+    assert downloader.cache.get('http://wms.example.com/?LAYERS=b') is None
@@ -7,6 +7,7 @@ from jsonschema import Draft4Validator
 from pyramid.httpexceptions import HTTPBadRequest, HTTPSeeOther, HTTPNoContent
 
 from tests.mockrequest import MockRequest
+from pyramid_oereb.core.extract_cache import ExtractCache, MemoryBackend
 from pyramid_oereb.core.views.webservice import PlrWebservice
 
 import pyramid_oereb.core.renderer.extract.json_
@@ -226,6 +227,33 @@ def test_return_json(pyramid_oereb_test_config, pyramid_test_config, schema_json
         assert restrictions[2]['Lawstatus']['Code'] == 'inForce'
 
 
+def test_return_json_cached(pyramid_oereb_test_config, pyramid_test_config, extract_real_estate_data,
+                            main_schema, land_use_plans, contaminated_sites):
+    pyramid_test_config.add_renderer('pyramid_oereb_extract_json',
+                                     'pyramid_oereb.core.renderer.extract.json_.Renderer')
+    extract_cache = ExtractCache(MemoryBackend())
+    responses = []
+    with patch('pyramid_oereb.core.views.webservice.get_extract_cache', return_value=extract_cache):
+        for _ in range(2):
+            request = MockRequest()
+            request.matchdict.update({
+                'format': 'JSON'
+            })
+            request.params.update({
+                'EGRID': 'TEST'
+            })
+            responses.append(PlrWebservice(request).get_extract_by_id())
+    assert extract_cache.info()['hits'] == 1
+    assert responses[1].content_type == 'application/json'
+    first, second = [
+        json.loads(response.body.decode('utf-8')).get('GetExtractByIdResponse').get('extract')
+        for response in responses
+    ]
+    assert first.pop('ExtractIdentifier') != second.pop('ExtractIdentifier')
+    assert first.pop('CreationDate') <= second.pop('CreationDate')
+    assert first == second
+
+
 @patch.object(MockRequest, 'route_url', lambda *args, **kwargs: '')
 def test_format_url(real_estate_data):
     request = MockRequest()
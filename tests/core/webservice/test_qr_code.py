@@ -6,7 +6,8 @@ import qrcode
 from pyramid.httpexceptions import HTTPNoContent
 from pyramid.response import Response
 from tests.mockrequest import MockRequest
-from pyramid_oereb.core.views.webservice import QRcode
+from pyramid_oereb.core.qr_code import qr_code_cache
+from pyramid_oereb.core.views.webservice import Parameter, QRcode
 
 
 @pytest.fixture
@@ -50,3 +51,15 @@ def test_create_qr_code(png_binary):
 
 def test_sanitize_url():
     assert QRcode.sanitize_url('http://qr-example.abc') == 'http://qr-example.abc'
+
+
+def test_get_qr_code_cached(png_binary):
+    qr_code_cache.clear()
+    request = MockRequest()
+    request.params.update({
+        'extract_url': 'http://qr-example.abc'
+    })
+    QRcode(request).get_qr_code()
+    params = Parameter('json', extract_url='http://qr-example.abc')
+    assert params.qr_code == png_binary
+    assert qr_code_cache.info()['hits'] == 1